@@ -2,72 +2,127 @@
 Inventory Management System (Complete)
 
 Features:
-- SQLite DB (inventory.db) with tables: products, sales.
-- Ensures `subcategory` column exists (adds it if missing).
+- SQLite DB (inventory.db) with tables: products, sales (see inventory_service.py).
+- Ensures `subcategory` column exists (adds it if missing) and creates indexes.
+- All database work from the GUI runs on a background worker thread (DBExecutor).
 - GUI with Tkinter:
     * Add Product (Name, Category, Subcategory, Price, Stock)
-    * View Products (shows ID, Name, Category, Subcategory, Price, Stock)
+    * View Products (shows ID, Name, Category, Subcategory, Price, Stock; paged, loads while scrolling)
     * Update Product (load existing by ID, edit fields, save)
     * Remove Product (by ID)
     * Sell Product (by ID + quantity -> reduces stock, records sale)
-    * Category Chart (bar)
-    * Subcategory Chart (pie)
+    * Search Products (as-you-type, double-click to sell)
+    * Category Chart (bar) and Subcategory Chart (pie), embedded in Tk; see charts.py
     * Exit
 """
 
-import sqlite3
+import queue
+import threading
 import tkinter as tk
-from tkinter import ttk, messagebox, Toplevel
-import matplotlib.pyplot as plt
-
-DB_FILE = "inventory.db"
-
-# -------------------- DATABASE SETUP --------------------
-def init_db():
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-
-    # Create base products table (without subcategory may exist on older runs)
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS products (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT,
-            category TEXT,
-            price REAL,
-            stock INTEGER
-        )
-    """)
-
-    # If subcategory column missing, add it safely
-    c.execute("PRAGMA table_info(products)")
-    columns = [col[1] for col in c.fetchall()]
-    if "subcategory" not in columns:
-        try:
-            c.execute("ALTER TABLE products ADD COLUMN subcategory TEXT")
-        except Exception:
-            # If alter fails for some reason, ignore (table might already have it)
-            pass
-
-    # Create sales table
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS sales (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            product_id INTEGER,
-            quantity INTEGER,
-            total REAL,
-            date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-
-    conn.commit()
-    conn.close()
-
-# -------------------- UTIL --------------------
-def get_db_connection():
-    return sqlite3.connect(DB_FILE)
+from tkinter import ttk, messagebox, filedialog, Toplevel
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
+import charts
+from inventory_service import (
+    init_db, close_db_connections, validate_product,
+    add_product, get_product, update_product, delete_product, sell_many,
+    products_after, products_before, products_between,
+    search_products, category_stock, subcategory_stock,
+)
+
+# -------------------- BACKGROUND DB WORKER --------------------
+class DBExecutor:
+    """Runs database jobs off the Tk main loop.
+
+    submit() queues a job for the worker threads, which run it on their own
+    persistent connections. Finished jobs go onto a result queue that the Tk
+    thread drains every poll_ms via root.after, so callbacks (which usually touch
+    widgets) always run on the Tk thread. Progress listeners are told how many
+    jobs are outstanding whenever that changes. With more than one worker, jobs
+    may run concurrently; chain dependent work through on_done.
+    """
+
+    def __init__(self, root, workers=2, poll_ms=30):
+        self.root = root
+        self.poll_ms = poll_ms
+        self.jobs = queue.Queue()
+        self.results = queue.Queue()
+        self.pending = 0
+        self.listeners = []
+        self.threads = [threading.Thread(target=self._work, name=f"db-worker-{i}", daemon=True)
+                        for i in range(workers)]
+        for t in self.threads:
+            t.start()
+        self._after_id = root.after(poll_ms, self._poll)
+
+    def submit(self, fn, *args, on_done=None, on_error=None, **kwargs):
+        """Run fn(*args, **kwargs) on a worker; on_done(result) / on_error(exc) run on Tk."""
+        self.pending += 1
+        self._notify()
+        self.jobs.put((fn, args, kwargs, on_done, on_error))
+
+    def _work(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                close_db_connections()
+                return
+            fn, args, kwargs, on_done, on_error = job
+            try:
+                self.results.put((on_done, fn(*args, **kwargs), None, on_error))
+            except Exception as e:
+                self.results.put((on_done, None, e, on_error))
+
+    def _poll(self):
+        while True:
+            try:
+                on_done, result, error, on_error = self.results.get_nowait()
+            except queue.Empty:
+                break
+            self.pending -= 1
+            self._notify()
+            if error is not None:
+                (on_error or self._show_error)(error)
+            elif on_done is not None:
+                on_done(result)
+        self._after_id = self.root.after(self.poll_ms, self._poll)
+
+    def _notify(self):
+        for listener in self.listeners:
+            listener(self.pending)
+
+    @staticmethod
+    def _show_error(error):
+        messagebox.showerror("Database error", str(error))
+
+    def shutdown(self):
+        """Stop polling and let the workers finish queued jobs and exit."""
+        self.root.after_cancel(self._after_id)
+        for _ in self.threads:
+            self.jobs.put(None)
+        for t in self.threads:
+            t.join(timeout=5)
+
+def submit_from(win, button, executor, fn, *args, on_done=None):
+    """Submit fn from a dialog: disable button until it finishes and drop the
+    callback if the dialog was closed in the meantime."""
+    button.state(["disabled"])
+
+    def finished(result):
+        if win.winfo_exists():
+            button.state(["!disabled"])
+            if on_done is not None:
+                on_done(result)
+
+    def failed(error):
+        if win.winfo_exists():
+            button.state(["!disabled"])
+        DBExecutor._show_error(error)
+
+    executor.submit(fn, *args, on_done=finished, on_error=failed)
 
 # -------------------- GUI FUNCTIONS --------------------
-def add_product_window(parent):
+def add_product_window(parent, executor):
     win = Toplevel(parent)
     win.title("Add Product")
     win.resizable(False, False)
@@ -91,66 +146,224 @@ def add_product_window(parent):
     stock_e = ttk.Entry(frm, width=30); stock_e.grid(row=4, column=1, pady=3)
 
     def save():
-        name = name_e.get().strip()
-        category = category_e.get().strip()
-        subcat = subcat_e.get().strip()
         try:
-            price = float(price_e.get())
-            stock = int(stock_e.get())
-        except ValueError:
-            messagebox.showerror("Input error", "Price must be number and Stock must be integer.")
+            name, category, subcat, price, stock = validate_product(
+                name_e.get(), category_e.get(), subcat_e.get(), price_e.get(), stock_e.get())
+        except ValueError as e:
+            messagebox.showerror("Input error", str(e))
             return
-        if not name or not category:
-            messagebox.showwarning("Missing", "Please enter Name and Category.")
-            return
-
-        conn = get_db_connection()
-        cur = conn.cursor()
-        cur.execute("INSERT INTO products(name, category, subcategory, price, stock) VALUES(?,?,?,?,?)",
-                    (name, category, subcat, price, stock))
-        conn.commit()
-        conn.close()
-        messagebox.showinfo("Success", f"Product '{name}' added.")
-        win.destroy()
 
-    ttk.Button(frm, text="Save", command=save).grid(row=5, column=0, columnspan=2, pady=8)
+        def done(pid):
+            messagebox.showinfo("Success", f"Product '{name}' added.")
+            win.destroy()
+
+        submit_from(win, save_btn, executor, add_product, name, category, subcat, price, stock, on_done=done)
+
+    save_btn = ttk.Button(frm, text="Save", command=save)
+    save_btn.grid(row=5, column=0, columnspan=2, pady=8)
+
+class ProductGrid:
+    """Virtualized product list used by View Products.
+
+    Only a window of at most page_size * max_pages rows is ever loaded into the
+    Treeview. Pages are fetched with keyset pagination on id, so each fetch costs
+    the same however deep the user has scrolled, and rows that scroll far out of
+    view are dropped again. Memory therefore stays flat with table size.
+
+    Fetches run on the DBExecutor and their rows are applied in its callback, one
+    fetch at a time. load_first() and refresh() supersede a fetch in flight: its
+    rows are discarded when they arrive.
+    """
+
+    COLUMNS = ("ID", "Name", "Category", "Subcategory", "Price", "Stock")
+
+    def __init__(self, parent, executor, page_size=200, max_pages=3, db_file=None):
+        self.executor = executor
+        self.page_size = page_size
+        self.max_rows = page_size * max_pages
+        self.db_file = db_file
+        self.rows = {}            # id -> row tuple, only for the loaded window
+        self.order = []           # loaded ids in ascending order
+        self.at_start = self.at_end = False
+        self._generation = 0      # bumped by load_first/refresh to drop older fetches
+        self._busy = False
+
+        self.frame = ttk.Frame(parent)
+        self.tree = ttk.Treeview(self.frame, columns=self.COLUMNS, show="headings")
+        for c in self.COLUMNS:
+            self.tree.heading(c, text=c)
+            self.tree.column(c, anchor="center")
+        self.scrollbar = ttk.Scrollbar(self.frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=self._on_yview)
+        self.tree.pack(side="left", fill="both", expand=True)
+        self.scrollbar.pack(side="right", fill="y")
+
+    # ---- scrolling ----
+    def _on_yview(self, first, last):
+        self.scrollbar.set(first, last)
+        if self._busy:
+            return
+        if float(last) >= 0.9 and not self.at_end:
+            self.load_next()
+        elif float(first) <= 0.1 and not self.at_start:
+            self.load_previous()
+
+    def _fetch(self, fn, *args, apply, supersede=False):
+        """Run fn(*args) on the executor, then apply(result) on the Tk thread,
+        unless the window closed or a superseding fetch started meanwhile."""
+        if self._busy and not supersede:
+            return
+        self._generation += 1
+        generation = self._generation
+        self._busy = True
+
+        def done(result):
+            if generation != self._generation:
+                return
+            self._busy = False
+            if self.tree.winfo_exists():
+                apply(result)
+
+        def failed(error):
+            if generation == self._generation:
+                self._busy = False
+            DBExecutor._show_error(error)
+
+        self.executor.submit(fn, *args, on_done=done, on_error=failed)
+
+    def _top_visible(self):
+        if not self.order:
+            return None
+        idx = int(self.tree.yview()[0] * len(self.order))
+        return self.order[min(idx, len(self.order) - 1)]
+
+    def _scroll_to(self, pid):
+        if pid in self.rows:
+            self.tree.yview_moveto(self.order.index(pid) / len(self.order))
+
+    # ---- window maintenance ----
+    def _drop(self, ids):
+        if ids:
+            self.tree.delete(*[str(pid) for pid in ids])
+            for pid in ids:
+                del self.rows[pid]
+
+    def _trim_top(self):
+        excess = len(self.order) - self.max_rows
+        if excess > 0:
+            self._drop(self.order[:excess])
+            self.order = self.order[excess:]
+            self.at_start = False
+
+    def _trim_bottom(self):
+        excess = len(self.order) - self.max_rows
+        if excess > 0:
+            self._drop(self.order[-excess:])
+            self.order = self.order[:-excess]
+            self.at_end = False
+
+    def load_first(self):
+        """(Re)load the first page."""
+        self._fetch(products_after, 0, self.page_size, self.db_file, apply=self._show_first, supersede=True)
+
+    def _show_first(self, rows):
+        self._drop(self.order)
+        self.order = []
+        self.at_start = True
+        self.at_end = len(rows) < self.page_size
+        for row in rows:
+            self.tree.insert("", "end", iid=str(row[0]), values=row)
+            self.rows[row[0]] = row
+            self.order.append(row[0])
+        self.tree.yview_moveto(0)
+
+    def load_next(self):
+        after = self.order[-1] if self.order else 0
+        self._fetch(products_after, after, self.page_size, self.db_file, apply=self._show_next)
+
+    def _show_next(self, rows):
+        self.at_end = len(rows) < self.page_size
+        if not rows:
+            return
+        anchor = self._top_visible()
+        for row in rows:
+            self.tree.insert("", "end", iid=str(row[0]), values=row)
+            self.rows[row[0]] = row
+            self.order.append(row[0])
+        self._trim_top()
+        self._scroll_to(anchor)
+
+    def load_previous(self):
+        if not self.order:
+            return
+        self._fetch(products_before, self.order[0], self.page_size, self.db_file, apply=self._show_previous)
 
-def view_products_window(parent):
+    def _show_previous(self, rows):
+        self.at_start = len(rows) < self.page_size
+        if not rows:
+            return
+        anchor = self._top_visible()
+        rows.reverse()
+        for idx, row in enumerate(rows):
+            self.tree.insert("", idx, iid=str(row[0]), values=row)
+            self.rows[row[0]] = row
+        self.order = [row[0] for row in rows] + self.order
+        self._trim_bottom()
+        self._scroll_to(anchor)
+
+    def refresh(self):
+        """Bring the loaded window up to date by diffing, not rebuilding."""
+        if not self.order:
+            self.load_first()
+            return
+        first, last, at_end = self.order[0], self.order[-1], self.at_end
+        page_size, db_file = self.page_size, self.db_file
+
+        def fetch():
+            fresh = products_between(first, last, db_file)
+            # New products get higher ids, so they can only appear after the window.
+            tail = products_after(last, page_size, db_file) if at_end else None
+            return fresh, tail
+
+        self._fetch(fetch, apply=self._apply_refresh, supersede=True)
+
+    def _apply_refresh(self, result):
+        fresh, tail = result
+        if tail is not None:
+            self.at_end = len(tail) < self.page_size
+            fresh += tail
+        anchor = self._top_visible()
+        fresh_ids = {row[0] for row in fresh}
+        self._drop([pid for pid in self.order if pid not in fresh_ids])
+        # Surviving rows keep their relative order, so inserting new ones at their
+        # index in `fresh` while walking it in order lines everything up.
+        for idx, row in enumerate(fresh):
+            pid = row[0]
+            if pid not in self.rows:
+                self.tree.insert("", idx, iid=str(pid), values=row)
+            elif self.rows[pid] != row:
+                self.tree.item(str(pid), values=row)
+            self.rows[pid] = row
+        self.order = [row[0] for row in fresh]
+        self._trim_top()
+        self._scroll_to(anchor)
+
+def view_products_window(parent, executor):
     win = Toplevel(parent)
     win.title("All Products")
     win.geometry("820x400")
 
-    cols = ("ID", "Name", "Category", "Subcategory", "Price", "Stock")
-    tree = ttk.Treeview(win, columns=cols, show="headings")
-    for c in cols:
-        tree.heading(c, text=c)
-        tree.column(c, anchor="center")
-    tree.pack(fill="both", expand=True, padx=8, pady=8)
-
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute("SELECT id, name, category, subcategory, price, stock FROM products ORDER BY id")
-    for row in cur.fetchall():
-        tree.insert("", "end", values=row)
-    conn.close()
-
-    # Add a refresh button in case DB changed
-    def refresh():
-        for i in tree.get_children():
-            tree.delete(i)
-        conn = get_db_connection()
-        cur = conn.cursor()
-        cur.execute("SELECT id, name, category, subcategory, price, stock FROM products ORDER BY id")
-        for row in cur.fetchall():
-            tree.insert("", "end", values=row)
-        conn.close()
+    grid = ProductGrid(win, executor)
+    grid.frame.pack(fill="both", expand=True, padx=8, pady=8)
+    grid.load_first()
 
+    # Refresh only re-reads the rows currently loaded (plus new ones at the end)
     btn_frame = ttk.Frame(win)
     btn_frame.pack(fill="x", pady=4)
-    ttk.Button(btn_frame, text="Refresh", command=refresh).pack(side="left", padx=6)
+    ttk.Button(btn_frame, text="Refresh", command=grid.refresh).pack(side="left", padx=6)
     ttk.Button(btn_frame, text="Close", command=win.destroy).pack(side="right", padx=6)
 
-def delete_product_window(parent):
+def delete_product_window(parent, executor):
     win = Toplevel(parent)
     win.title("Delete Product")
     win.resizable(False, False)
@@ -165,26 +378,28 @@ def delete_product_window(parent):
         except ValueError:
             messagebox.showerror("Input error", "Enter valid integer ID.")
             return
-        conn = get_db_connection()
-        cur = conn.cursor()
-        cur.execute("SELECT name FROM products WHERE id=?", (pid,))
-        r = cur.fetchone()
-        if not r:
-            messagebox.showerror("Not found", "Product ID not found.")
-            conn.close()
-            return
-        if not messagebox.askyesno("Confirm", f"Delete product ID={pid} ({r[0]})?"):
-            conn.close()
-            return
-        cur.execute("DELETE FROM products WHERE id=?", (pid,))
-        conn.commit()
-        conn.close()
-        messagebox.showinfo("Deleted", f"Product ID {pid} deleted.")
-        win.destroy()
 
-    ttk.Button(frm, text="Delete", command=delete).grid(row=1, column=0, columnspan=2, pady=6)
+        def deleted(ok):
+            if not ok:
+                messagebox.showerror("Not found", "Product ID not found.")
+                return
+            messagebox.showinfo("Deleted", f"Product ID {pid} deleted.")
+            win.destroy()
+
+        def confirm(r):
+            if not r:
+                messagebox.showerror("Not found", "Product ID not found.")
+                return
+            if not messagebox.askyesno("Confirm", f"Delete product ID={pid} ({r[0]})?"):
+                return
+            submit_from(win, delete_btn, executor, delete_product, pid, on_done=deleted)
+
+        submit_from(win, delete_btn, executor, get_product, pid, on_done=confirm)
 
-def update_product_window(parent):
+    delete_btn = ttk.Button(frm, text="Delete", command=delete)
+    delete_btn.grid(row=1, column=0, columnspan=2, pady=6)
+
+def update_product_window(parent, executor):
     win = Toplevel(parent)
     win.title("Update Product")
     win.resizable(False, False)
@@ -215,19 +430,18 @@ def update_product_window(parent):
         except ValueError:
             messagebox.showerror("Input error", "Enter valid integer ID.")
             return
-        conn = get_db_connection()
-        cur = conn.cursor()
-        cur.execute("SELECT name, category, subcategory, price, stock FROM products WHERE id=?", (pid,))
-        r = cur.fetchone()
-        conn.close()
-        if not r:
-            messagebox.showerror("Not found", "Product ID not found.")
-            return
-        name_e.delete(0, tk.END); name_e.insert(0, r[0])
-        category_e.delete(0, tk.END); category_e.insert(0, r[1])
-        subcat_e.delete(0, tk.END); subcat_e.insert(0, r[2] if r[2] is not None else "")
-        price_e.delete(0, tk.END); price_e.insert(0, str(r[3]))
-        stock_e.delete(0, tk.END); stock_e.insert(0, str(r[4]))
+
+        def fill(r):
+            if not r:
+                messagebox.showerror("Not found", "Product ID not found.")
+                return
+            name_e.delete(0, tk.END); name_e.insert(0, r[0])
+            category_e.delete(0, tk.END); category_e.insert(0, r[1])
+            subcat_e.delete(0, tk.END); subcat_e.insert(0, r[2] if r[2] is not None else "")
+            price_e.delete(0, tk.END); price_e.insert(0, str(r[3]))
+            stock_e.delete(0, tk.END); stock_e.insert(0, str(r[4]))
+
+        submit_from(win, load_btn, executor, get_product, pid, on_done=fill)
 
     def save_update():
         try:
@@ -235,31 +449,31 @@ def update_product_window(parent):
         except ValueError:
             messagebox.showerror("Input error", "Enter valid integer ID.")
             return
-        name = name_e.get().strip(); category = category_e.get().strip()
-        subcat = subcat_e.get().strip()
         try:
-            price = float(price_e.get()); stock = int(stock_e.get())
-        except ValueError:
-            messagebox.showerror("Input error", "Price must be number and Stock integer.")
-            return
-        if not name or not category:
-            messagebox.showwarning("Missing", "Name and Category required.")
+            name, category, subcat, price, stock = validate_product(
+                name_e.get(), category_e.get(), subcat_e.get(), price_e.get(), stock_e.get())
+        except ValueError as e:
+            messagebox.showerror("Input error", str(e))
             return
-        conn = get_db_connection()
-        cur = conn.cursor()
-        cur.execute("UPDATE products SET name=?, category=?, subcategory=?, price=?, stock=? WHERE id=?",
-                    (name, category, subcat, price, stock, pid))
-        conn.commit()
-        conn.close()
-        messagebox.showinfo("Updated", f"Product ID {pid} updated.")
-        win.destroy()
+
+        def done(ok):
+            if not ok:
+                messagebox.showerror("Not found", "Product ID not found.")
+                return
+            messagebox.showinfo("Updated", f"Product ID {pid} updated.")
+            win.destroy()
+
+        submit_from(win, save_btn, executor, update_product, pid, name, category, subcat, price, stock,
+                    on_done=done)
 
     btn_frame = ttk.Frame(frm)
     btn_frame.grid(row=6, column=0, columnspan=2, pady=6)
-    ttk.Button(btn_frame, text="Load", command=load).pack(side="left", padx=6)
-    ttk.Button(btn_frame, text="Save Update", command=save_update).pack(side="left", padx=6)
+    load_btn = ttk.Button(btn_frame, text="Load", command=load)
+    load_btn.pack(side="left", padx=6)
+    save_btn = ttk.Button(btn_frame, text="Save Update", command=save_update)
+    save_btn.pack(side="left", padx=6)
 
-def sell_product_window(parent):
+def sell_product_window(parent, executor, pid=None):
     win = Toplevel(parent)
     win.title("Sell Product")
     win.resizable(False, False)
@@ -267,6 +481,8 @@ def sell_product_window(parent):
 
     ttk.Label(frm, text="Product ID:").grid(row=0, column=0, sticky="e")
     id_e = ttk.Entry(frm, width=20); id_e.grid(row=0, column=1, pady=4)
+    if pid is not None:
+        id_e.insert(0, str(pid))
 
     ttk.Label(frm, text="Quantity:").grid(row=1, column=0, sticky="e")
     qty_e = ttk.Entry(frm, width=20); qty_e.grid(row=1, column=1, pady=4)
@@ -280,85 +496,113 @@ def sell_product_window(parent):
         if qty <= 0:
             messagebox.showerror("Input error", "Quantity must be > 0.")
             return
-        conn = get_db_connection()
-        cur = conn.cursor()
-        cur.execute("SELECT name, stock, price FROM products WHERE id=?", (pid,))
-        r = cur.fetchone()
-        if not r:
-            conn.close()
-            messagebox.showerror("Not found", "Product ID not found.")
-            return
-        name, stock, price = r
-        if stock < qty:
-            conn.close()
-            messagebox.showwarning("Stock error", f"Only {stock} units available.")
-            return
-        new_stock = stock - qty
-        total = qty * price
-        cur.execute("UPDATE products SET stock=? WHERE id=?", (new_stock, pid))
-        cur.execute("INSERT INTO sales(product_id, quantity, total) VALUES(?,?,?)", (pid, qty, total))
-        conn.commit()
-        conn.close()
-        messagebox.showinfo("Sold", f"Sold {qty} of '{name}'. Total = {total}")
-        win.destroy()
 
-    ttk.Button(frm, text="Sell", command=process_sale).grid(row=2, column=0, columnspan=2, pady=6)
+        def done(lines):
+            line = lines[0]
+            if line.name is None:
+                messagebox.showerror("Not found", line.error)
+                return
+            if not line.ok:
+                messagebox.showwarning("Stock error", line.error)
+                return
+            messagebox.showinfo("Sold", f"Sold {qty} of '{line.name}'. Total = {line.total}")
+            win.destroy()
+
+        submit_from(win, sell_btn, executor, sell_many, [(pid, qty)], on_done=done)
+
+    sell_btn = ttk.Button(frm, text="Sell", command=process_sale)
+    sell_btn.grid(row=2, column=0, columnspan=2, pady=6)
+
+def search_products_window(parent, executor):
+    win = Toplevel(parent)
+    win.title("Search Products")
+    win.geometry("820x400")
+
+    frm = ttk.Frame(win, padding=8); frm.pack(fill="x")
+    ttk.Label(frm, text="Search:").pack(side="left")
+    query_e = ttk.Entry(frm, width=50); query_e.pack(side="left", padx=6, fill="x", expand=True)
+    ttk.Label(win, text="Double-click a product to sell it.").pack(anchor="w", padx=8)
+
+    cols = ("ID", "Name", "Category", "Subcategory", "Price", "Stock")
+    tree = ttk.Treeview(win, columns=cols, show="headings")
+    for c in cols:
+        tree.heading(c, text=c)
+        tree.column(c, anchor="center")
+    tree.pack(fill="both", expand=True, padx=8, pady=8)
+
+    # Search as you type: wait for a short pause in typing, and drop results of
+    # searches that a newer keystroke has already superseded.
+    state = {"after": None, "seq": 0}
+
+    def show(seq, rows):
+        if seq != state["seq"] or not win.winfo_exists():
+            return
+        tree.delete(*tree.get_children())
+        for row in rows:
+            tree.insert("", "end", values=row[:6])
+
+    def run_search():
+        state["after"] = None
+        state["seq"] += 1
+        seq = state["seq"]
+        executor.submit(search_products, query_e.get(), 50, on_done=lambda rows: show(seq, rows))
+
+    def on_key(event):
+        if state["after"] is not None:
+            win.after_cancel(state["after"])
+        state["after"] = win.after(120, run_search)
+
+    def on_open(event):
+        item = tree.focus()
+        if item:
+            sell_product_window(parent, executor, tree.item(item, "values")[0])
+
+    query_e.bind("<KeyRelease>", on_key)
+    tree.bind("<Double-1>", on_open)
+    query_e.focus_set()
 
 # -------------------- VISUALIZATIONS --------------------
-def show_category_chart(parent):
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute("SELECT category, SUM(stock) FROM products GROUP BY category")
-    data = cur.fetchall()
-    conn.close()
+def show_category_chart(parent, executor):
+    # Query on the DB worker, draw on the Tk thread
+    executor.submit(category_stock, on_done=lambda data: show_chart_window(parent, "category", data))
+
+def show_subcategory_chart(parent, executor):
+    executor.submit(subcategory_stock, on_done=lambda data: show_chart_window(parent, "subcategory", data))
 
+def show_chart_window(parent, kind, data):
+    """Embed the chart in a Toplevel; Save exports the same chart as PNG/SVG."""
     if not data:
-        messagebox.showinfo("No data", "No products to visualize.")
+        messagebox.showinfo("No data", "No products to visualize." if kind == "category"
+                            else "No subcategory data to visualize.")
         return
 
-    categories = [d[0] if d[0] else "Uncategorized" for d in data]
-    stocks = [d[1] if d[1] else 0 for d in data]
-
-    plt.figure(figsize=(8,5))
-    bars = plt.bar(categories, stocks)
-    plt.xlabel("Category")
-    plt.ylabel("Total Stock")
-    plt.title("Category-wise Stock")
-    plt.xticks(rotation=30, ha="right")
-    plt.tight_layout()
-
-    # color bars lightly based on value (no explicit color argument required, but okay)
-    plt.show()
-
-def show_subcategory_chart(parent):
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute("SELECT category || ' - ' || subcategory AS label, SUM(stock) FROM products GROUP BY category, subcategory")
-    data = cur.fetchall()
-    conn.close()
-
-    # Filter out empty subcategory labels (if subcategory is null or empty then label contains ' - ' or 'None')
-    filtered = [(lbl if lbl and lbl.strip() and not lbl.endswith(" - ") and not lbl.endswith(" - None") else "Uncategorized", s) for lbl, s in data]
-    labels = [f"{l}" for l, s in filtered]
-    stocks = [s for l, s in filtered]
-
-    if not labels:
-        messagebox.showinfo("No data", "No subcategory data to visualize.")
-        return
+    win = Toplevel(parent)
+    win.title(charts.TITLES[kind])
+    fig = charts.build_figure(kind, *charts.chart_series(kind, data))
+    canvas = FigureCanvasTkAgg(fig, master=win)
+    canvas.draw()
+    canvas.get_tk_widget().pack(fill="both", expand=True)
+
+    def save():
+        path = filedialog.asksaveasfilename(parent=win, defaultextension=".png",
+                                            filetypes=[("PNG image", "*.png"), ("SVG image", "*.svg")])
+        if path:
+            with open(path, "wb") as f:
+                f.write(charts.render_chart(kind, data, path.rsplit(".", 1)[-1].lower()))
 
-    plt.figure(figsize=(7,7))
-    plt.pie(stocks, labels=labels, autopct="%1.1f%%", startangle=90)
-    plt.title("Subcategory Stock Share")
-    plt.tight_layout()
-    plt.show()
+    btn_frame = ttk.Frame(win)
+    btn_frame.pack(fill="x", pady=4)
+    ttk.Button(btn_frame, text="Save...", command=save).pack(side="left", padx=6)
+    ttk.Button(btn_frame, text="Close", command=win.destroy).pack(side="right", padx=6)
 
 # -------------------- MAIN APPLICATION --------------------
 def main():
     init_db()
     root = tk.Tk()
     root.title("Inventory Management System")
-    root.geometry("420x520")
+    root.geometry("420x600")
     root.resizable(False, False)
+    executor = DBExecutor(root)
 
     title = ttk.Label(root, text="Inventory Management System", font=("Arial", 16))
     title.pack(pady=10)
@@ -367,23 +611,50 @@ def main():
     btn_frame = ttk.Frame(root)
     btn_frame.pack(pady=6)
 
-    ttk.Button(btn_frame, text="➕ Add Product", width=30, command=lambda: add_product_window(root)).pack(pady=6)
-    ttk.Button(btn_frame, text="📋 View Products", width=30, command=lambda: view_products_window(root)).pack(pady=6)
-    ttk.Button(btn_frame, text="✏️ Update Product", width=30, command=lambda: update_product_window(root)).pack(pady=6)
-    ttk.Button(btn_frame, text="🗑️ Remove Product", width=30, command=lambda: delete_product_window(root)).pack(pady=6)
-    ttk.Button(btn_frame, text="💰 Sell Product", width=30, command=lambda: sell_product_window(root)).pack(pady=6)
+    ttk.Button(btn_frame, text="➕ Add Product", width=30, command=lambda: add_product_window(root, executor)).pack(pady=6)
+    ttk.Button(btn_frame, text="📋 View Products", width=30, command=lambda: view_products_window(root, executor)).pack(pady=6)
+    ttk.Button(btn_frame, text="✏️ Update Product", width=30, command=lambda: update_product_window(root, executor)).pack(pady=6)
+    ttk.Button(btn_frame, text="🗑️ Remove Product", width=30, command=lambda: delete_product_window(root, executor)).pack(pady=6)
+    ttk.Button(btn_frame, text="💰 Sell Product", width=30, command=lambda: sell_product_window(root, executor)).pack(pady=6)
+    ttk.Button(btn_frame, text="🔍 Search Products", width=30, command=lambda: search_products_window(root, executor)).pack(pady=6)
 
     ttk.Separator(root, orient="horizontal").pack(fill="x", pady=10)
 
     ttk.Label(root, text="--- Visualization ---", font=("Arial", 12)).pack()
-    ttk.Button(root, text="📊 Category Chart", width=30, command=lambda: show_category_chart(root)).pack(pady=6)
-    ttk.Button(root, text="📊 Subcategory Chart (Pie)", width=30, command=lambda: show_subcategory_chart(root)).pack(pady=6)
+    ttk.Button(root, text="📊 Category Chart", width=30, command=lambda: show_category_chart(root, executor)).pack(pady=6)
+    ttk.Button(root, text="📊 Subcategory Chart (Pie)", width=30, command=lambda: show_subcategory_chart(root, executor)).pack(pady=6)
 
     ttk.Separator(root, orient="horizontal").pack(fill="x", pady=10)
 
-    ttk.Button(root, text="🚪 Exit", width=30, command=root.destroy).pack(pady=12)
+    def on_exit():
+        # Stop the executor while the window still exists: shutdown() cancels
+        # its Tk poll callback, which fails once root is destroyed
+        executor.shutdown()
+        root.destroy()
+
+    ttk.Button(root, text="🚪 Exit", width=30, command=on_exit).pack(pady=12)
+    root.protocol("WM_DELETE_WINDOW", on_exit)
+
+    # Status bar: shows progress while the DB worker has jobs outstanding
+    status = ttk.Frame(root)
+    status.pack(side="bottom", fill="x", padx=8, pady=4)
+    status_lbl = ttk.Label(status, text="Ready")
+    status_lbl.pack(side="left")
+    progress = ttk.Progressbar(status, mode="indeterminate", length=120)
+    progress.pack(side="right")
+
+    def on_progress(pending):
+        if pending:
+            status_lbl.config(text=f"Working... ({pending} pending)")
+            progress.start(15)
+        else:
+            status_lbl.config(text="Ready")
+            progress.stop()
+
+    executor.listeners.append(on_progress)
 
     root.mainloop()
+    close_db_connections()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,476 @@
+"""
+Inventory benchmarks
+
+Runs against throwaway databases in a temp folder, never against inventory.db.
+
+Usage:
+    python bench_inventory.py connections [--sales N]
+    python bench_inventory.py stress [--threads N] [--products N] [--stock N]
+    python bench_inventory.py search [--products N] [--queries N]
+    python bench_inventory.py reports [--sales N] [--products N]
+    python bench_inventory.py cache [--products N] [--reads N]
+    python bench_inventory.py journal [--threads N] [--products N]
+    python bench_inventory.py shards [--threads N] [--products N] [--shards N]
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import signal
+import sqlite3
+import tempfile
+import threading
+import time
+
+import inventory_service as inv
+import sales_journal
+import sales_reports
+import sharding
+
+
+def seed_products(conn, n=1000, stock=10**9):
+    """Fill an empty products table with n products that will not run out."""
+    rows = [(f"Product {i}", f"Cat {i % 20}", f"Sub {i % 7}", round(random.uniform(1, 100), 2), stock)
+            for i in range(n)]
+    conn.execute("BEGIN")
+    conn.executemany(inv.SQL_INSERT_PRODUCT, rows)
+    conn.execute("COMMIT")
+    return n
+
+
+ADJECTIVES = ["red", "blue", "large", "small", "organic", "spicy", "frozen", "fresh", "classic", "deluxe"]
+NOUNS = ["pizza", "burger", "sandwich", "coffee", "tea", "juice", "cookie", "salad", "noodles", "wrap",
+         "muffin", "bagel", "soda", "water", "chips", "donut", "taco", "curry", "soup", "cake"]
+
+
+def seed_catalog(conn, n, batch=50000):
+    """n products with realistic-looking, searchable names."""
+    rng = random.Random(1)
+    for start in range(0, n, batch):
+        rows = []
+        for i in range(start, min(n, start + batch)):
+            noun = rng.choice(NOUNS)
+            rows.append((f"{rng.choice(ADJECTIVES)} {noun} {i}", noun.title(), rng.choice(ADJECTIVES),
+                         round(rng.uniform(1, 100), 2), rng.randint(0, 500)))
+        conn.execute("BEGIN")
+        conn.executemany(inv.SQL_INSERT_PRODUCT, rows)
+        conn.execute("COMMIT")
+
+
+def percentile(sorted_values, p):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p / 100))]
+
+
+def report(label, count, elapsed, unit="sales"):
+    print(f"{label:<34} {count:>8} {unit} in {elapsed:7.3f}s  -> {count / elapsed:10.0f} {unit}/s")
+
+
+# -------------------- CONNECTIONS --------------------
+def sell_connect_per_call(db_file, pid, qty):
+    """The original process_sale: fresh connection, rollback journal, two round trips."""
+    conn = sqlite3.connect(db_file)
+    cur = conn.cursor()
+    cur.execute(inv.SQL_SELECT_PRODUCT_FOR_SALE, (pid,))
+    name, stock, price = cur.fetchone()
+    cur.execute(inv.SQL_SET_STOCK, (stock - qty, pid))
+    cur.execute(inv.SQL_INSERT_SALE, (pid, qty, qty * price))
+    conn.commit()
+    conn.close()
+
+
+def sell_persistent(db_file, pid, qty):
+    """Same statements on the pooled WAL connection."""
+    conn = inv.get_db_connection(db_file)
+    with inv.transaction(conn):
+        cur = conn.cursor()
+        cur.execute(inv.SQL_SELECT_PRODUCT_FOR_SALE, (pid,))
+        name, stock, price = cur.fetchone()
+        cur.execute(inv.SQL_SET_STOCK, (stock - qty, pid))
+        cur.execute(inv.SQL_INSERT_SALE, (pid, qty, qty * price))
+
+
+def bench_connections(tmp, sales=2000, products=1000):
+    before_db = os.path.join(tmp, "before.db")
+    conn = sqlite3.connect(before_db, isolation_level=None)
+    conn.execute(inv.SQL_CREATE_PRODUCTS)
+    conn.execute("ALTER TABLE products ADD COLUMN subcategory TEXT")
+    conn.execute(inv.SQL_CREATE_SALES)
+    seed_products(conn, products)
+    conn.close()
+
+    after_db = os.path.join(tmp, "after.db")
+    seed_products(inv.init_db(after_db), products)
+
+    picks = [random.randint(1, products) for _ in range(sales)]
+    for label, db_file, sell in (("connect per sale (rollback journal)", before_db, sell_connect_per_call),
+                                 ("persistent WAL connection", after_db, sell_persistent)):
+        start = time.perf_counter()
+        for pid in picks:
+            sell(db_file, pid, 1)
+        report(label, sales, time.perf_counter() - start)
+
+
+# -------------------- CONCURRENT SALES --------------------
+def bench_stress(tmp, threads=8, products=50, stock=500, max_lines=4):
+    """Many writer threads sell random baskets until everything is sold out,
+    then check that no product went negative and every unit is accounted for."""
+    db_file = os.path.join(tmp, "stress.db")
+    conn = inv.init_db(db_file)
+    seed_products(conn, products, stock)
+
+    counters = {"baskets": 0, "lines": 0, "refused": 0}
+    lock = threading.Lock()
+
+    def worker(seed):
+        rng = random.Random(seed)
+        sold = refused = baskets = 0
+        misses = 0
+        while misses < 50:
+            basket = [(rng.randint(1, products), rng.randint(1, 5)) for _ in range(rng.randint(1, max_lines))]
+            results = inv.sell_many(basket, db_file=db_file)
+            baskets += 1
+            ok = sum(1 for r in results if r.ok)
+            sold += ok
+            refused += len(results) - ok
+            misses = misses + 1 if ok == 0 else 0
+        inv.close_db_connections()
+        with lock:
+            counters["baskets"] += baskets
+            counters["lines"] += sold
+            counters["refused"] += refused
+
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    report(f"sell_many, {threads} threads", counters["baskets"], elapsed, "baskets")
+    print(f"lines sold: {counters['lines']}, lines refused: {counters['refused']}")
+
+    negative = conn.execute("SELECT COUNT(*) FROM products WHERE stock < 0").fetchone()[0]
+    mismatched = conn.execute("""
+        SELECT COUNT(*) FROM products p
+        LEFT JOIN (SELECT product_id, SUM(quantity) AS q FROM sales GROUP BY product_id) s
+               ON s.product_id = p.id
+        WHERE p.stock + COALESCE(s.q, 0) != ?
+    """, (stock,)).fetchone()[0]
+    if negative or mismatched:
+        raise SystemExit(f"FAILED: {negative} oversold products, {mismatched} products with lost units")
+    print("OK: no product oversold, stock + units sold == initial stock for every product")
+    drift = inv.check_category_stock(db_file)
+    if drift:
+        raise SystemExit(f"FAILED: category_stock differs from products for {len(drift)} pairs")
+    print("OK: category_stock matches a full recompute")
+
+
+# -------------------- SEARCH --------------------
+def bench_search(tmp, products=1000000, queries=2000):
+    db_file = os.path.join(tmp, "search.db")
+    conn = inv.init_db(db_file)
+    start = time.perf_counter()
+    seed_catalog(conn, products)
+    report("load catalog (FTS triggers on)", products, time.perf_counter() - start, "rows")
+
+    rng = random.Random(2)
+    words = ADJECTIVES + NOUNS
+    texts = []
+    for _ in range(queries):
+        # What a cashier types: one or two words, the last one often unfinished
+        parts = rng.sample(words, rng.randint(1, 2))
+        last = parts[-1]
+        parts[-1] = last[:rng.randint(1, len(last))]
+        texts.append(" ".join(parts))
+
+    latencies = []
+    for text in texts:
+        t0 = time.perf_counter()
+        inv.search_products(text, db_file=db_file)
+        latencies.append((time.perf_counter() - t0) * 1000)
+    latencies.sort()
+    print(f"search over {products} products, {queries} queries: "
+          f"p50 {percentile(latencies, 50):.2f} ms, p99 {percentile(latencies, 99):.2f} ms, "
+          f"max {latencies[-1]:.2f} ms")
+    check_late_exact_match(tmp)
+
+
+def check_late_exact_match(tmp, older=1000):
+    """An exact name match added after `older` prefix matches must rank first,
+    not be cut off by the candidate limit."""
+    db_file = os.path.join(tmp, "ranking.db")
+    inv.init_db(db_file)
+    inv.bulk_insert_products([(f"teapot {i}", "Kitchen", "Pots", 9.5, 10) for i in range(older)], db_file)
+    pid = inv.add_product("Tea", "Grocery", "Drinks", 3.0, 10, db_file=db_file)
+    top = inv.search_products("tea", db_file=db_file)
+    if not top or top[0][0] != pid:
+        raise SystemExit(f"FAILED: top hit for 'tea' is {top[0][1] if top else None!r}, not the exact match 'Tea'")
+    print(f"OK: an exact name match added after {older} prefix matches ranks first")
+
+
+# -------------------- REPORTS --------------------
+def seed_sales(conn, n, products, days=365, batch=200000):
+    """n sales spread over `days` days, written straight into the sales table."""
+    rng = random.Random(3)
+    for start in range(0, n, batch):
+        rows = []
+        for _ in range(min(batch, n - start)):
+            qty = rng.randint(1, 5)
+            rows.append((rng.randint(1, products), qty, qty * 2.5,
+                         f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} "
+                         f"{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:00"))
+        conn.execute("BEGIN")
+        conn.executemany("INSERT INTO sales(product_id, quantity, total, date) VALUES(?,?,?,?)", rows)
+        conn.execute("COMMIT")
+
+
+def bench_reports(tmp, sales=10000000, products=1000):
+    db_file = os.path.join(tmp, "reports.db")
+    conn = sales_reports.init_rollups(db_file)
+    seed_products(conn, products, 1000)
+    start = time.perf_counter()
+    seed_sales(conn, sales, products)
+    report("load sales history", sales, time.perf_counter() - start, "rows")
+
+    start = time.perf_counter()
+    sales_reports.refresh_rollups(db_file)
+    report("initial rollup", sales, time.perf_counter() - start, "rows")
+
+    for label, run in (("daily report", lambda: sales_reports.revenue_by("day", db_file=db_file)),
+                       ("weekly report", lambda: sales_reports.revenue_by("week", db_file=db_file)),
+                       ("hourly report", lambda: sales_reports.revenue_by("hour", db_file=db_file)),
+                       ("revenue by category", lambda: sales_reports.revenue_by_category(db_file=db_file)),
+                       ("top 10 products", lambda: sales_reports.top_products(10, db_file=db_file)),
+                       ("sell-through", lambda: sales_reports.sell_through(db_file=db_file))):
+        start = time.perf_counter()
+        rows = run()
+        print(f"{label:<34} {len(rows):>8} rows in {time.perf_counter() - start:7.3f}s")
+
+    seed_sales(conn, 10000, products)
+    start = time.perf_counter()
+    added = sales_reports.refresh_rollups(db_file)
+    report("incremental refresh", added, time.perf_counter() - start, "rows")
+
+    # What the report would cost without rollups
+    start = time.perf_counter()
+    conn.execute("SELECT date(date), SUM(quantity), SUM(total) FROM sales GROUP BY 1").fetchall()
+    print(f"{'daily report from raw sales':<34} {'':>8}      in {time.perf_counter() - start:7.3f}s")
+
+
+# -------------------- PRODUCT CACHE --------------------
+def zipf_ids(rng, products, reads, s=1.1):
+    """Product ids drawn with Zipf(s) popularity: a few hot SKUs, a long tail."""
+    ids = list(range(1, products + 1))
+    rng.shuffle(ids)    # hot products are scattered, not the lowest ids
+    cum, total = [], 0.0
+    for rank in range(1, products + 1):
+        total += rank ** -s
+        cum.append(total)
+    return rng.choices(ids, cum_weights=cum, k=reads)
+
+
+def bench_cache(tmp, products=100000, reads=200000):
+    db_file = os.path.join(tmp, "cache.db")
+    conn = inv.init_db(db_file)
+    seed_catalog(conn, products)
+    rng = random.Random(4)
+    ids = zipf_ids(rng, products, reads)
+
+    start = time.perf_counter()
+    for pid in ids:
+        conn.execute(inv.SQL_SELECT_PRODUCT, (pid,)).fetchone()
+    report("get_product, no cache", reads, time.perf_counter() - start, "reads")
+
+    inv.product_cache.clear()
+    inv.product_cache.hits = inv.product_cache.misses = 0
+    start = time.perf_counter()
+    for pid in ids:
+        inv.get_product(pid, db_file=db_file)
+    report("get_product, read-through cache", reads, time.perf_counter() - start, "reads")
+    stats = inv.product_cache.stats()
+    print(f"hit rate {stats['hit_rate']:.1%} ({stats['hits']} hits, {stats['misses']} misses, "
+          f"{stats['size']} cached of {products})")
+
+    # Mix writes into the hot set; every read must match the database
+    stale = 0
+    for n, pid in enumerate(ids[:20000]):
+        if n % 10 == 0:
+            name, category, subcategory, price, stock = inv.get_product(pid, db_file=db_file)
+            inv.update_product(pid, name, category, subcategory, price + 1, stock, db_file=db_file)
+        elif n % 10 == 5:
+            inv.sell_many([(pid, 1)], db_file=db_file)
+        if inv.get_product(pid, db_file=db_file) != conn.execute(inv.SQL_SELECT_PRODUCT, (pid,)).fetchone():
+            stale += 1
+    print(f"stale reads after writes: {stale}")
+
+
+# -------------------- SALES JOURNAL --------------------
+def journal_writer(db_file, directory, threads, products, pipe):
+    """Child process: journal single-unit sales flat out, reporting every
+    acknowledged sale on `pipe` until it is killed."""
+    journal = sales_journal.SalesJournal(directory, db_file)
+    lock = threading.Lock()
+
+    def worker(seed):
+        rng = random.Random(seed)
+        while True:
+            pid = rng.randint(1, products)
+            seq = journal.record_sale(pid, 1)
+            with lock:
+                pipe.send((seq, pid))
+
+    for i in range(threads):
+        threading.Thread(target=worker, args=(i,), daemon=True).start()
+    threading.Event().wait()
+
+
+def sell_for(db_file, threads, products, seconds, sell):
+    """Single-unit sales from `threads` threads for `seconds`; returns the count."""
+    counts = []
+    deadline = time.perf_counter() + seconds
+
+    def worker(seed):
+        rng = random.Random(seed)
+        n = 0
+        while time.perf_counter() < deadline:
+            sell(rng.randint(1, products))
+            n += 1
+        inv.close_db_connections()
+        counts.append(n)
+
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    return sum(counts)
+
+
+def bench_journal(tmp, threads=8, products=1000, seconds=3.0, stock=10**9):
+    db_file = os.path.join(tmp, "journal.db")
+    directory = os.path.join(tmp, "journal")
+    conn = inv.init_db(db_file)
+    seed_products(conn, products, stock)
+
+    sold = sell_for(db_file, threads, products, seconds,
+                    lambda pid: inv.sell_many([(pid, 1)], db_file=db_file))
+    report(f"sell_many per sale, {threads} threads", sold, seconds)
+    journal = sales_journal.SalesJournal(directory, db_file)
+    sold = sell_for(db_file, threads, products, seconds, lambda pid: journal.record_sale(pid, 1))
+    report(f"journaled sales, {threads} threads", sold, seconds)
+    journal.close()
+    print(f"journal after close: {journal.status()}")
+
+    # Crash test: SIGKILL a journaling process, recover, check every
+    # acknowledged sale reached the database.
+    before = dict(conn.execute("SELECT product_id, COUNT(*) FROM sales GROUP BY product_id"))
+    ctx = multiprocessing.get_context("spawn")
+    receive, send = ctx.Pipe(duplex=False)
+    child = ctx.Process(target=journal_writer, args=(db_file, directory, threads, products, send))
+    child.start()
+    send.close()
+    acked = []
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        if receive.poll(0.1):
+            acked.append(receive.recv())
+    os.kill(child.pid, signal.SIGKILL)
+    child.join()
+    try:
+        while True:             # acks already in the pipe when the child died
+            acked.append(receive.recv())
+    except EOFError:
+        pass
+    print(f"killed journaling process after {len(acked)} acknowledged sales")
+
+    start = time.perf_counter()
+    journal = sales_journal.SalesJournal(directory, db_file)
+    replayed = journal.status()
+    journal.close()
+    print(f"recovery in {time.perf_counter() - start:.3f}s: {replayed}")
+
+    after = dict(conn.execute("SELECT product_id, COUNT(*) FROM sales GROUP BY product_id"))
+    expected = {}
+    for _, pid in acked:
+        expected[pid] = expected.get(pid, 0) + 1
+    lost = sum(max(0, n - (after.get(pid, 0) - before.get(pid, 0))) for pid, n in expected.items())
+    unaccounted = conn.execute("""
+        SELECT COUNT(*) FROM products p
+        LEFT JOIN (SELECT product_id, SUM(quantity) AS q FROM sales GROUP BY product_id) s
+               ON s.product_id = p.id
+        WHERE p.stock + COALESCE(s.q, 0) != ?
+    """, (stock,)).fetchone()[0]
+    if lost or unaccounted or max(seq for seq, _ in acked) > replayed["applied_seq"]:
+        raise SystemExit(f"FAILED: {lost} acknowledged sales lost, {unaccounted} products with lost units")
+    print("OK: every acknowledged sale survived kill -9, stock + units sold == initial stock")
+
+
+# -------------------- SHARDING --------------------
+def bench_shards(tmp, threads=8, products=200000, shards=4, seconds=3.0, queries=500):
+    """The same catalogue as one database and as `shards` files: concurrent
+    single-unit sales, then the fan-out reads."""
+    seed = os.path.join(tmp, "seed.db")
+    conn = inv.init_db(seed)
+    seed_catalog(conn, products)
+    conn.execute("UPDATE products SET stock = ?", (10**9,))
+    rng = random.Random(5)
+    words = ADJECTIVES + NOUNS
+    texts = [rng.choice(words)[:rng.randint(2, 5)] for _ in range(queries)]
+
+    for n in (1, shards):
+        files = [os.path.join(tmp, f"shards{n}-{k}.db") for k in range(n)]
+        sharding.reshard([seed], files)
+        sharded = sharding.ShardedInventory(files)
+        sold = sell_for(None, threads, products, seconds, lambda pid: sharded.sell_many([(pid, 1)]))
+        report(f"{n} shard(s), {threads} threads", sold, seconds)
+
+        start = time.perf_counter()
+        for _ in range(100):
+            sharded.category_stock()
+        elapsed = time.perf_counter() - start
+        latencies = []
+        for text in texts:
+            t0 = time.perf_counter()
+            sharded.search_products(text)
+            latencies.append((time.perf_counter() - t0) * 1000)
+        latencies.sort()
+        print(f"{'':<34} category totals {elapsed * 10:.2f} ms, search p50 "
+              f"{percentile(latencies, 50):.2f} ms, p99 {percentile(latencies, 99):.2f} ms")
+        sharded.close()
+
+
+# -------------------- MAIN --------------------
+def main():
+    parser = argparse.ArgumentParser(description="Inventory benchmarks")
+    parser.add_argument("bench", choices=["connections", "stress", "search", "reports", "cache", "journal", "shards"])
+    parser.add_argument("--sales", type=int, default=None)
+    parser.add_argument("--products", type=int, default=None)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--stock", type=int, default=500)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--reads", type=int, default=200000)
+    parser.add_argument("--shards", type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.bench == "connections":
+            bench_connections(tmp, args.sales or 2000, args.products or 1000)
+        elif args.bench == "stress":
+            bench_stress(tmp, args.threads, args.products or 50, args.stock)
+        elif args.bench == "search":
+            bench_search(tmp, args.products or 1000000, args.queries)
+        elif args.bench == "reports":
+            bench_reports(tmp, args.sales or 10000000, args.products or 1000)
+        elif args.bench == "cache":
+            bench_cache(tmp, args.products or 100000, args.reads)
+        elif args.bench == "journal":
+            bench_journal(tmp, args.threads, args.products or 1000)
+        elif args.bench == "shards":
+            bench_shards(tmp, args.threads, args.products or 200000, args.shards)
+        inv.close_db_connections()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Chart rendering for the inventory
+
+Charts are drawn on plain matplotlib Figure objects (never pyplot), so the same
+code can be embedded in a Tk window with FigureCanvasTkAgg or rendered to PNG
+or SVG headlessly on the Agg canvas, from any thread and without a display.
+
+Headless renders are cached by a hash of the chart data: as long as the
+aggregates have not changed, render_chart() returns the stored bytes without
+drawing anything. Long category lists are cut to the top N plus "Other".
+
+Usage:
+    python charts.py category category.png [--top 20] [--db inventory.db]
+    python charts.py subcategory subcategory.svg
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import threading
+from collections import OrderedDict
+
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+import inventory_service as inv
+
+TOP_N = {"category": 25, "subcategory": 12}   # bars / pie slices before "Other"
+TITLES = {"category": "Category-wise Stock", "subcategory": "Subcategory Stock Share"}
+
+
+# -------------------- DATA --------------------
+def top_n_with_other(labels, values, n, other="Other"):
+    """Keep the n largest values (in their original order) and sum the rest."""
+    if len(labels) <= n:
+        return list(labels), list(values)
+    keep = set(sorted(range(len(values)), key=lambda i: values[i], reverse=True)[:n - 1])
+    out_labels = [labels[i] for i in range(len(labels)) if i in keep]
+    out_values = [values[i] for i in range(len(values)) if i in keep]
+    out_labels.append(other)
+    out_values.append(sum(values[i] for i in range(len(values)) if i not in keep))
+    return out_labels, out_values
+
+
+def chart_series(kind, data, top_n=None):
+    """(labels, values) for a chart from category_stock()/subcategory_stock() rows."""
+    merged = OrderedDict()
+    for label, value in data:
+        if kind == "subcategory":
+            # Empty subcategory shows as "Category - " (or "- None" in old data)
+            ok = label and label.strip() and not label.endswith(" - ") and not label.endswith(" - None")
+        else:
+            ok = bool(label)
+        key = label if ok else "Uncategorized"
+        merged[key] = merged.get(key, 0) + (value or 0)
+    return top_n_with_other(list(merged), list(merged.values()), top_n or TOP_N[kind])
+
+
+def build_figure(kind, labels, values):
+    """A Figure for the chart; not attached to any canvas yet."""
+    if kind == "category":
+        fig = Figure(figsize=(8, 5))
+        ax = fig.add_subplot()
+        ax.bar(labels, values)
+        ax.set_xlabel("Category")
+        ax.set_ylabel("Total Stock")
+        ax.tick_params(axis="x", labelrotation=30)
+        for tick in ax.get_xticklabels():
+            tick.set_horizontalalignment("right")
+    else:
+        fig = Figure(figsize=(7, 7))
+        ax = fig.add_subplot()
+        ax.pie(values, labels=labels, autopct="%1.1f%%", startangle=90)
+    ax.set_title(TITLES[kind])
+    fig.tight_layout()
+    return fig
+
+
+# -------------------- HEADLESS RENDERING --------------------
+class ChartCache:
+    """Thread-safe LRU of rendered chart bytes keyed by a data hash."""
+
+    def __init__(self, max_items=64):
+        self.max_items = max_items
+        self.items = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            data = self.items.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self.items.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def put(self, key, data):
+        with self.lock:
+            self.items[key] = data
+            self.items.move_to_end(key)
+            while len(self.items) > self.max_items:
+                self.items.popitem(last=False)
+
+
+cache = ChartCache()
+
+
+def chart_key(kind, fmt, dpi, labels, values):
+    payload = json.dumps([kind, fmt, dpi, labels, values], default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def render_chart(kind, data, fmt="png", dpi=100, top_n=None):
+    """Render a chart of aggregate rows to PNG or SVG bytes (cached)."""
+    labels, values = chart_series(kind, data, top_n)
+    key = chart_key(kind, fmt, dpi, labels, values)
+    image = cache.get(key)
+    if image is None:
+        fig = build_figure(kind, labels, values)
+        FigureCanvasAgg(fig)
+        buf = io.BytesIO()
+        fig.savefig(buf, format=fmt, dpi=dpi)
+        image = buf.getvalue()
+        cache.put(key, image)
+    return image
+
+
+def export_chart(kind, path, fmt=None, db_file=None, top_n=None):
+    """Query the aggregates and write the chart to path; format from the extension."""
+    fmt = fmt or path.rsplit(".", 1)[-1].lower()
+    data = inv.category_stock(db_file) if kind == "category" else inv.subcategory_stock(db_file)
+    with open(path, "wb") as f:
+        f.write(render_chart(kind, data, fmt, top_n=top_n))
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render inventory charts without a display")
+    parser.add_argument("kind", choices=["category", "subcategory"])
+    parser.add_argument("path", help="output file, .png or .svg")
+    parser.add_argument("--top", type=int, default=None, help="bars/slices before grouping into Other")
+    parser.add_argument("--db", default=None)
+    args = parser.parse_args(argv)
+    print(f"Saved chart: {export_chart(args.kind, args.path, db_file=args.db, top_n=args.top)}")
+
+
+if __name__ == "__main__":
+    main()
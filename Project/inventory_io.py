@@ -0,0 +1,162 @@
+"""
+Bulk import / export for the inventory database (no GUI).
+
+Imports stream CSV or JSON Lines in batches: each row is checked with the same
+rules as the Add Product form (validate_product), and each batch is inserted
+with bulk_insert_products (executemany inside one transaction, with the search
+index and category totals caught up set-based per batch). Exports stream a table with
+fetchmany, so neither direction ever holds a whole table in memory.
+
+CSV files have a header row; JSON Lines files have one object per line. Both
+use the column names name, category, subcategory, price, stock.
+
+Usage:
+    python inventory_io.py import catalog.csv [--batch 5000] [--db inventory.db]
+    python inventory_io.py import catalog.jsonl
+    python inventory_io.py export products products.csv
+    python inventory_io.py export sales sales.jsonl
+"""
+
+import argparse
+import csv
+import json
+import sys
+import time
+
+import inventory_service as inv
+
+PRODUCT_FIELDS = ("name", "category", "subcategory", "price", "stock")
+
+SQL_EXPORT_PRODUCTS = "SELECT id, name, category, subcategory, price, stock FROM products ORDER BY id"
+SQL_EXPORT_SALES = "SELECT id, product_id, quantity, total, date FROM sales ORDER BY id"
+EXPORTS = {
+    "products": (SQL_EXPORT_PRODUCTS, ("id", "name", "category", "subcategory", "price", "stock")),
+    "sales": (SQL_EXPORT_SALES, ("id", "product_id", "quantity", "total", "date")),
+}
+
+
+def detect_format(path, fmt=None):
+    if fmt:
+        return fmt
+    return "jsonl" if path.lower().endswith((".jsonl", ".json", ".ndjson")) else "csv"
+
+
+# -------------------- IMPORT --------------------
+def read_records(f, fmt):
+    """Yield (line number, dict) from an open CSV or JSON Lines file."""
+    if fmt == "csv":
+        reader = csv.DictReader(f)
+        for record in reader:
+            yield reader.line_num, record
+    else:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield line_no, json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_no, e
+
+
+def import_products(path, fmt=None, batch=5000, db_file=None, max_errors=20):
+    """Stream products from path into the database.
+
+    Returns (imported, rejected, seconds, errors), where errors lists the first
+    max_errors (line number, message) pairs for rejected rows.
+    """
+    fmt = detect_format(path, fmt)
+    inv.init_db(db_file)
+    imported = rejected = 0
+    errors = []
+    rows = []
+
+    def flush():
+        inv.bulk_insert_products(rows, db_file)
+        rows.clear()
+
+    start = time.perf_counter()
+    with open(path, newline="", encoding="utf-8") as f:
+        for line_no, record in read_records(f, fmt):
+            try:
+                if isinstance(record, Exception):
+                    raise ValueError(f"Invalid JSON: {record}")
+                if not isinstance(record, dict):
+                    raise ValueError(f"Expected a JSON object, got {type(record).__name__}")
+                rows.append(inv.validate_product(*(record.get(k) for k in PRODUCT_FIELDS)))
+            except ValueError as e:
+                rejected += 1
+                if len(errors) < max_errors:
+                    errors.append((line_no, str(e)))
+                continue
+            if len(rows) >= batch:
+                imported += len(rows)
+                flush()
+    if rows:
+        imported += len(rows)
+        flush()
+    return imported, rejected, time.perf_counter() - start, errors
+
+
+# -------------------- EXPORT --------------------
+def export_table(table, path, fmt=None, batch=5000, db_file=None):
+    """Stream `products` or `sales` to a CSV or JSON Lines file; returns (rows, seconds)."""
+    sql, columns = EXPORTS[table]
+    fmt = detect_format(path, fmt)
+    conn = inv.init_db(db_file)
+    count = 0
+    start = time.perf_counter()
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f) if fmt == "csv" else None
+        if writer:
+            writer.writerow(columns)
+        # One read transaction: a consistent snapshot, while WAL lets sales carry on.
+        with inv.transaction(conn, "DEFERRED"):
+            cur = conn.execute(sql)
+            while True:
+                chunk = cur.fetchmany(batch)
+                if not chunk:
+                    break
+                if writer:
+                    writer.writerows(chunk)
+                else:
+                    f.writelines(json.dumps(dict(zip(columns, row))) + "\n" for row in chunk)
+                count += len(chunk)
+    return count, time.perf_counter() - start
+
+
+# -------------------- CLI --------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk import/export for the inventory database")
+    parser.add_argument("--db", default=None, help=f"database file (default {inv.DB_FILE})")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_imp = sub.add_parser("import", help="import products from CSV or JSON Lines")
+    p_imp.add_argument("path")
+    p_imp.add_argument("--format", choices=["csv", "jsonl"])
+    p_imp.add_argument("--batch", type=int, default=5000)
+
+    p_exp = sub.add_parser("export", help="export a table to CSV or JSON Lines")
+    p_exp.add_argument("table", choices=sorted(EXPORTS))
+    p_exp.add_argument("path")
+    p_exp.add_argument("--format", choices=["csv", "jsonl"])
+    p_exp.add_argument("--batch", type=int, default=5000)
+
+    args = parser.parse_args(argv)
+    try:
+        if args.command == "import":
+            imported, rejected, elapsed, errors = import_products(args.path, args.format, args.batch, args.db)
+            for line_no, msg in errors:
+                print(f"line {line_no}: {msg}", file=sys.stderr)
+            print(f"Imported {imported} products ({rejected} rejected) in {elapsed:.2f}s "
+                  f"-> {imported / max(elapsed, 1e-9):.0f} rows/s")
+        else:
+            count, elapsed = export_table(args.table, args.path, args.format, args.batch, args.db)
+            print(f"Exported {count} {args.table} rows to {args.path} in {elapsed:.2f}s "
+                  f"-> {count / max(elapsed, 1e-9):.0f} rows/s")
+    finally:
+        inv.close_db_connections()
+
+
+if __name__ == "__main__":
+    main()
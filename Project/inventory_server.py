@@ -0,0 +1,266 @@
+"""
+Inventory HTTP/JSON API
+
+A small asyncio HTTP/1.1 server (standard library only) around
+inventory_service, for POS terminals and e-commerce sync. Connections are kept
+alive between requests. Database calls run on a thread pool whose threads
+each keep one persistent connection, so that pool is the connection pool
+shared by all clients.
+
+Endpoints (JSON in, JSON out):
+    GET    /products?after=0&limit=100     page of products (keyset on id)
+    GET    /products/<id>
+    POST   /products                       {name, category, subcategory, price, stock}
+    PUT    /products/<id>                  same body as POST
+    DELETE /products/<id>
+    POST   /sell                           {"items": [[id, qty], ...], "all_or_nothing": false}
+    GET    /search?q=text&limit=20
+    GET    /aggregates/category
+    GET    /aggregates/subcategory
+    POST   /batch                          [{"method", "path", "body"}, ...] -> [{"status", "body"}, ...]
+
+/batch runs all sub-requests in one hop to the pool, in order.
+
+Usage:
+    python inventory_server.py [--host 127.0.0.1] [--port 8765] [--db inventory.db] [--workers 8]
+"""
+
+import argparse
+import asyncio
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import urlsplit, parse_qs
+
+import inventory_service as inv
+
+PRODUCT_COLUMNS = ("id", "name", "category", "subcategory", "price", "stock")
+MAX_BODY = 10 * 1024 * 1024
+IDLE_TIMEOUT = 30.0
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# -------------------- HANDLERS --------------------
+# Each handler runs on a pool thread: (db_file, path match, query dict, body) -> (status, payload)
+def _product_fields(body):
+    if not isinstance(body, dict):
+        raise HTTPError(400, "Expected a JSON object.")
+    try:
+        return inv.validate_product(*(body.get(k) for k in PRODUCT_COLUMNS[1:]))
+    except ValueError as e:
+        raise HTTPError(400, str(e))
+
+
+def _int_param(query, name, default):
+    try:
+        return int(query.get(name, [default])[0])
+    except ValueError:
+        raise HTTPError(400, f"{name} must be an integer.")
+
+
+def _limit_param(query, default, most):
+    """?limit= clamped to [1, most], so a zero or negative limit cannot mean "no limit"."""
+    return max(1, min(_int_param(query, "limit", default), most))
+
+
+def list_products(db_file, match, query, body):
+    rows = inv.products_after(_int_param(query, "after", 0), _limit_param(query, 100, 1000), db_file)
+    return 200, [dict(zip(PRODUCT_COLUMNS, r)) for r in rows]
+
+
+def read_product(db_file, match, query, body):
+    pid = int(match.group(1))
+    r = inv.get_product(pid, db_file)
+    if not r:
+        raise HTTPError(404, "Product ID not found.")
+    return 200, dict(zip(PRODUCT_COLUMNS, (pid,) + tuple(r)))
+
+
+def create_product(db_file, match, query, body):
+    pid = inv.add_product(*_product_fields(body), db_file=db_file)
+    return 201, {"id": pid}
+
+
+def replace_product(db_file, match, query, body):
+    pid = int(match.group(1))
+    if not inv.update_product(pid, *_product_fields(body), db_file=db_file):
+        raise HTTPError(404, "Product ID not found.")
+    return 200, {"id": pid}
+
+
+def remove_product(db_file, match, query, body):
+    pid = int(match.group(1))
+    if not inv.delete_product(pid, db_file):
+        raise HTTPError(404, "Product ID not found.")
+    return 200, {"id": pid}
+
+
+def sell(db_file, match, query, body):
+    items = body.get("items") if isinstance(body, dict) else None
+    try:
+        lines = [(int(pid), int(qty)) for pid, qty in items]
+    except (TypeError, ValueError):
+        raise HTTPError(400, "items must be a list of [product_id, quantity] pairs.")
+    results = inv.sell_many(lines, bool(body.get("all_or_nothing")), db_file)
+    return 200, [r._asdict() for r in results]
+
+
+def search(db_file, match, query, body):
+    rows = inv.search_products(query.get("q", [""])[0], _limit_param(query, 20, 200), db_file=db_file)
+    return 200, [dict(zip(PRODUCT_COLUMNS + ("score",), r)) for r in rows]
+
+
+def category_totals(db_file, match, query, body):
+    return 200, [{"category": c, "stock": s} for c, s in inv.category_stock(db_file)]
+
+
+def subcategory_totals(db_file, match, query, body):
+    return 200, [{"label": label, "stock": s} for label, s in inv.subcategory_stock(db_file)]
+
+
+ROUTES = [
+    ("GET", re.compile(r"^/products$"), list_products),
+    ("POST", re.compile(r"^/products$"), create_product),
+    ("GET", re.compile(r"^/products/(\d+)$"), read_product),
+    ("PUT", re.compile(r"^/products/(\d+)$"), replace_product),
+    ("DELETE", re.compile(r"^/products/(\d+)$"), remove_product),
+    ("POST", re.compile(r"^/sell$"), sell),
+    ("GET", re.compile(r"^/search$"), search),
+    ("GET", re.compile(r"^/aggregates/category$"), category_totals),
+    ("GET", re.compile(r"^/aggregates/subcategory$"), subcategory_totals),
+]
+
+
+def dispatch(db_file, method, target, body):
+    """Route one request; returns (status, payload). Runs on a pool thread."""
+    url = urlsplit(target)
+    query = parse_qs(url.query)
+    try:
+        if method == "POST" and url.path == "/batch":
+            if not isinstance(body, list):
+                raise HTTPError(400, "Expected a JSON list of requests.")
+            out = []
+            for sub in body:
+                if not isinstance(sub, dict):
+                    out.append({"status": 400, "body": {"error": "Expected a request object."}})
+                    continue
+                status, payload = dispatch(db_file, str(sub.get("method", "GET")).upper(),
+                                           str(sub.get("path", "")), sub.get("body"))
+                out.append({"status": status, "body": payload})
+            return 200, out
+        allowed = False
+        for route_method, pattern, handler in ROUTES:
+            match = pattern.match(url.path)
+            if not match:
+                continue
+            if route_method != method:
+                allowed = True
+                continue
+            return handler(db_file, match, query, body)
+        raise HTTPError(405 if allowed else 404, "Method not allowed." if allowed else "Not found.")
+    except HTTPError as e:
+        return e.status, {"error": str(e)}
+    except Exception as e:
+        return 500, {"error": f"{type(e).__name__}: {e}"}
+
+
+# -------------------- HTTP --------------------
+class InventoryServer:
+    def __init__(self, db_file=None, workers=8):
+        self.db_file = db_file
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="db")
+
+    async def handle(self, reader, writer):
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                try:
+                    request_line = await asyncio.wait_for(reader.readline(), IDLE_TIMEOUT)
+                except asyncio.TimeoutError:
+                    break
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    await self.respond(writer, 400, {"error": "Bad request line."}, False)
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                keep_alive = (headers.get("connection", "").lower() != "close"
+                              if version == "HTTP/1.1" else headers.get("connection", "").lower() == "keep-alive")
+                try:
+                    length = int(headers.get("content-length", 0) or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    await self.respond(writer, 400, {"error": "Bad Content-Length."}, False)
+                    break
+                if length > MAX_BODY:
+                    await self.respond(writer, 413, {"error": "Body too large."}, False)
+                    break
+                raw = await reader.readexactly(length) if length else b""
+                try:
+                    body = json.loads(raw) if raw else None
+                except json.JSONDecodeError:
+                    status, payload = 400, {"error": "Body is not valid JSON."}
+                else:
+                    status, payload = await loop.run_in_executor(
+                        self.pool, dispatch, self.db_file, method.upper(), target, body)
+                await self.respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def respond(writer, status, payload, keep_alive):
+        data = json.dumps(payload).encode("utf-8")
+        head = (f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(data)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode("latin-1") + data)
+        await writer.drain()
+
+    async def serve(self, host="127.0.0.1", port=8765):
+        server = await asyncio.start_server(self.handle, host, port)
+        print(f"Inventory API listening on http://{host}:{port}")
+        async with server:
+            await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inventory HTTP/JSON API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--db", default=None, help=f"database file (default {inv.DB_FILE})")
+    parser.add_argument("--workers", type=int, default=8, help="database threads (= pooled connections)")
+    args = parser.parse_args(argv)
+
+    inv.init_db(args.db)
+    server = InventoryServer(args.db, args.workers)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.pool.shutdown(wait=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,609 @@
+"""
+Inventory service layer
+
+Everything the inventory does, with no UI attached: schema setup and
+migrations, connection management, product CRUD, sales, search and stock
+aggregates. The Tkinter app (Project1.py), the HTTP server
+(inventory_server.py) and the command-line tools all call these functions.
+
+- Persistent per-thread connections: WAL journal, tuned pragmas, statement cache.
+- sell_many(): atomic basket sales with conditional stock decrements.
+- FTS5 index over product text for ranked prefix search.
+- category_stock summary table kept current by triggers.
+- Read-through LRU/TTL cache for get_product(), invalidated by every write path.
+- Public DB calls are @profile spans when Week6/CodeFiles/profiling.py is on
+  the path; run with PYTHONPATH=../Week6/CodeFiles PROFILE=1 to get a report.
+"""
+
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict, namedtuple
+from contextlib import contextmanager
+
+try:
+    from profiling import profile
+except ImportError:
+    def profile(func=None, *, name=None):
+        """Stand-in for profiling.profile when it is not importable: no wrapping."""
+        return func if func is not None else (lambda f: f)
+
+DB_FILE = "inventory.db"
+
+# Every connection handed out by get_db_connection() is tuned with these pragmas.
+# WAL lets readers run while a sale is being written; synchronous=NORMAL is still
+# crash-safe in WAL mode and avoids an fsync on every commit.
+DB_PRAGMAS = (
+    ("journal_mode", "WAL"),
+    ("synchronous", "NORMAL"),
+    ("cache_size", -20000),        # negative = KiB, so ~20 MB page cache
+    ("mmap_size", 268435456),      # 256 MB memory-mapped reads
+    ("temp_store", "MEMORY"),
+)
+DB_BUSY_TIMEOUT = 5.0             # seconds to wait for a competing writer
+DB_STATEMENT_CACHE = 256          # prepared statements kept per connection
+PRODUCT_CACHE_SIZE = 4096         # products kept by the read-through cache
+PRODUCT_CACHE_TTL = 30.0          # seconds; bounds staleness from other processes
+
+# -------------------- SQL --------------------
+# All statements live here so the per-connection statement cache can reuse them.
+SQL_CREATE_PRODUCTS = """
+    CREATE TABLE IF NOT EXISTS products (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT,
+        category TEXT,
+        price REAL,
+        stock INTEGER
+    )
+"""
+SQL_CREATE_SALES = """
+    CREATE TABLE IF NOT EXISTS sales (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        product_id INTEGER,
+        quantity INTEGER,
+        total REAL,
+        date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+# Covering indexes: category charts read only the index, sales history is a range seek.
+SQL_CREATE_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS idx_products_category ON products(category, subcategory, stock)",
+    "CREATE INDEX IF NOT EXISTS idx_products_name ON products(name)",
+    "CREATE INDEX IF NOT EXISTS idx_sales_product_date ON sales(product_id, date)",
+)
+# Full-text index over the product text columns, kept in sync by triggers.
+# Stock-only updates (every sale) do not touch it.
+SQL_CREATE_PRODUCTS_FTS = """
+    CREATE VIRTUAL TABLE products_fts USING fts5(
+        name, category, subcategory,
+        content='products', content_rowid='id',
+        prefix='1 2 3', tokenize='unicode61 remove_diacritics 2'
+    )
+"""
+SQL_CREATE_FTS_TRIGGERS = (
+    """CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN
+           INSERT INTO products_fts(rowid, name, category, subcategory)
+           VALUES (new.id, new.name, new.category, new.subcategory);
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN
+           INSERT INTO products_fts(products_fts, rowid, name, category, subcategory)
+           VALUES ('delete', old.id, old.name, old.category, old.subcategory);
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS products_fts_au AFTER UPDATE OF name, category, subcategory ON products BEGIN
+           INSERT INTO products_fts(products_fts, rowid, name, category, subcategory)
+           VALUES ('delete', old.id, old.name, old.category, old.subcategory);
+           INSERT INTO products_fts(rowid, name, category, subcategory)
+           VALUES (new.id, new.name, new.category, new.subcategory);
+       END""",
+)
+SQL_REBUILD_PRODUCTS_FTS = "INSERT INTO products_fts(products_fts) VALUES('rebuild')"
+# Stock per (category, subcategory), maintained by triggers on products so the
+# charts read one row per category pair instead of summing every product.
+# NULL category/subcategory are stored as '' so they can be part of the key.
+SQL_CREATE_CATEGORY_STOCK = """
+    CREATE TABLE category_stock (
+        category TEXT NOT NULL,
+        subcategory TEXT NOT NULL,
+        stock INTEGER NOT NULL DEFAULT 0,
+        products INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (category, subcategory)
+    ) WITHOUT ROWID
+"""
+SQL_CREATE_CATEGORY_STOCK_TRIGGERS = (
+    """CREATE TRIGGER IF NOT EXISTS category_stock_ai AFTER INSERT ON products BEGIN
+           INSERT INTO category_stock(category, subcategory, stock, products)
+           VALUES (COALESCE(new.category, ''), COALESCE(new.subcategory, ''), COALESCE(new.stock, 0), 1)
+           ON CONFLICT(category, subcategory)
+           DO UPDATE SET stock = stock + excluded.stock, products = products + 1;
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS category_stock_ad AFTER DELETE ON products BEGIN
+           UPDATE category_stock SET stock = stock - COALESCE(old.stock, 0), products = products - 1
+           WHERE category = COALESCE(old.category, '') AND subcategory = COALESCE(old.subcategory, '');
+           DELETE FROM category_stock
+           WHERE category = COALESCE(old.category, '') AND subcategory = COALESCE(old.subcategory, '')
+             AND products <= 0;
+       END""",
+    # Sales and stock edits: same category pair, one UPDATE.
+    """CREATE TRIGGER IF NOT EXISTS category_stock_au_stock AFTER UPDATE OF stock ON products
+       WHEN old.category IS new.category AND old.subcategory IS new.subcategory BEGIN
+           UPDATE category_stock SET stock = stock - COALESCE(old.stock, 0) + COALESCE(new.stock, 0)
+           WHERE category = COALESCE(new.category, '') AND subcategory = COALESCE(new.subcategory, '');
+       END""",
+    # Product moved to another category pair: take it out of the old one, add to the new one.
+    """CREATE TRIGGER IF NOT EXISTS category_stock_au_move AFTER UPDATE OF category, subcategory ON products
+       WHEN old.category IS NOT new.category OR old.subcategory IS NOT new.subcategory BEGIN
+           UPDATE category_stock SET stock = stock - COALESCE(old.stock, 0), products = products - 1
+           WHERE category = COALESCE(old.category, '') AND subcategory = COALESCE(old.subcategory, '');
+           DELETE FROM category_stock
+           WHERE category = COALESCE(old.category, '') AND subcategory = COALESCE(old.subcategory, '')
+             AND products <= 0;
+           INSERT INTO category_stock(category, subcategory, stock, products)
+           VALUES (COALESCE(new.category, ''), COALESCE(new.subcategory, ''), COALESCE(new.stock, 0), 1)
+           ON CONFLICT(category, subcategory)
+           DO UPDATE SET stock = stock + excluded.stock, products = products + 1;
+       END""",
+)
+SQL_RECOMPUTE_CATEGORY_STOCK = ("SELECT COALESCE(category, ''), COALESCE(subcategory, ''), "
+                                "COALESCE(SUM(stock), 0), COUNT(*) FROM products GROUP BY 1, 2")
+SQL_SELECT_CATEGORY_STOCK = "SELECT category, subcategory, stock, products FROM category_stock"
+SQL_FILL_CATEGORY_STOCK = "INSERT INTO category_stock(category, subcategory, stock, products) VALUES(?,?,?,?)"
+# Bulk loads: per-row insert triggers are dropped for the batch and the derived
+# tables are caught up with one set-based statement each (see bulk_insert_products).
+SQL_DROP_INSERT_TRIGGERS = ("DROP TRIGGER IF EXISTS products_fts_ai",
+                            "DROP TRIGGER IF EXISTS category_stock_ai")
+SQL_MAX_PRODUCT_ID = "SELECT COALESCE(MAX(id), 0) FROM products"
+SQL_FTS_INDEX_NEW_PRODUCTS = ("INSERT INTO products_fts(rowid, name, category, subcategory) "
+                              "SELECT id, name, category, subcategory FROM products WHERE id > ?")
+SQL_CATEGORY_STOCK_ADD_NEW_PRODUCTS = """
+    INSERT INTO category_stock(category, subcategory, stock, products)
+    SELECT COALESCE(category, ''), COALESCE(subcategory, ''), COALESCE(SUM(stock), 0), COUNT(*)
+    FROM products WHERE id > ? GROUP BY 1, 2
+    ON CONFLICT(category, subcategory)
+    DO UPDATE SET stock = stock + excluded.stock, products = products + excluded.products
+"""
+SQL_INSERT_PRODUCT = "INSERT INTO products(name, category, subcategory, price, stock) VALUES(?,?,?,?,?)"
+SQL_INSERT_PRODUCT_WITH_ID = ("INSERT INTO products(id, name, category, subcategory, price, stock) "
+                              "VALUES(?,?,?,?,?,?)")
+SQL_UPDATE_PRODUCT = "UPDATE products SET name=?, category=?, subcategory=?, price=?, stock=? WHERE id=?"
+SQL_DELETE_PRODUCT = "DELETE FROM products WHERE id=?"
+SQL_SELECT_PRODUCT = "SELECT name, category, subcategory, price, stock FROM products WHERE id=?"
+SQL_SELECT_PRODUCT_FOR_SALE = "SELECT name, stock, price FROM products WHERE id=?"
+# Keyset pagination for the product grid: cost depends on page size, not offset.
+SQL_PRODUCTS_PAGE_AFTER = ("SELECT id, name, category, subcategory, price, stock FROM products "
+                           "WHERE id > ? ORDER BY id LIMIT ?")
+SQL_PRODUCTS_PAGE_BEFORE = ("SELECT id, name, category, subcategory, price, stock FROM products "
+                            "WHERE id < ? ORDER BY id DESC LIMIT ?")
+SQL_PRODUCTS_RANGE = ("SELECT id, name, category, subcategory, price, stock FROM products "
+                      "WHERE id BETWEEN ? AND ? ORDER BY id")
+SQL_SET_STOCK = "UPDATE products SET stock=? WHERE id=?"
+SQL_INSERT_SALE = "INSERT INTO sales(product_id, quantity, total) VALUES(?,?,?)"
+# Decrement only if enough stock is left; rowcount tells whether the line was served.
+SQL_SELL_STOCK = "UPDATE products SET stock = stock - ? WHERE id=? AND stock >= ?"
+SQL_INSERT_SALE_AT_PRICE = ("INSERT INTO sales(product_id, quantity, total) "
+                            "SELECT id, ?, ? * price FROM products WHERE id=?")
+# Candidates come from three match tiers, best first: every word exact in the
+# name, every word a prefix in the name, every word a prefix anywhere. Each tier
+# stops at `candidates` rows, so a late exact name match is not crowded out by
+# older prefix matches, and no query has to visit every match (bm25() would: it
+# counts every row containing each term, tens of ms for common prefixes).
+SQL_SEARCH_PRODUCTS = """
+    SELECT p.id, p.name, p.category, p.subcategory, p.price, p.stock
+    FROM (SELECT id, MIN(tier) AS tier FROM (
+              SELECT * FROM (SELECT rowid AS id, 0 AS tier FROM products_fts WHERE products_fts MATCH ? LIMIT ?)
+              UNION ALL
+              SELECT * FROM (SELECT rowid AS id, 1 AS tier FROM products_fts WHERE products_fts MATCH ? LIMIT ?)
+              UNION ALL
+              SELECT * FROM (SELECT rowid AS id, 2 AS tier FROM products_fts WHERE products_fts MATCH ? LIMIT ?)
+          ) GROUP BY id ORDER BY tier, id LIMIT ?) AS hits
+    JOIN products p ON p.id = hits.id
+"""
+SQL_CATEGORY_STOCK = "SELECT category, SUM(stock) FROM category_stock GROUP BY category"
+SQL_SUBCATEGORY_STOCK = "SELECT category || ' - ' || subcategory AS label, stock FROM category_stock"
+
+# -------------------- CONNECTIONS --------------------
+# One long-lived connection per (thread, database file). sqlite3 connections must
+# not be shared across threads, so each thread gets its own and keeps it open.
+_local = threading.local()
+
+def db_path(db_file=None):
+    return os.path.abspath(db_file or DB_FILE)
+
+def get_db_connection(db_file=None):
+    """Return this thread's persistent, tuned connection to db_file (default DB_FILE).
+
+    Connections run in autocommit mode (isolation_level=None): single statements
+    commit on their own, multi-statement work goes through transaction().
+    Callers must not close the returned connection.
+    """
+    path = db_path(db_file)
+    conns = getattr(_local, "conns", None)
+    if conns is None:
+        conns = _local.conns = {}
+    conn = conns.get(path)
+    if conn is None:
+        conn = sqlite3.connect(path, timeout=DB_BUSY_TIMEOUT, isolation_level=None,
+                               cached_statements=DB_STATEMENT_CACHE)
+        for name, value in DB_PRAGMAS:
+            conn.execute(f"PRAGMA {name}={value}")
+        conns[path] = conn
+    return conn
+
+def close_db_connections():
+    """Close every connection opened by the calling thread."""
+    conns = getattr(_local, "conns", None) or {}
+    for conn in conns.values():
+        conn.close()
+    conns.clear()
+
+@contextmanager
+def transaction(conn, mode="IMMEDIATE"):
+    """BEGIN ... COMMIT block; rolls back if the body raises.
+
+    IMMEDIATE takes the write lock up front, so two writers never deadlock
+    trying to upgrade a read lock.
+    """
+    conn.execute(f"BEGIN {mode}")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+# -------------------- PRODUCT CACHE --------------------
+class ProductCache:
+    """Bounded LRU + TTL cache of product rows keyed by (database path, id).
+
+    Writers call invalidate() after their transaction commits. To stop a reader
+    that fetched a row just before a write from caching it just after, every
+    key hashes to a version stripe: invalidate() bumps the stripe, and put()
+    only stores if the stripe is unchanged since the reader's version() call.
+    The cache only sees writes made through this module in this process; the
+    TTL bounds how long a change made elsewhere can go unnoticed.
+    """
+
+    STRIPES = 1024
+
+    def __init__(self, max_items=PRODUCT_CACHE_SIZE, ttl=PRODUCT_CACHE_TTL):
+        self.max_items = max_items
+        self.ttl = ttl
+        self.items = OrderedDict()      # key -> (expires, row)
+        self.versions = [0] * self.STRIPES
+        self.lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def version(self, key):
+        return self.versions[hash(key) % self.STRIPES]
+
+    def get(self, key):
+        with self.lock:
+            entry = self.items.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self.items[key]
+                self.misses += 1
+                return None
+            self.items.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, row, version):
+        with self.lock:
+            if self.versions[hash(key) % self.STRIPES] != version:
+                return
+            self.items[key] = (time.monotonic() + self.ttl, row)
+            self.items.move_to_end(key)
+            while len(self.items) > self.max_items:
+                self.items.popitem(last=False)
+
+    def invalidate(self, keys):
+        with self.lock:
+            for key in keys:
+                self.versions[hash(key) % self.STRIPES] += 1
+                self.items.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.versions = [v + 1 for v in self.versions]
+            self.items.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {"size": len(self.items), "hits": self.hits, "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0}
+
+product_cache = ProductCache()
+
+def invalidate_products(pids, db_file=None):
+    """Drop products from the cache; call after the write has committed."""
+    path = db_path(db_file)
+    product_cache.invalidate([(path, pid) for pid in pids])
+
+# -------------------- DATABASE SETUP --------------------
+@profile
+def init_db(db_file=None):
+    conn = get_db_connection(db_file)
+    with transaction(conn):
+        c = conn.cursor()
+
+        # Create base products table (without subcategory may exist on older runs)
+        c.execute(SQL_CREATE_PRODUCTS)
+
+        # If subcategory column missing, add it safely
+        c.execute("PRAGMA table_info(products)")
+        columns = [col[1] for col in c.fetchall()]
+        if "subcategory" not in columns:
+            try:
+                c.execute("ALTER TABLE products ADD COLUMN subcategory TEXT")
+            except Exception:
+                # If alter fails for some reason, ignore (table might already have it)
+                pass
+
+        # Create sales table
+        c.execute(SQL_CREATE_SALES)
+
+        # Migration: secondary indexes (no-op once they exist)
+        for stmt in SQL_CREATE_INDEXES:
+            c.execute(stmt)
+
+        # Migration: full-text search index, filled from existing rows on first run
+        c.execute("SELECT 1 FROM sqlite_master WHERE name='products_fts'")
+        if not c.fetchone():
+            c.execute(SQL_CREATE_PRODUCTS_FTS)
+            c.execute(SQL_REBUILD_PRODUCTS_FTS)
+        for stmt in SQL_CREATE_FTS_TRIGGERS:
+            c.execute(stmt)
+
+        # Migration: category_stock summary, computed once from existing products
+        c.execute("SELECT 1 FROM sqlite_master WHERE name='category_stock'")
+        if not c.fetchone():
+            c.execute(SQL_CREATE_CATEGORY_STOCK)
+            c.executemany(SQL_FILL_CATEGORY_STOCK, c.execute(SQL_RECOMPUTE_CATEGORY_STOCK).fetchall())
+        for stmt in SQL_CREATE_CATEGORY_STOCK_TRIGGERS:
+            c.execute(stmt)
+    return conn
+
+# -------------------- SALES ENGINE --------------------
+SaleLine = namedtuple("SaleLine", ["product_id", "quantity", "ok", "name", "total", "stock", "error"])
+
+@profile
+def sell_many(items, all_or_nothing=False, db_file=None):
+    """Sell a basket of (product_id, quantity) lines in a single transaction.
+
+    Stock is decremented with a conditional UPDATE (stock = stock - qty WHERE
+    stock >= qty), so concurrent checkouts can never oversell or lose an update.
+    Returns one SaleLine per input line, in input order. For sold lines `stock` is
+    what is left; for refused lines it is what was available to that line. With
+    all_or_nothing=True one refused line rolls back the whole basket.
+    """
+    lines = [(int(pid), int(qty)) for pid, qty in items]
+    errors = {i: "Quantity must be > 0." for i, (_, qty) in enumerate(lines) if qty <= 0}
+    wanted = [i for i in range(len(lines)) if i not in errors]
+    available = {}
+
+    conn = get_db_connection(db_file)
+    with transaction(conn):
+        cur = conn.cursor()
+        cur.execute("SAVEPOINT basket")
+        # Fast path: the whole basket in one executemany.
+        cur.executemany(SQL_SELL_STOCK, [(lines[i][1], lines[i][0], lines[i][1]) for i in wanted])
+        sold = wanted
+        if cur.rowcount != len(wanted):
+            # Some line could not be served; undo and retry line by line to find it.
+            cur.execute("ROLLBACK TO basket")
+            sold = []
+            for i in wanted:
+                pid, qty = lines[i]
+                cur.execute(SQL_SELL_STOCK, (qty, pid, qty))
+                if cur.rowcount == 1:
+                    sold.append(i)
+                    continue
+                cur.execute(SQL_SELECT_PRODUCT_FOR_SALE, (pid,))
+                r = cur.fetchone()
+                available[i] = r[1] if r else None
+                errors[i] = f"Only {r[1]} units available." if r else "Product ID not found."
+            if all_or_nothing and len(sold) != len(wanted):
+                cur.execute("ROLLBACK TO basket")
+                for i in sold:
+                    errors[i] = "Basket rolled back."
+                sold = []
+        cur.executemany(SQL_INSERT_SALE_AT_PRICE, [(lines[i][1], lines[i][1], lines[i][0]) for i in sold])
+        cur.execute("RELEASE basket")
+
+        details = {}
+        for pid in {pid for pid, _ in lines}:
+            cur.execute(SQL_SELECT_PRODUCT_FOR_SALE, (pid,))
+            details[pid] = cur.fetchone()
+    invalidate_products([lines[i][0] for i in sold], db_file)
+
+    results = []
+    for i, (pid, qty) in enumerate(lines):
+        name, stock, price = details[pid] or (None, None, 0.0)
+        if i not in errors:
+            results.append(SaleLine(pid, qty, True, name, qty * price, stock, None))
+            continue
+        results.append(SaleLine(pid, qty, False, name, 0.0, available.get(i, stock), errors[i]))
+    return results
+
+# -------------------- INVENTORY OPERATIONS --------------------
+def validate_product(name, category, subcategory, price, stock):
+    """Normalize product fields the way the Add/Update forms do.
+
+    Returns (name, category, subcategory, price, stock); raises ValueError with a
+    user-facing message if price is not a number, stock is not an integer, or
+    name/category are empty.
+    """
+    name = (name or "").strip()
+    category = (category or "").strip()
+    subcategory = (subcategory or "").strip()
+    # int() would truncate a JSON 3.7 to 3 and take true as 1, where the form
+    # refuses "3.7": only whole numbers get through, as in the form
+    if isinstance(price, bool) or isinstance(stock, bool) or (
+            isinstance(stock, float) and not stock.is_integer()):
+        raise ValueError("Price must be number and Stock must be integer.")
+    try:
+        price = float(price)
+        stock = int(stock)
+    except (TypeError, ValueError):
+        raise ValueError("Price must be number and Stock must be integer.")
+    if not name or not category:
+        raise ValueError("Please enter Name and Category.")
+    return name, category, subcategory, price, stock
+
+@profile
+def add_product(name, category, subcategory, price, stock, db_file=None):
+    """Insert a product and return its new id."""
+    cur = get_db_connection(db_file).execute(SQL_INSERT_PRODUCT, (name, category, subcategory, price, stock))
+    return cur.lastrowid
+
+@profile
+def bulk_insert_products(rows, db_file=None, with_ids=False):
+    """Insert many already-validated product rows in one transaction.
+
+    Instead of firing the FTS and category_stock insert triggers once per row,
+    the triggers are dropped inside the transaction, the rows go in with
+    executemany, and both derived tables are updated set-based for the new ids
+    before the triggers are recreated. DDL is transactional in SQLite, so other
+    connections never see the triggers missing. Returns the number of rows.
+
+    with_ids=True takes (id, name, ...) rows, for copying products between
+    databases; every id must be above the current highest id.
+    """
+    conn = get_db_connection(db_file)
+    with transaction(conn):
+        last_id = conn.execute(SQL_MAX_PRODUCT_ID).fetchone()[0]
+        for stmt in SQL_DROP_INSERT_TRIGGERS:
+            conn.execute(stmt)
+        cur = conn.executemany(SQL_INSERT_PRODUCT_WITH_ID if with_ids else SQL_INSERT_PRODUCT, rows)
+        conn.execute(SQL_FTS_INDEX_NEW_PRODUCTS, (last_id,))
+        conn.execute(SQL_CATEGORY_STOCK_ADD_NEW_PRODUCTS, (last_id,))
+        for stmt in SQL_CREATE_FTS_TRIGGERS + SQL_CREATE_CATEGORY_STOCK_TRIGGERS:
+            conn.execute(stmt)
+    return cur.rowcount
+
+@profile
+def get_product(pid, db_file=None):
+    """(name, category, subcategory, price, stock) for pid, or None.
+
+    Served from product_cache when possible; misses read through to SQLite.
+    Missing products are not cached.
+    """
+    key = (db_path(db_file), pid)
+    row = product_cache.get(key)
+    if row is None:
+        version = product_cache.version(key)
+        row = get_db_connection(db_file).execute(SQL_SELECT_PRODUCT, (pid,)).fetchone()
+        if row is not None:
+            product_cache.put(key, row, version)
+    return row
+
+@profile
+def update_product(pid, name, category, subcategory, price, stock, db_file=None):
+    """Overwrite a product; returns False if pid does not exist."""
+    cur = get_db_connection(db_file).execute(SQL_UPDATE_PRODUCT, (name, category, subcategory, price, stock, pid))
+    invalidate_products([pid], db_file)
+    return cur.rowcount == 1
+
+@profile
+def delete_product(pid, db_file=None):
+    """Delete a product; returns False if pid does not exist."""
+    deleted = get_db_connection(db_file).execute(SQL_DELETE_PRODUCT, (pid,)).rowcount == 1
+    invalidate_products([pid], db_file)
+    return deleted
+
+@profile
+def products_after(after_id, limit, db_file=None):
+    """Up to `limit` product rows with id > after_id, ascending (keyset paging)."""
+    return get_db_connection(db_file).execute(SQL_PRODUCTS_PAGE_AFTER, (after_id, limit)).fetchall()
+
+@profile
+def products_before(before_id, limit, db_file=None):
+    """Up to `limit` product rows with id < before_id, nearest first."""
+    return get_db_connection(db_file).execute(SQL_PRODUCTS_PAGE_BEFORE, (before_id, limit)).fetchall()
+
+@profile
+def products_between(first_id, last_id, db_file=None):
+    """Product rows with first_id <= id <= last_id, ascending."""
+    return get_db_connection(db_file).execute(SQL_PRODUCTS_RANGE, (first_id, last_id)).fetchall()
+
+@profile
+def category_stock(db_file=None):
+    """[(category, total stock)] for the category chart."""
+    return get_db_connection(db_file).execute(SQL_CATEGORY_STOCK).fetchall()
+
+@profile
+def subcategory_stock(db_file=None):
+    """[("category - subcategory", total stock)] for the subcategory chart."""
+    return get_db_connection(db_file).execute(SQL_SUBCATEGORY_STOCK).fetchall()
+
+SEARCH_WEIGHTS = (10.0, 4.0, 2.0)    # name, category, subcategory
+
+def search_words(text):
+    """Lower-cased words with accents stripped, matching the FTS5 tokenizer."""
+    text = unicodedata.normalize("NFKD", text.lower())
+    return re.findall(r"\w+", "".join(ch for ch in text if not unicodedata.combining(ch)))
+
+@profile
+def check_category_stock(db_file=None):
+    """Compare category_stock against a full recompute from products.
+
+    Returns a list of (category, subcategory, expected (stock, products),
+    actual (stock, products)) for every pair that differs; empty means consistent.
+    """
+    conn = get_db_connection(db_file)
+    with transaction(conn, "DEFERRED"):   # both reads see the same snapshot
+        expected = {(r[0], r[1]): (r[2], r[3]) for r in conn.execute(SQL_RECOMPUTE_CATEGORY_STOCK)}
+        actual = {(r[0], r[1]): (r[2], r[3]) for r in conn.execute(SQL_SELECT_CATEGORY_STOCK)}
+    return [(cat, sub, expected.get((cat, sub)), actual.get((cat, sub)))
+            for cat, sub in sorted(expected.keys() | actual.keys())
+            if expected.get((cat, sub)) != actual.get((cat, sub))]
+
+@profile
+def rebuild_category_stock(db_file=None):
+    """Recompute category_stock from scratch (repair after check_category_stock fails)."""
+    conn = get_db_connection(db_file)
+    with transaction(conn):
+        conn.execute("DELETE FROM category_stock")
+        conn.executemany(SQL_FILL_CATEGORY_STOCK, conn.execute(SQL_RECOMPUTE_CATEGORY_STOCK).fetchall())
+
+def match_query(words):
+    """FTS5 query in which every word must match as a prefix."""
+    return " ".join(f'"{w}"*' for w in words)
+
+def match_tiers(words):
+    """FTS5 queries for the SQL_SEARCH_PRODUCTS tiers: exact name, name prefix, anywhere."""
+    exact = " ".join(f'"{w}"' for w in words)
+    return f"name : ({exact})", f"name : ({match_query(words)})", match_query(words)
+
+def search_score(words, name, category, subcategory):
+    """Relevance of one product: weighted per column, whole words beat prefixes."""
+    score = 0.0
+    for weight, text in zip(SEARCH_WEIGHTS, (name, category, subcategory)):
+        tokens = search_words(text or "")
+        for w in words:
+            if w in tokens:
+                score += weight
+            elif any(t.startswith(w) for t in tokens):
+                score += weight * 0.75
+    return score
+
+@profile
+def search_products(text, limit=20, candidates=200, db_file=None):
+    """Ranked prefix search over name, category and subcategory.
+
+    Takes up to `candidates` FTS matches, exact name matches first, then name
+    prefixes, then matches in any column (see SQL_SEARCH_PRODUCTS). Ranks them
+    with search_score() (shorter names first on ties) and returns up to `limit`
+    rows of (id, name, category, subcategory, price, stock, score), best first.
+    """
+    words = search_words(text)
+    if not words:
+        return []
+    params = [p for q in match_tiers(words) for p in (q, candidates)] + [candidates]
+    rows = get_db_connection(db_file).execute(SQL_SEARCH_PRODUCTS, params).fetchall()
+    ranked = [row + (search_score(words, row[1], row[2], row[3]),) for row in rows]
+    ranked.sort(key=lambda r: (-r[6], len(r[1] or ""), r[0]))
+    return ranked[:limit]
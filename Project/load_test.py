@@ -0,0 +1,133 @@
+"""
+Load test for inventory_server.py
+
+Opens N keep-alive connections, each sending requests back to back, and
+reports requests per second and p50/p99 latency per endpoint. The default mix
+is 70% product reads, 20% searches and 10% single-line sales.
+
+With --spawn it seeds a throwaway database, starts a local server on it and
+stops it afterwards; otherwise it targets an already running server.
+
+Usage:
+    python load_test.py --spawn [--products 10000] [--connections 32] [--requests 20000]
+    python load_test.py --port 8765 --products 4
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+import inventory_service as inv
+
+WORDS = ["red", "blue", "fresh", "classic", "pizza", "burger", "coffee", "tea", "cake", "juice"]
+
+
+def percentile(sorted_values, p):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p / 100))]
+
+
+def make_request(rng, products):
+    roll = rng.random()
+    if roll < 0.7:
+        return "read", "GET", f"/products/{rng.randint(1, products)}", None
+    if roll < 0.9:
+        word = rng.choice(WORDS)
+        return "search", "GET", f"/search?q={word[:rng.randint(2, len(word))]}", None
+    return "sell", "POST", "/sell", {"items": [[rng.randint(1, products), 1]]}
+
+
+async def client(host, port, count, products, seed, latencies):
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for _ in range(count):
+            kind, method, path, body = make_request(rng, products)
+            data = json.dumps(body).encode() if body is not None else b""
+            start = time.perf_counter()
+            writer.write((f"{method} {path} HTTP/1.1\r\nHost: {host}\r\n"
+                          f"Content-Length: {len(data)}\r\n\r\n").encode() + data)
+            await writer.drain()
+            await reader.readline()                       # status line
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b""):
+                    break
+                name, _, value = line.decode().partition(":")
+                if name.lower() == "content-length":
+                    length = int(value)
+            await reader.readexactly(length)
+            latencies.setdefault(kind, []).append((time.perf_counter() - start) * 1000)
+    finally:
+        writer.close()
+
+
+async def run(host, port, connections, requests, products):
+    latencies = {}
+    per_client = max(1, requests // connections)
+    start = time.perf_counter()
+    await asyncio.gather(*(client(host, port, per_client, products, i, latencies) for i in range(connections)))
+    elapsed = time.perf_counter() - start
+
+    everything = sorted(v for values in latencies.values() for v in values)
+    print(f"{len(everything)} requests over {connections} connections in {elapsed:.2f}s "
+          f"-> {len(everything) / elapsed:.0f} req/s")
+    for kind, values in sorted(latencies.items()) + [("all", everything)]:
+        values = sorted(values)
+        print(f"  {kind:<7} n={len(values):<7} p50 {percentile(values, 50):7.2f} ms   "
+              f"p99 {percentile(values, 99):7.2f} ms")
+
+
+async def wait_for_port(host, port, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            _, writer = await asyncio.open_connection(host, port)
+            writer.close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test for the inventory HTTP API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--connections", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--products", type=int, default=10000, help="product ids to hit (and seed with --spawn)")
+    parser.add_argument("--spawn", action="store_true", help="seed a temp database and start a local server")
+    args = parser.parse_args()
+
+    server = None
+    tmp = tempfile.TemporaryDirectory() if args.spawn else None
+    try:
+        if args.spawn:
+            db_file = os.path.join(tmp.name, "load.db")
+            inv.init_db(db_file)
+            inv.bulk_insert_products([(f"{random.choice(WORDS)} {random.choice(WORDS)} {i}", "Cat", "Sub", 9.99, 10**9)
+                                      for i in range(args.products)], db_file)
+            inv.close_db_connections()
+            server = subprocess.Popen([sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                                    "inventory_server.py"),
+                                       "--db", db_file, "--host", args.host, "--port", str(args.port)])
+            asyncio.run(wait_for_port(args.host, args.port))
+        asyncio.run(run(args.host, args.port, args.connections, args.requests, args.products))
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+        if tmp:
+            tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
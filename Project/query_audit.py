@@ -0,0 +1,120 @@
+"""
+Query plan audit
+
+Runs EXPLAIN QUERY PLAN on every SQL_* statement in the modules listed in
+AUDITED_MODULES against a scratch database built by init_db(), and exits with
+status 1 if any statement scans a table instead of using an index.
+
+A scan of a covering index is accepted: it never touches the table rows.
+Statements that must read everything by design are listed in ALLOWED_SCANS.
+
+Usage:
+    python query_audit.py
+"""
+
+import os
+import re
+import sys
+import tempfile
+
+import inventory_service as inv
+import inventory_io
+import sales_journal
+import sharding
+import sales_reports
+
+AUDITED_MODULES = (inv, inventory_io, sales_reports, sales_journal, sharding)
+
+# Statement name -> why a full scan is expected.
+ALLOWED_SCANS = {
+    "SQL_CATEGORY_STOCK": "category_stock has one row per category pair",
+    "SQL_SUBCATEGORY_STOCK": "category_stock has one row per category pair",
+    "SQL_SELECT_CATEGORY_STOCK": "consistency check reads the whole summary",
+    "SQL_SELL_THROUGH": "category_stock has one row per category pair",
+    "SQL_EXPORT_PRODUCTS": "export streams the whole table",
+    "SQL_EXPORT_SALES": "export streams the whole table",
+    "SQL_ALL_PRODUCTS": "reshard copies the whole table",
+    "SQL_ALL_SALES": "reshard copies the whole table",
+    "SQL_RAISE_PRODUCT_SEQUENCE": "sqlite_sequence has one row per AUTOINCREMENT table",
+}
+
+SCAN_RE = re.compile(r"^SCAN (\w+)")
+SUBQUERY_RE = re.compile(r"^(MATERIALIZE|CO-ROUTINE) (\w+)")
+
+
+def collect_statements(modules=AUDITED_MODULES):
+    """(name, sql) for every SQL_* string constant except DDL."""
+    out = []
+    for module in modules:
+        out.extend(_module_statements(module))
+    return out
+
+
+def _module_statements(module):
+    out = []
+    for name in sorted(vars(module)):
+        sql = getattr(module, name)
+        if not name.startswith("SQL_") or not isinstance(sql, str):
+            continue
+        if sql.lstrip().upper().startswith("CREATE"):
+            continue
+        out.append((name, sql))
+    return out
+
+
+def explain(conn, sql):
+    """Plan detail lines for sql, binding NULL to every parameter."""
+    params = [None] * sql.count("?")
+    return [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+
+
+def table_scans(plan):
+    """Plan lines that read a table (or a non-covering index) end to end.
+
+    Scans of materialized subqueries, covering indexes and FTS virtual tables
+    (which use their own index) are not table scans.
+    """
+    subqueries = {m.group(2) for m in map(SUBQUERY_RE.match, plan) if m}
+    scans = []
+    for detail in plan:
+        m = SCAN_RE.match(detail)
+        if not m or m.group(1) in subqueries:
+            continue
+        if "COVERING INDEX" in detail or "VIRTUAL TABLE" in detail:
+            continue
+        scans.append(detail)
+    return scans
+
+
+def audit(db_file):
+    conn = sales_reports.init_rollups(db_file)
+    sales_journal.init_journal(db_file)
+    failures = 0
+    for name, sql in collect_statements():
+        plan = explain(conn, sql)
+        scans = table_scans(plan)
+        if scans and name not in ALLOWED_SCANS:
+            status = "FAIL"
+            failures += 1
+        else:
+            status = "ok"
+        print(f"[{status:>4}] {name}")
+        for detail in plan:
+            print(f"         {detail}")
+        if scans and name in ALLOWED_SCANS:
+            print(f"         (allowed: {ALLOWED_SCANS[name]})")
+    return failures
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        failures = audit(os.path.join(tmp, "audit.db"))
+        inv.close_db_connections()
+    if failures:
+        print(f"\n{failures} statement(s) scan a table.")
+        sys.exit(1)
+    print("\nAll statements use indexes.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,384 @@
+"""
+Sales journal
+
+An optional write-ahead log for sales at rates the database cannot commit one
+by one. record_sale() appends the sale to a JSON Lines segment file and returns
+once the line is fsynced; concurrent callers share one fsync (group commit).
+A background thread then applies acknowledged sales to products.stock and the
+sales table in large transactions.
+
+Files in the journal directory:
+    segment-<first seq>.jsonl   one {"seq", "pid", "qty", "total", "date"} per line
+
+The database is the snapshot: journal_state.applied_seq is written in the same
+transaction as the sales it covers, so replay after a crash skips exactly what
+was already applied. compact() deletes segments that are fully applied once a
+WAL checkpoint has made those transactions durable in the main database file.
+
+Until a sale is applied its quantity is held in `pending`. record_sale(),
+stock() and get_product() read the database and subtract it under the journal
+lock, and an apply pass commits and releases its pending quantities inside
+that same lock, so these readers never see stock that was already sold, or
+see a sale taken off twice. Only they see pending sales: every other reader
+(inventory_service.get_product, the HTTP server, Project1) sees stock drop
+when the sale is applied, within about APPLY_INTERVAL. Sales made outside the
+journal can likewise race a journaled sale for the last units. Such an
+acknowledged sale is never dropped: it is stored in sales_journal_rejects for
+someone to settle by hand.
+
+Usage:
+    python sales_journal.py [--dir journal] [--db inventory.db]
+        replays unapplied sales, compacts, and prints the journal state
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import threading
+import time
+
+import inventory_service as inv
+
+JOURNAL_DIR = "journal"
+SEGMENT_BYTES = 4 * 1024 * 1024   # start a new segment after this many bytes
+APPLY_INTERVAL = 0.05             # seconds between background apply passes
+APPLY_BATCH = 5000                # apply early once this many sales are waiting
+
+SQL_CREATE_JOURNAL = (
+    """CREATE TABLE IF NOT EXISTS journal_state (
+           name TEXT PRIMARY KEY,
+           applied_seq INTEGER NOT NULL
+       )""",
+    """CREATE TABLE IF NOT EXISTS sales_journal_rejects (
+           seq INTEGER PRIMARY KEY,
+           product_id INTEGER,
+           quantity INTEGER,
+           total REAL,
+           date TIMESTAMP
+       )""",
+)
+SQL_APPLIED_SEQ = "SELECT applied_seq FROM journal_state WHERE name = 'sales'"
+SQL_SET_APPLIED_SEQ = ("INSERT INTO journal_state(name, applied_seq) VALUES('sales', ?) "
+                       "ON CONFLICT(name) DO UPDATE SET applied_seq = excluded.applied_seq")
+SQL_INSERT_JOURNALED_SALE = "INSERT INTO sales(product_id, quantity, total, date) VALUES(?,?,?,?)"
+SQL_INSERT_REJECT = ("INSERT OR IGNORE INTO sales_journal_rejects(seq, product_id, quantity, total, date) "
+                     "VALUES(?,?,?,?,?)")
+
+
+def fsync_dir(path):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def segment_path(directory, first_seq):
+    return os.path.join(directory, f"segment-{first_seq:012d}.jsonl")
+
+
+def read_segment(path, repair=False):
+    """Events in one segment. A torn last line (crash mid-write, never
+    acknowledged) is cut off when repair is true, and is an error otherwise."""
+    events = []
+    good = 0
+    with open(path, "rb") as f:
+        data = f.read()
+    for line in data.splitlines(keepends=True):
+        try:
+            if not line.endswith(b"\n"):
+                raise ValueError("unterminated line")
+            e = json.loads(line)
+            events.append((e["seq"], e["pid"], e["qty"], e["total"], e["date"]))
+        except (ValueError, KeyError) as exc:
+            if not repair:
+                raise ValueError(f"{path}: corrupt record at byte {good}") from exc
+            with open(path, "r+b") as f:
+                f.truncate(good)
+                os.fsync(f.fileno())
+            break
+        good += len(line)
+    return events
+
+
+def init_journal(db_file=None):
+    """Create the journal's tables (no-op once they exist); returns the connection."""
+    conn = inv.get_db_connection(db_file)
+    for stmt in SQL_CREATE_JOURNAL:
+        conn.execute(stmt)
+    return conn
+
+
+class SalesJournal:
+    def __init__(self, directory=JOURNAL_DIR, db_file=None, segment_bytes=SEGMENT_BYTES,
+                 apply_interval=APPLY_INTERVAL, apply_batch=APPLY_BATCH):
+        self.directory = directory
+        self.db_file = db_file
+        self.segment_bytes = segment_bytes
+        self.apply_interval = apply_interval
+        self.apply_batch = apply_batch
+
+        self.lock = threading.Lock()
+        self.work = threading.Condition(self.lock)     # writer waits for lines
+        self.acked = threading.Condition(self.lock)    # callers wait for fsync
+        self.apply_lock = threading.Lock()
+        self.wake_applier = threading.Event()
+        self.buffer = []          # encoded lines not yet written
+        self.unapplied = []       # (seq, pid, qty, total, date), in seq order
+        self.pending = {}         # pid -> quantity journaled but not applied
+        self.closed_segments = []  # (path, last seq), oldest first
+        self.error = None
+        self.apply_error = None   # last failed apply pass, cleared once one succeeds
+        self.closing = False
+
+        os.makedirs(directory, exist_ok=True)
+        row = init_journal(db_file).execute(SQL_APPLIED_SEQ).fetchone()
+        self.applied_seq = row[0] if row else 0
+        self.durable_seq = self.replay()
+        self.next_seq = max(self.durable_seq, self.applied_seq) + 1
+
+        # Never append after a repaired tail: every run starts a fresh segment
+        self.segment = open(segment_path(directory, self.next_seq), "ab")
+        self.segment_first = self.next_seq
+        fsync_dir(directory)
+        self.apply_pending()
+        self.compact()
+
+        self.writer = threading.Thread(target=self.write_loop, name="journal-writer", daemon=True)
+        self.applier = threading.Thread(target=self.apply_loop, name="journal-applier", daemon=True)
+        self.writer.start()
+        self.applier.start()
+
+    # -------------------- RECOVERY --------------------
+    def replay(self):
+        """Load unapplied events from disk; returns the last sequence number on disk."""
+        paths = sorted(glob.glob(os.path.join(self.directory, "segment-*.jsonl")))
+        last = 0
+        for n, path in enumerate(paths):
+            events = read_segment(path, repair=n == len(paths) - 1)
+            if not events:
+                os.remove(path)
+                continue
+            for event in events:
+                if event[0] > self.applied_seq:
+                    self.unapplied.append(event)
+                    self.pending[event[1]] = self.pending.get(event[1], 0) + event[2]
+            last = events[-1][0]
+            self.closed_segments.append((path, last))
+        return last
+
+    # -------------------- WRITING --------------------
+    def record_sale(self, pid, quantity):
+        """Journal a sale and return its sequence number once it is on disk.
+
+        Raises ValueError for an unknown product or not enough stock, counting
+        sales that are journaled but not yet applied.
+        """
+        if not isinstance(quantity, int) or quantity <= 0:
+            raise ValueError("Quantity must be a positive whole number.")
+        with self.lock:
+            if self.error or self.closing:
+                raise RuntimeError("sales journal is closed") from self.error
+            row = self.read_product(pid)
+            if row is None:
+                raise ValueError(f"Product {pid} not found.")
+            available = row[4] - self.pending.get(pid, 0)
+            if quantity > available:
+                raise ValueError(f"Only {available} of product {pid} in stock.")
+            seq = self.next_seq
+            self.next_seq += 1
+            event = (seq, pid, quantity, quantity * row[3], time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime()))
+            self.unapplied.append(event)
+            self.pending[pid] = self.pending.get(pid, 0) + quantity
+            self.buffer.append(json.dumps(dict(zip(("seq", "pid", "qty", "total", "date"), event)),
+                                          separators=(",", ":")).encode() + b"\n")
+            self.work.notify()
+            while self.durable_seq < seq and self.error is None:
+                self.acked.wait()
+            if self.durable_seq < seq:
+                raise RuntimeError("sales journal write failed") from self.error
+        return seq
+
+    def write_loop(self):
+        while True:
+            with self.lock:
+                while not self.buffer and not self.closing:
+                    self.work.wait()
+                if not self.buffer:
+                    return
+                lines, self.buffer = self.buffer, []
+                last = self.next_seq - 1
+            try:
+                self.segment.write(b"".join(lines))
+                self.segment.flush()
+                os.fsync(self.segment.fileno())
+                if self.segment.tell() >= self.segment_bytes:
+                    self.rotate(last)
+            except OSError as exc:
+                with self.lock:
+                    self.error = exc
+                    self.acked.notify_all()
+                return
+            with self.lock:
+                self.durable_seq = last
+                self.acked.notify_all()
+                if len(self.unapplied) >= self.apply_batch:
+                    self.wake_applier.set()
+
+    def rotate(self, last):
+        self.segment.close()
+        # compact() replaces closed_segments under the lock; appending outside
+        # it could land in the list it is about to drop
+        with self.lock:
+            self.closed_segments.append((segment_path(self.directory, self.segment_first), last))
+        self.segment_first = last + 1
+        self.segment = open(segment_path(self.directory, self.segment_first), "ab")
+        fsync_dir(self.directory)
+
+    # -------------------- APPLYING --------------------
+    def apply_loop(self):
+        while not self.closing:
+            self.wake_applier.wait(self.apply_interval)
+            self.wake_applier.clear()
+            try:
+                if self.apply_pending():
+                    self.compact()
+                self.apply_error = None
+            except Exception as exc:   # keep journaling; the next pass retries
+                if self.apply_error is None:
+                    print(f"sales journal: apply failed: {exc}", file=sys.stderr)
+                self.apply_error = exc
+        inv.close_db_connections()
+
+    def apply_pending(self):
+        """Apply every acknowledged sale not yet in the database; returns how many."""
+        with self.apply_lock:
+            with self.lock:
+                n = 0
+                while n < len(self.unapplied) and self.unapplied[n][0] <= self.durable_seq:
+                    n += 1
+                batch = self.unapplied[:n]
+            if not batch:
+                return 0
+            conn = inv.get_db_connection(self.db_file)
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                cur = conn.cursor()
+                for seq, pid, qty, total, date in batch:
+                    cur.execute(inv.SQL_SELL_STOCK, (qty, pid, qty))
+                    if cur.rowcount == 1:
+                        cur.execute(SQL_INSERT_JOURNALED_SALE, (pid, qty, total, date))
+                    else:
+                        cur.execute(SQL_INSERT_REJECT, (seq, pid, qty, total, date))
+                cur.execute(SQL_SET_APPLIED_SEQ, (batch[-1][0],))
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            # Commit and release the pending quantities in one critical section:
+            # readers hold the lock while they read stock, so each sees either
+            # the old stock less pending or the new stock, never both subtracted.
+            with self.lock:
+                try:
+                    conn.execute("COMMIT")
+                except BaseException:
+                    conn.execute("ROLLBACK")
+                    raise
+                inv.invalidate_products({e[1] for e in batch}, self.db_file)
+                for _, pid, qty, _, _ in batch:
+                    left = self.pending[pid] - qty
+                    if left:
+                        self.pending[pid] = left
+                    else:
+                        del self.pending[pid]
+                del self.unapplied[:n]
+                self.applied_seq = batch[-1][0]
+            return n
+
+    def compact(self):
+        """Delete segments whose sales are all applied and checkpointed."""
+        with self.lock:
+            done = [(path, last) for path, last in self.closed_segments if last <= self.applied_seq]
+        if not done:
+            return 0
+        busy, log, checkpointed = inv.get_db_connection(self.db_file).execute(
+            "PRAGMA wal_checkpoint(FULL)").fetchone()
+        if busy or (log != -1 and log != checkpointed):
+            return 0    # a reader holds old WAL frames; try again next pass
+        for path, _ in done:
+            os.remove(path)
+        fsync_dir(self.directory)
+        with self.lock:
+            self.closed_segments = self.closed_segments[len(done):]
+        return len(done)
+
+    # -------------------- READING --------------------
+    def pending_quantity(self, pid):
+        with self.lock:
+            return self.pending.get(pid, 0)
+
+    def read_product(self, pid):
+        # Straight from the database, not product_cache: a cached row may be up
+        # to PRODUCT_CACHE_TTL old, and pending is only right against current stock
+        return inv.get_db_connection(self.db_file).execute(inv.SQL_SELECT_PRODUCT, (pid,)).fetchone()
+
+    def get_product(self, pid):
+        """Like inventory_service.get_product, with journaled sales taken off stock."""
+        with self.lock:
+            row = self.read_product(pid)
+            if row is None:
+                return None
+            return row[:4] + (row[4] - self.pending.get(pid, 0),)
+
+    def stock(self, pid):
+        row = self.get_product(pid)
+        return None if row is None else row[4]
+
+    def status(self):
+        with self.lock:
+            return {"next_seq": self.next_seq, "durable_seq": self.durable_seq,
+                    "applied_seq": self.applied_seq, "unapplied": len(self.unapplied),
+                    "apply_error": None if self.apply_error is None else str(self.apply_error),
+                    "segments": len(glob.glob(os.path.join(self.directory, "segment-*.jsonl")))}
+
+    def close(self):
+        """Write and apply everything journaled so far, then stop the threads."""
+        with self.lock:
+            self.closing = True
+            self.work.notify()
+        self.writer.join()
+        self.wake_applier.set()
+        self.applier.join()
+        self.segment.close()
+        if self.error is None:
+            self.apply_pending()
+            self.rotate_out_current()
+            self.compact()
+
+    def rotate_out_current(self):
+        path = segment_path(self.directory, self.segment_first)
+        if os.path.getsize(path):
+            with self.lock:
+                self.closed_segments.append((path, self.durable_seq))
+        else:
+            os.remove(path)
+
+
+# -------------------- MAIN --------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay and compact the sales journal")
+    parser.add_argument("--dir", default=JOURNAL_DIR, help=f"journal directory (default {JOURNAL_DIR})")
+    parser.add_argument("--db", default=None, help=f"database file (default {inv.DB_FILE})")
+    args = parser.parse_args(argv)
+
+    inv.init_db(args.db)
+    journal = SalesJournal(args.dir, args.db)   # opening replays what was not applied
+    journal.close()
+    for key, value in journal.status().items():
+        print(f"{key:<12} {value}")
+    inv.close_db_connections()
+
+
+if __name__ == "__main__":
+    main()
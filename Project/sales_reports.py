@@ -0,0 +1,194 @@
+"""
+Sales reporting
+
+Reports read two rollup tables instead of the raw sales table:
+    sales_daily  (day, product_id) -> units, revenue
+    sales_hourly (hour)            -> units, revenue
+refresh_rollups() folds new sales into them incrementally, starting after the
+highest sales.id already rolled up (kept in rollup_state), in bounded chunks.
+Reports then cost O(days x products sold) however long the sales history is.
+
+Categories come from the products table at report time, so a product that
+moved category is reported under its current one; deleted products show as
+"Unknown".
+
+Usage:
+    python sales_reports.py daily [--start 2025-01-01] [--end 2025-02-01]
+    python sales_reports.py hourly | weekly | categories | sell-through
+    python sales_reports.py top [--n 10]
+"""
+
+import argparse
+
+import inventory_service as inv
+
+SQL_CREATE_ROLLUPS = (
+    """CREATE TABLE IF NOT EXISTS sales_daily (
+           day TEXT NOT NULL,
+           product_id INTEGER NOT NULL,
+           units INTEGER NOT NULL,
+           revenue REAL NOT NULL,
+           PRIMARY KEY (day, product_id)
+       ) WITHOUT ROWID""",
+    """CREATE TABLE IF NOT EXISTS sales_hourly (
+           hour TEXT PRIMARY KEY,
+           units INTEGER NOT NULL,
+           revenue REAL NOT NULL
+       ) WITHOUT ROWID""",
+    """CREATE TABLE IF NOT EXISTS rollup_state (
+           name TEXT PRIMARY KEY,
+           last_sale_id INTEGER NOT NULL
+       )""",
+)
+
+SQL_ROLLUP_HIGH_WATER = "SELECT last_sale_id FROM rollup_state WHERE name = 'sales'"
+SQL_SET_ROLLUP_HIGH_WATER = ("INSERT INTO rollup_state(name, last_sale_id) VALUES('sales', ?) "
+                             "ON CONFLICT(name) DO UPDATE SET last_sale_id = excluded.last_sale_id")
+SQL_MAX_SALE_ID = "SELECT COALESCE(MAX(id), 0) FROM sales"
+SQL_ROLLUP_DAILY = """
+    INSERT INTO sales_daily(day, product_id, units, revenue)
+    SELECT date(date), product_id, SUM(quantity), SUM(total)
+    FROM sales WHERE id > ? AND id <= ? GROUP BY 1, 2
+    ON CONFLICT(day, product_id)
+    DO UPDATE SET units = units + excluded.units, revenue = revenue + excluded.revenue
+"""
+SQL_ROLLUP_HOURLY = """
+    INSERT INTO sales_hourly(hour, units, revenue)
+    SELECT strftime('%Y-%m-%d %H:00', date), SUM(quantity), SUM(total)
+    FROM sales WHERE id > ? AND id <= ? GROUP BY 1
+    ON CONFLICT(hour)
+    DO UPDATE SET units = units + excluded.units, revenue = revenue + excluded.revenue
+"""
+
+# Reports. Ranges are half-open [start, end) on ISO dates; defaults cover everything.
+SQL_REVENUE_BY_HOUR = ("SELECT hour, units, revenue FROM sales_hourly "
+                       "WHERE hour >= ? AND hour < ? ORDER BY hour")
+SQL_REVENUE_BY_DAY = ("SELECT day, SUM(units), SUM(revenue) FROM sales_daily "
+                      "WHERE day >= ? AND day < ? GROUP BY day ORDER BY day")
+SQL_REVENUE_BY_WEEK = ("SELECT strftime('%Y-W%W', day) AS week, SUM(units), SUM(revenue) FROM sales_daily "
+                       "WHERE day >= ? AND day < ? GROUP BY week ORDER BY week")
+SQL_REVENUE_BY_CATEGORY = """
+    SELECT COALESCE(p.category, 'Unknown') AS cat, SUM(d.units), SUM(d.revenue)
+    FROM sales_daily d LEFT JOIN products p ON p.id = d.product_id
+    WHERE d.day >= ? AND d.day < ? GROUP BY cat ORDER BY 3 DESC
+"""
+SQL_TOP_PRODUCTS = """
+    SELECT t.product_id, COALESCE(p.name, 'Unknown'), t.units, t.revenue
+    FROM (SELECT product_id, SUM(units) AS units, SUM(revenue) AS revenue FROM sales_daily
+          WHERE day >= ? AND day < ? GROUP BY product_id ORDER BY revenue DESC LIMIT ?) AS t
+    LEFT JOIN products p ON p.id = t.product_id
+    ORDER BY t.revenue DESC
+"""
+# Sell-through per category: units sold / (units sold + units still in stock).
+SQL_SELL_THROUGH = """
+    SELECT s.cat, s.units, COALESCE(c.stock, 0)
+    FROM (SELECT COALESCE(p.category, 'Unknown') AS cat, SUM(d.units) AS units
+          FROM sales_daily d LEFT JOIN products p ON p.id = d.product_id
+          WHERE d.day >= ? AND d.day < ? GROUP BY cat) AS s
+    LEFT JOIN (SELECT category, SUM(stock) AS stock FROM category_stock GROUP BY category) AS c
+           ON c.category = s.cat
+    ORDER BY s.cat
+"""
+
+ALL_TIME = ("0000-00-00", "9999-99-99")
+
+
+def init_rollups(db_file=None):
+    conn = inv.init_db(db_file)
+    with inv.transaction(conn):
+        for stmt in SQL_CREATE_ROLLUPS:
+            conn.execute(stmt)
+    return conn
+
+
+def refresh_rollups(db_file=None, chunk=500000):
+    """Fold sales newer than the high-water mark into the rollups.
+
+    Each chunk of sales ids is rolled up in its own transaction together with
+    the new high-water mark, so a crash never double counts or skips a sale.
+    The mark is read inside that write transaction, so concurrent refreshes
+    serialize on it and each chunk is folded in exactly once.
+    Returns the number of sales ids this call consumed.
+    """
+    conn = init_rollups(db_file)
+    last = conn.execute(SQL_MAX_SALE_ID).fetchone()[0]
+    consumed = 0
+    while True:
+        with inv.transaction(conn):
+            done = row[0] if (row := conn.execute(SQL_ROLLUP_HIGH_WATER).fetchone()) else 0
+            if done >= last:
+                return consumed
+            upto = min(done + chunk, last)
+            conn.execute(SQL_ROLLUP_DAILY, (done, upto))
+            conn.execute(SQL_ROLLUP_HOURLY, (done, upto))
+            conn.execute(SQL_SET_ROLLUP_HIGH_WATER, (upto,))
+        consumed += upto - done
+
+
+def _range(start, end):
+    return (start or ALL_TIME[0], end or ALL_TIME[1])
+
+
+def _query(sql, params, db_file, refresh):
+    if refresh:
+        refresh_rollups(db_file)
+    return inv.get_db_connection(db_file).execute(sql, params).fetchall()
+
+
+# -------------------- REPORTS --------------------
+def revenue_by(bucket="day", start=None, end=None, db_file=None, refresh=True):
+    """[(bucket, units, revenue)] for bucket in "hour", "day" or "week"."""
+    sql = {"hour": SQL_REVENUE_BY_HOUR, "day": SQL_REVENUE_BY_DAY, "week": SQL_REVENUE_BY_WEEK}[bucket]
+    return _query(sql, _range(start, end), db_file, refresh)
+
+
+def revenue_by_category(start=None, end=None, db_file=None, refresh=True):
+    """[(category, units, revenue)], highest revenue first."""
+    return _query(SQL_REVENUE_BY_CATEGORY, _range(start, end), db_file, refresh)
+
+
+def top_products(n=10, start=None, end=None, db_file=None, refresh=True):
+    """[(product_id, name, units, revenue)] for the n best sellers by revenue."""
+    return _query(SQL_TOP_PRODUCTS, _range(start, end) + (n,), db_file, refresh)
+
+
+def sell_through(start=None, end=None, db_file=None, refresh=True):
+    """[(category, units sold, units in stock, rate)], rate = sold / (sold + in stock)."""
+    rows = _query(SQL_SELL_THROUGH, _range(start, end), db_file, refresh)
+    return [(cat, sold, stock, sold / (sold + stock) if sold + stock else 0.0) for cat, sold, stock in rows]
+
+
+# -------------------- CLI --------------------
+def print_table(headers, rows):
+    widths = [max(len(str(h)), *(len(f"{r[i]:.2f}" if isinstance(r[i], float) else str(r[i])) for r in rows))
+              if rows else len(str(h)) for i, h in enumerate(headers)]
+    print("  ".join(str(h).ljust(w) for h, w in zip(headers, widths)))
+    for r in rows:
+        print("  ".join((f"{v:.2f}" if isinstance(v, float) else str(v)).ljust(w) for v, w in zip(r, widths)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sales reports from the inventory database")
+    parser.add_argument("report", choices=["hourly", "daily", "weekly", "categories", "top", "sell-through"])
+    parser.add_argument("--start", help="first day, YYYY-MM-DD (inclusive)")
+    parser.add_argument("--end", help="last day, YYYY-MM-DD (exclusive)")
+    parser.add_argument("--n", type=int, default=10, help="rows for the top report")
+    parser.add_argument("--db", default=None, help=f"database file (default {inv.DB_FILE})")
+    args = parser.parse_args(argv)
+
+    refresh_rollups(args.db)
+    span = dict(start=args.start, end=args.end, db_file=args.db, refresh=False)
+    if args.report in ("hourly", "daily", "weekly"):
+        bucket = {"hourly": "hour", "daily": "day", "weekly": "week"}[args.report]
+        print_table([bucket.title(), "Units", "Revenue"], revenue_by(bucket, **span))
+    elif args.report == "categories":
+        print_table(["Category", "Units", "Revenue"], revenue_by_category(**span))
+    elif args.report == "top":
+        print_table(["ID", "Name", "Units", "Revenue"], top_products(args.n, **span))
+    else:
+        print_table(["Category", "Sold", "In stock", "Sell-through"], sell_through(**span))
+    inv.close_db_connections()
+
+
+if __name__ == "__main__":
+    main()
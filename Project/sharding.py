@@ -0,0 +1,327 @@
+"""
+Inventory sharding
+
+Spreads the inventory over several SQLite files ("shards"), e.g. one per
+store, so writers on different shards never wait for the same lock.
+
+Product ids stay globally unique without a central counter: shard k of n
+only holds ids with id % n == k, so any id routes straight to its shard and
+a sale always lands in the shard of its product. New products go to the
+shard of their store when the layout names one, otherwise round-robin.
+
+Queries that span the inventory (category totals, search, the product grid,
+sales reports) run on every shard in parallel and the results are merged.
+
+The layout lives in a small JSON file:
+    {"shards": ["store01.db", "store02.db"], "stores": {"Downtown": 0}}
+
+reshard copies every product and sale into a new set of files, placed by
+id % (new shard count); ids do not change. Stop writers while it runs; the
+old files are left untouched until you delete them. After a reshard a
+store's products are spread over the new shards by id.
+
+Usage:
+    python sharding.py init --layout shards.json a.db b.db [--store Downtown=0]
+    python sharding.py status --layout shards.json
+    python sharding.py reshard --layout shards.json --to a.db b.db c.db
+"""
+
+import argparse
+import heapq
+import itertools
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import inventory_service as inv
+import sales_reports
+
+LAYOUT_FILE = "shards.json"
+RESHARD_BATCH = 50000
+
+# Next free id of this shard's residue class, above every id ever used
+# (sqlite_sequence also covers deleted products, so ids are never reused).
+SQL_INSERT_SHARD_PRODUCT = """
+    INSERT INTO products(id, name, category, subcategory, price, stock)
+    SELECT last + 1 + ((? - last - 1) % ? + ?) % ?, ?, ?, ?, ?, ?
+    FROM (SELECT COALESCE(MAX(seq), 0) AS last FROM sqlite_sequence WHERE name = 'products')
+"""
+SQL_ALL_PRODUCTS = "SELECT id, name, category, subcategory, price, stock FROM products ORDER BY id"
+SQL_ALL_SALES = "SELECT product_id, quantity, total, date FROM sales ORDER BY id"
+SQL_COPY_SALE = "INSERT INTO sales(product_id, quantity, total, date) VALUES(?,?,?,?)"
+SQL_PRODUCT_SEQUENCE = "SELECT COALESCE(MAX(seq), 0) FROM sqlite_sequence WHERE name = 'products'"
+SQL_RAISE_PRODUCT_SEQUENCE = "UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = 'products'"
+SQL_INSERT_PRODUCT_SEQUENCE = "INSERT INTO sqlite_sequence(name, seq) VALUES('products', ?)"
+SQL_COUNT_PRODUCTS = "SELECT COUNT(*) FROM products"
+SQL_COUNT_SALES = "SELECT COUNT(*) FROM sales"
+
+
+def load_layout(path=LAYOUT_FILE):
+    with open(path) as f:
+        layout = json.load(f)
+    layout.setdefault("stores", {})
+    return layout
+
+
+def save_layout(layout, path=LAYOUT_FILE):
+    """Write the layout atomically, so readers see the old or the new one."""
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(layout, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class ShardedInventory:
+    """The inventory_service API over a set of shard files."""
+
+    def __init__(self, shards, stores=None, workers=None):
+        if not shards:
+            raise ValueError("At least one shard is required.")
+        self.shards = list(shards)
+        self.stores = dict(stores or {})
+        for store, index in self.stores.items():
+            if not 0 <= index < len(self.shards):
+                raise ValueError(f"Store {store!r} maps to missing shard {index}.")
+        self.pool = ThreadPoolExecutor(max_workers=workers or len(self.shards),
+                                       thread_name_prefix="shard")
+        self.round_robin = itertools.count()
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_layout(cls, path=LAYOUT_FILE, workers=None):
+        layout = load_layout(path)
+        return cls(layout["shards"], layout["stores"], workers)
+
+    def init(self):
+        """Create or migrate every shard."""
+        self.fan_out(inv.init_db)
+
+    def close(self):
+        # Each worker's connections are closed when its thread exits
+        self.pool.shutdown()
+
+    # -------------------- ROUTING --------------------
+    def shard_of(self, pid):
+        return self.shards[pid % len(self.shards)]
+
+    def fan_out(self, fn):
+        """[fn(shard) for every shard], run in parallel, in shard order."""
+        return list(self.pool.map(fn, self.shards))
+
+    # -------------------- PRODUCTS --------------------
+    def add_product(self, name, category, subcategory, price, stock, store=None):
+        """Insert a product into its store's shard (round-robin without a store); returns its id."""
+        if store is not None:
+            if store not in self.stores:
+                raise ValueError(f"Unknown store {store!r}.")
+            k = self.stores[store]
+        else:
+            with self.lock:
+                k = next(self.round_robin) % len(self.shards)
+        n = len(self.shards)
+        cur = inv.get_db_connection(self.shards[k]).execute(
+            SQL_INSERT_SHARD_PRODUCT, (k, n, n, n, name, category, subcategory, price, stock))
+        return cur.lastrowid
+
+    def get_product(self, pid):
+        return inv.get_product(pid, self.shard_of(pid))
+
+    def update_product(self, pid, name, category, subcategory, price, stock):
+        return inv.update_product(pid, name, category, subcategory, price, stock, self.shard_of(pid))
+
+    def delete_product(self, pid):
+        return inv.delete_product(pid, self.shard_of(pid))
+
+    def sell_many(self, items, all_or_nothing=False):
+        """inventory_service.sell_many, one transaction per shard touched.
+
+        all_or_nothing is only honoured inside one shard: a basket spanning
+        shards would need a distributed commit, so it is rejected.
+        """
+        items = list(items)
+        groups = {}
+        results = [None] * len(items)
+        for i, (pid, qty) in enumerate(items):
+            # Ids from JSON or a form may be strings: route them by their value,
+            # as inventory_service would read them
+            try:
+                pid = int(pid)
+            except (TypeError, ValueError):
+                results[i] = inv.SaleLine(pid, qty, False, None, 0.0, None, "Product ID must be a whole number.")
+                continue
+            items[i] = (pid, qty)
+            groups.setdefault(pid % len(self.shards), []).append(i)
+        if all_or_nothing and len(groups) > 1:
+            raise ValueError("all_or_nothing baskets must stay within one shard.")
+
+        def sell_group(k):
+            lines = inv.sell_many([items[i] for i in groups[k]], all_or_nothing, self.shards[k])
+            for i, line in zip(groups[k], lines):
+                results[i] = line
+
+        if all_or_nothing and any(results):
+            # A bad id refuses the basket before any shard is touched
+            return [line or inv.SaleLine(pid, qty, False, None, 0.0, None, "Basket rolled back.")
+                    for line, (pid, qty) in zip(results, items)]
+        if len(groups) == 1:
+            sell_group(next(iter(groups)))
+        elif groups:
+            list(self.pool.map(sell_group, groups))
+        return results
+
+    # -------------------- FAN-OUT READS --------------------
+    def products_after(self, after_id, limit):
+        pages = self.fan_out(lambda db_file: inv.products_after(after_id, limit, db_file))
+        return list(itertools.islice(heapq.merge(*pages), limit))
+
+    def products_before(self, before_id, limit):
+        pages = self.fan_out(lambda db_file: inv.products_before(before_id, limit, db_file))
+        return list(itertools.islice(heapq.merge(*pages, key=lambda r: -r[0]), limit))
+
+    def products_between(self, first_id, last_id):
+        pages = self.fan_out(lambda db_file: inv.products_between(first_id, last_id, db_file))
+        return list(heapq.merge(*pages))
+
+    def category_stock(self):
+        return merge_totals(self.fan_out(inv.category_stock))
+
+    def subcategory_stock(self):
+        return merge_totals(self.fan_out(inv.subcategory_stock))
+
+    def search_products(self, text, limit=20, candidates=200):
+        """Best `limit` matches over all shards, ranked like inventory_service.
+
+        The candidate budget is split between the shards, so a search costs
+        about the same as on one database.
+        """
+        per_shard = max(limit, -(-candidates // len(self.shards)))
+        hits = self.fan_out(lambda db_file: inv.search_products(text, limit, per_shard, db_file))
+        return list(itertools.islice(heapq.merge(*hits, key=lambda r: (-r[6], len(r[1] or ""), r[0])), limit))
+
+    def revenue_by_category(self, start=None, end=None):
+        rows = self.fan_out(lambda db_file: sales_reports.revenue_by_category(start, end, db_file))
+        totals = {}
+        for cat, units, revenue in itertools.chain(*rows):
+            u, r = totals.get(cat, (0, 0.0))
+            totals[cat] = (u + units, r + revenue)
+        return sorted(((cat, u, r) for cat, (u, r) in totals.items()), key=lambda row: -row[2])
+
+    def top_products(self, n=10, start=None, end=None):
+        # Each product lives in one shard, so the global top n is in the shards' top n.
+        rows = self.fan_out(lambda db_file: sales_reports.top_products(n, start, end, db_file))
+        return sorted(itertools.chain(*rows), key=lambda row: -row[3])[:n]
+
+    def counts(self):
+        """[(shard, products, sales)]"""
+        def count(db_file):
+            conn = inv.get_db_connection(db_file)
+            return (db_file, conn.execute(SQL_COUNT_PRODUCTS).fetchone()[0],
+                    conn.execute(SQL_COUNT_SALES).fetchone()[0])
+        return self.fan_out(count)
+
+
+def merge_totals(per_shard):
+    """Sum [(label, number)] lists by label, ordered by label."""
+    totals = {}
+    for label, value in itertools.chain(*per_shard):
+        totals[label] = totals.get(label, 0) + (value or 0)
+    return sorted(totals.items())
+
+
+# -------------------- RESHARDING --------------------
+def reshard(old_shards, new_shards, batch=RESHARD_BATCH):
+    """Copy all products and sales from old_shards into new_shards (which
+    must not exist yet), placed by id % len(new_shards). Returns
+    (products, sales) copied."""
+    for path in new_shards:
+        if os.path.exists(path):
+            raise ValueError(f"{path} already exists; reshard writes new files only.")
+    n = len(new_shards)
+    for path in new_shards:
+        inv.init_db(path)
+
+    # Products: merging the id-ordered shards gives every target its rows in
+    # ascending id order, which bulk_insert_products needs.
+    streams = [inv.get_db_connection(path).execute(SQL_ALL_PRODUCTS) for path in old_shards]
+    buffers = [[] for _ in new_shards]
+    products = 0
+    for row in heapq.merge(*streams):
+        k = row[0] % n
+        buffers[k].append(row)
+        if len(buffers[k]) >= batch:
+            products += inv.bulk_insert_products(buffers[k], new_shards[k], with_ids=True)
+            buffers[k] = []
+    for k, rows in enumerate(buffers):
+        if rows:
+            products += inv.bulk_insert_products(rows, new_shards[k], with_ids=True)
+
+    sales = 0
+    for path in old_shards:
+        cur = inv.get_db_connection(path).execute(SQL_ALL_SALES)
+        while True:
+            rows = cur.fetchmany(batch)
+            if not rows:
+                break
+            targets = [[] for _ in new_shards]
+            for row in rows:
+                targets[row[0] % n].append(row)
+            for k, part in enumerate(targets):
+                if part:
+                    conn = inv.get_db_connection(new_shards[k])
+                    with inv.transaction(conn):
+                        conn.executemany(SQL_COPY_SALE, part)
+            sales += len(rows)
+
+    # Ids of deleted products stay retired in the new shards too
+    retired = max(inv.get_db_connection(path).execute(SQL_PRODUCT_SEQUENCE).fetchone()[0]
+                  for path in old_shards)
+    for path in new_shards:
+        conn = inv.get_db_connection(path)
+        if conn.execute(SQL_RAISE_PRODUCT_SEQUENCE, (retired,)).rowcount == 0:
+            conn.execute(SQL_INSERT_PRODUCT_SEQUENCE, (retired,))
+    return products, sales
+
+
+# -------------------- MAIN --------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage sharded inventory databases")
+    parser.add_argument("command", choices=["init", "status", "reshard"])
+    parser.add_argument("shards", nargs="*", help="shard files (init)")
+    parser.add_argument("--layout", default=LAYOUT_FILE, help=f"layout file (default {LAYOUT_FILE})")
+    parser.add_argument("--store", action="append", default=[], metavar="NAME=INDEX",
+                        help="pin a store's new products to a shard (init, repeatable)")
+    parser.add_argument("--to", nargs="+", default=[], metavar="DB", help="new shard files (reshard)")
+    args = parser.parse_args(argv)
+
+    if args.command == "init":
+        stores = {}
+        for spec in args.store:
+            name, _, index = spec.partition("=")
+            stores[name] = int(index)
+        sharded = ShardedInventory(args.shards, stores)
+        sharded.init()
+        sharded.close()
+        save_layout({"shards": args.shards, "stores": stores}, args.layout)
+        print(f"{len(args.shards)} shards written to {args.layout}")
+    elif args.command == "status":
+        sharded = ShardedInventory.from_layout(args.layout)
+        for path, products, sales in sharded.counts():
+            print(f"{path:<30} {products:>10} products {sales:>12} sales")
+        sharded.close()
+    else:
+        if not args.to:
+            parser.error("reshard needs --to with the new shard files")
+        layout = load_layout(args.layout)
+        products, sales = reshard(layout["shards"], args.to)
+        stores = {name: k for name, k in layout["stores"].items() if k < len(args.to)}
+        save_layout({"shards": args.to, "stores": stores}, args.layout)
+        print(f"copied {products} products and {sales} sales into {len(args.to)} shards; "
+              f"old files kept: {', '.join(layout['shards'])}")
+    inv.close_db_connections()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+import inventory_io
+import inventory_service as inv
+
+
+def test_jsonl_import_rejects_records_that_are_not_objects(tmp_path):
+    path = tmp_path / "products.jsonl"
+    path.write_text(
+        '{"name": "Tea", "category": "Grocery", "subcategory": "Drinks", "price": 3.0, "stock": 5}\n'
+        '[1, 2]\n'
+        '"x"\n'
+        '{"name": "Mug", "category": "Kitchen", "subcategory": "Cups", "price": 4.5, "stock": 2}\n',
+        encoding="utf-8",
+    )
+    db_file = str(tmp_path / "inventory.db")
+    try:
+        imported, rejected, _, errors = inventory_io.import_products(str(path), db_file=db_file)
+        names = [row[1] for row in inv.products_after(0, 10, db_file)]
+    finally:
+        inv.close_db_connections()
+
+    assert (imported, rejected) == (2, 2)
+    assert [line for line, _ in errors] == [2, 3]
+    assert all("JSON object" in message for _, message in errors)
+    assert names == ["Tea", "Mug"]
+
+
+def test_jsonl_import_rejects_stock_that_is_not_a_whole_number(tmp_path):
+    path = tmp_path / "products.jsonl"
+    path.write_text(
+        '{"name": "Tea", "category": "Grocery", "subcategory": "Drinks", "price": 3.0, "stock": 3.7}\n'
+        '{"name": "Cup", "category": "Kitchen", "subcategory": "Cups", "price": 2.0, "stock": true}\n'
+        '{"name": "Mug", "category": "Kitchen", "subcategory": "Cups", "price": 4.5, "stock": 2.0}\n',
+        encoding="utf-8",
+    )
+    db_file = str(tmp_path / "inventory.db")
+    try:
+        imported, rejected, _, errors = inventory_io.import_products(str(path), db_file=db_file)
+        rows = [row[1:] for row in inv.products_after(0, 10, db_file)]
+    finally:
+        inv.close_db_connections()
+
+    assert (imported, rejected) == (1, 2)
+    assert [line for line, _ in errors] == [1, 2]
+    assert rows == [("Mug", "Kitchen", "Cups", 4.5, 2)]
@@ -0,0 +1,31 @@
+import asyncio
+
+import pytest
+
+import inventory_service as inv
+import inventory_server
+
+
+@pytest.mark.parametrize("length", ["-5", "abc"])
+def test_bad_content_length_gets_a_400(tmp_path, length):
+    db_file = str(tmp_path / "inventory.db")
+    inv.init_db(db_file)
+    api = inventory_server.InventoryServer(db_file, workers=1)
+
+    async def request():
+        server = await asyncio.start_server(api.handle, "127.0.0.1", 0)
+        async with server:
+            reader, writer = await asyncio.open_connection(*server.sockets[0].getsockname()[:2])
+            writer.write(f"POST /sell HTTP/1.1\r\nContent-Length: {length}\r\n\r\n{{}}".encode())
+            await writer.drain()
+            response = await reader.read()
+            writer.close()
+            return response
+
+    try:
+        response = asyncio.run(request())
+    finally:
+        api.pool.shutdown()
+        inv.close_db_connections()
+    assert response.startswith(b"HTTP/1.1 400 ")
+    assert b"Bad Content-Length." in response
@@ -0,0 +1,68 @@
+import threading
+
+import pytest
+
+import inventory_service as inv
+import sales_journal
+
+
+@pytest.fixture
+def db_file(tmp_path):
+    path = str(tmp_path / "inventory.db")
+    inv.init_db(path)
+    yield path
+    inv.close_db_connections()
+
+
+def test_record_sale_checks_stock_in_the_database_not_the_cache(tmp_path, db_file):
+    pid = inv.add_product("Tea", "Grocery", "Drinks", 3.0, 10, db_file=db_file)
+    assert inv.get_product(pid, db_file)[4] == 10     # now cached
+    inv.get_db_connection(db_file).execute(inv.SQL_SET_STOCK, (2, pid))   # a write the cache never sees
+    journal = sales_journal.SalesJournal(str(tmp_path / "journal"), db_file)
+    try:
+        with pytest.raises(ValueError, match="Only 2"):
+            journal.record_sale(pid, 5)
+        journal.record_sale(pid, 2)
+    finally:
+        journal.close()
+    assert inv.get_db_connection(db_file).execute(inv.SQL_SELECT_PRODUCT, (pid,)).fetchone()[4] == 0
+
+
+def test_stock_never_counts_a_sale_twice_while_it_is_applied(tmp_path, db_file):
+    pid = inv.add_product("Tea", "Grocery", "Drinks", 3.0, 100000, db_file=db_file)
+    journal = sales_journal.SalesJournal(str(tmp_path / "journal"), db_file, apply_interval=0.001)
+    seen, done = [], threading.Event()
+
+    def read():
+        try:
+            while not done.is_set():
+                seen.append(journal.stock(pid))
+        finally:
+            inv.close_db_connections()
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    try:
+        for _ in range(2000):
+            journal.record_sale(pid, 1)
+    finally:
+        done.set()
+        reader.join()
+        journal.close()
+
+    # Only sales happen, so stock as seen through the journal can only go down
+    assert all(a >= b for a, b in zip(seen, seen[1:]))
+    assert journal.stock(pid) == 98000
+
+
+def test_every_rotated_segment_is_compacted(tmp_path, db_file):
+    pid = inv.add_product("Tea", "Grocery", "Drinks", 3.0, 100000, db_file=db_file)
+    directory = str(tmp_path / "journal")
+    journal = sales_journal.SalesJournal(directory, db_file, segment_bytes=256, apply_interval=0.001)
+    try:
+        for _ in range(500):
+            journal.record_sale(pid, 1)
+    finally:
+        journal.close()
+    assert journal.status()["segments"] == 0
+    assert not journal.closed_segments
@@ -0,0 +1,34 @@
+import threading
+
+import inventory_service as inv
+import sales_reports
+
+
+def test_concurrent_refreshes_count_each_sale_once(tmp_path):
+    db_file = str(tmp_path / "reports.db")
+    try:
+        conn = sales_reports.init_rollups(db_file)
+        with inv.transaction(conn):
+            conn.executemany("INSERT INTO sales(product_id, quantity, total, date) VALUES(?,?,?,?)",
+                             [(i % 7 + 1, 2, 5.0, "2025-01-01 10:00:00") for i in range(20000)])
+
+        ready = threading.Barrier(4)
+
+        def refresh():
+            ready.wait()
+            try:
+                sales_reports.refresh_rollups(db_file, chunk=100)
+            finally:
+                inv.close_db_connections()
+
+        threads = [threading.Thread(target=refresh) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        daily = conn.execute("SELECT SUM(units) FROM sales_daily").fetchone()[0]
+        hourly = conn.execute("SELECT SUM(units) FROM sales_hourly").fetchone()[0]
+    finally:
+        inv.close_db_connections()
+
+    assert daily == hourly == 40000
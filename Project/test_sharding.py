@@ -0,0 +1,23 @@
+import inventory_service as inv
+import sharding
+
+
+def test_sell_many_routes_string_ids_to_their_shard(tmp_path):
+    sharded = sharding.ShardedInventory([str(tmp_path / "a.db"), str(tmp_path / "b.db")])
+    try:
+        sharded.init()
+        pid = sharded.add_product("Tea", "Grocery", "Drinks", 3.0, 5)
+        other = sharded.add_product("Mug", "Kitchen", "Cups", 4.5, 5)
+        assert pid % 2 != other % 2          # one product in each shard
+
+        lines = sharded.sell_many([(str(pid), 2), (str(other), 1), ("tea", 1)])
+        assert [line.ok for line in lines] == [True, True, False]
+        assert [line.stock for line in lines[:2]] == [3, 4]
+        assert "whole number" in lines[2].error
+
+        refused = sharded.sell_many([(str(pid), 1), ("tea", 1)], all_or_nothing=True)
+        assert [line.ok for line in refused] == [False, False]
+        assert sharded.get_product(pid)[4] == 3
+    finally:
+        sharded.close()
+        inv.close_db_connections()
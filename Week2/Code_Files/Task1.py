@@ -1,23 +1,172 @@
+# Prime numbers
+# - is_prime(n): deterministic Miller-Rabin, exact for every n < 2**64
+# - primes_in_range(lo, hi): segmented Sieve of Eratosthenes, odd numbers only,
+#   one cache-sized bytearray segment at a time, so memory stays flat
+# - count_primes(lo, hi, workers): the same sieve, segments split over processes
+#
+# Usage:
+#   python Task1.py                 asks for a number, as before
+#   python Task1.py --bench [MAX]   timings from 10^6 up to 10^MAX (default 9)
+import os
+import sys
+import time
+from itertools import compress
+from math import isqrt
+from multiprocessing import Pool
+
+SEGMENT_BYTES = 1 << 18   # 256 KB of flags (512K numbers): stays in L2 cache
+SMALL_PRIMES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37)
+
+
 def is_prime(n):
-    count=0
-    for i in range(1,n+1):
-        if n%i==0:
-            count +=1
-    if count==2:
-        return True
-    else:
+    # The first 12 primes as Miller-Rabin bases give an exact answer below
+    # 318665857834031151167461 (about 3.18 * 10^23), so for every 64-bit n
+    if n < 2:
         return False
-    
-
-num=int(input("Enter the number:"))
-if is_prime(num):
-    print ("The Entered number is Prime")
-else:
-    print("The entered number is not prime")
-
-print("|---The list of prime number up to entered number---|")
-for i in range(1,num+1):
-    if is_prime(i):
-        print(i,end=" ")
+    for p in SMALL_PRIMES:
+        if n % p == 0:
+            return n == p
+    d, s = n - 1, 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+    for a in SMALL_PRIMES:
+        x = pow(a, d, n)
+        if x == 1 or x == n - 1:
+            continue
+        for _ in range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def base_primes(limit):
+    # Odd primes <= limit, from a plain odd-only sieve (index i stands for 2i+1)
+    if limit < 3:
+        return []
+    flags = bytearray([1]) * (limit // 2 + 1)
+    flags[0] = 0
+    for i in range(1, (isqrt(limit) - 1) // 2 + 1):
+        if flags[i]:
+            p = 2 * i + 1
+            flags[p * p // 2::p] = bytes(len(range(p * p // 2, len(flags), p)))
+    return [p for p in compress(range(1, 2 * len(flags), 2), flags) if p <= limit]
+
+
+def sieve_segment(lo, hi, odd_primes):
+    # Flags for the odd numbers lo, lo+2, ... below hi (lo must be odd)
+    size = (hi - lo + 1) // 2
+    seg = bytearray([1]) * size
+    for p in odd_primes:
+        start = p * p
+        if start >= hi:
+            break
+        if start < lo:
+            start = (lo + p - 1) // p * p
+            if start % 2 == 0:
+                start += p
+        i = (start - lo) // 2
+        seg[i::p] = bytes(len(range(i, size, p)))
+    if lo == 1:
+        seg[0] = 0          # 1 is not prime
+    return seg
+
+
+def segments(lo, hi, segment_bytes=SEGMENT_BYTES):
+    # (odd start, end) pairs covering the odd numbers in [lo, hi)
+    lo = max(lo, 1) | 1
+    span = 2 * segment_bytes
+    for start in range(lo, hi, span):
+        yield start, min(start + span, hi)
+
+
+def primes_in_range(lo, hi, segment_bytes=SEGMENT_BYTES):
+    # Yields the primes p with lo <= p < hi, in order
+    if lo <= 2 < hi:
+        yield 2
+    odd_primes = base_primes(isqrt(max(hi - 1, 0)))
+    for start, end in segments(lo, hi, segment_bytes):
+        yield from compress(range(start, end, 2), sieve_segment(start, end, odd_primes))
+
+
+def count_block(block):
+    # Worker: number of odd primes in [lo, hi)
+    lo, hi, segment_bytes = block
+    odd_primes = base_primes(isqrt(max(hi - 1, 0)))
+    return sum(sieve_segment(start, end, odd_primes).count(1)
+               for start, end in segments(lo, hi, segment_bytes))
+
+
+def count_primes(lo, hi, workers=1, segment_bytes=SEGMENT_BYTES):
+    # Number of primes in [lo, hi); workers > 1 sieves blocks of segments in parallel
+    total = 1 if lo <= 2 < hi else 0
+    if workers <= 1:
+        return total + count_block((lo, hi, segment_bytes))
+    # A few blocks per worker, each a whole number of segments, to even out the load
+    per_block = max(2 * segment_bytes, (hi - lo) // (workers * 4) // (2 * segment_bytes) * 2 * segment_bytes)
+    blocks = [(start, min(start + per_block, hi), segment_bytes) for start in range(lo, hi, per_block)]
+    with Pool(workers) as pool:
+        return total + sum(pool.imap_unordered(count_block, blocks))
+
+
+def is_prime_trial(n):
+    # The original divisor count, kept for the benchmark
+    count = 0
+    for i in range(1, n + 1):
+        if n % i == 0:
+            count += 1
+    return count == 2
+
+
+def bench(max_exp=9, workers=None):
+    workers = workers or os.cpu_count() or 1
+
+    def timed(fn):
+        start = time.perf_counter()
+        out = fn()
+        return out, time.perf_counter() - start
+
+    n = 2000
+    old, t_old = timed(lambda: [i for i in range(1, n + 1) if is_prime_trial(i)])
+    new, t_new = timed(lambda: list(primes_in_range(1, n + 1)))
+    print(f"primes up to {n}: divisor count {t_old:.3f}s, sieve {t_new:.5f}s, same: {old == new}")
+
+    print(f"{'n':>12} {'primes':>11} {'count':>9} {'list':>9} {f'{workers} procs' if workers > 1 else 'parallel':>9}")
+    for exp in range(6, max_exp + 1):
+        n = 10 ** exp
+        count, t_count = timed(lambda: count_primes(0, n))
+        listed = "-"
+        if exp <= 8:
+            primes, t_list = timed(lambda: sum(1 for _ in primes_in_range(0, n)))
+            assert primes == count
+            listed = f"{t_list:8.2f}s"
+        par = "-"
+        if workers > 1:
+            same, t_par = timed(lambda: count_primes(0, n, workers))
+            assert same == count
+            par = f"{t_par:8.2f}s"
+        print(f"{n:>12} {count:>11} {t_count:8.2f}s {listed:>9} {par:>9}")
+
+    big = [2 ** 61 - 1, 2 ** 64 - 59, 2 ** 64 - 1, 3825123056546413051]
+    results, t_mr = timed(lambda: [is_prime(x) for x in big])
+    print(f"Miller-Rabin on {big}: {results} in {t_mr * 1e6:.0f}us")
+
+
+if __name__ == "__main__":
+    if "--bench" in sys.argv:
+        args = sys.argv[sys.argv.index("--bench") + 1:]
+        bench(int(args[0]) if args else 9)
+        sys.exit()
+
+    num = int(input("Enter the number:"))
+    if is_prime(num):
+        print("The Entered number is Prime")
     else:
-        continue
\ No newline at end of file
+        print("The entered number is not prime")
+
+    print("|---The list of prime number up to entered number---|")
+    for p in primes_in_range(1, num + 1):
+        print(p, end=" ")
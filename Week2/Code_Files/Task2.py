@@ -1,31 +1,189 @@
-# iterative approach
-print("|Iterative Approach|")
-def iterative_approach(n):
-    a,b=0,1
-    fibonacci_series=[]
-    for i in range(n):
-        fibonacci_series.append(a)
-        a,b=b,a+b
+# Fibonacci numbers
+# - fib(n, mod): fast doubling, O(log n) big-int multiplications; with a modulus
+#   every step is reduced mod m, so each step is a few small-int operations
+# - fib_matrix(n, mod): the same by 2x2 matrix powers, for comparison
+# - fib_sequence(start, stop, mod): lazy generator, one addition per term
+# - fib_cached(n): fib() behind an LRU-bounded memo, for repeated queries
+# - fib_batch(indices, mod): many indices at once; close indices share work
+# - pisano(mod): period of F mod m, in O(m) steps. F(n) mod m == F(n % period)
+#   mod m, but fast doubling needs only log2(n) steps anyway, so fib() does not
+#   reduce n; callers asking for one m over and over can
+#
+# Usage:
+#   python Task2.py           asks for n, as before
+#   python Task2.py --bench   compares the modes up to n = 10^6
+import sys
+import time
+import random
+from functools import lru_cache
+from itertools import islice
+
+FIB_CACHE_SIZE = 1024     # entries kept by fib_cached
+PISANO_CACHE_SIZE = 128   # periods kept by pisano
+BATCH_STEP_MAX = 256      # fib_batch walks forward up to this gap, and jumps beyond it
+
+
+def fib_pair(n, mod=None):
+    # (F(n), F(n+1)) by fast doubling over the bits of n:
+    # F(2k) = F(k) * (2F(k+1) - F(k)),  F(2k+1) = F(k)^2 + F(k+1)^2
+    if n < 0:
+        raise ValueError("n must be >= 0")
+    a, b = 0, 1
+    for bit in bin(n)[2:]:
+        c = a * (2 * b - a)
+        d = a * a + b * b
+        if mod:
+            c, d = c % mod, d % mod
+        a, b = (d, c + d) if bit == "1" else (c, d)
+        if mod:
+            b %= mod
+    return a, b
+
+
+@lru_cache(maxsize=PISANO_CACHE_SIZE)
+def pisano(mod):
+    # Period of F(n) mod m: the first return to (0, 1)
+    if mod == 1:
+        return 1
+    a, b = 0, 1
+    for i in range(1, 6 * mod + 1):
+        a, b = b, (a + b) % mod
+        if a == 0 and b == 1:
+            return i
+    raise ArithmeticError(f"no Pisano period found for {mod}")
+
 
-    return fibonacci_series
+def fib(n, mod=None):
+    return fib_pair(n, mod)[0]
 
-n=int(input("Enter the number:"))
-print(iterative_approach(n))
 
+def fib_matrix(n, mod=None):
+    # [[1,1],[1,0]]^n = [[F(n+1), F(n)], [F(n), F(n-1)]]; the matrix is symmetric,
+    # so (F(n+1), F(n), F(n-1)) is enough to carry around
+    if n < 0:
+        raise ValueError("n must be >= 0")
+    def mul(x, y):
+        a, b, c = x
+        d, e, f = y
+        r = (a * d + b * e, a * e + b * f, b * e + c * f)
+        return tuple(v % mod for v in r) if mod else r
+    result, base = (1, 0, 1), (1, 1, 0)
+    while n:
+        if n & 1:
+            result = mul(result, base)
+        base = mul(base, base)
+        n >>= 1
+    return result[1] % mod if mod else result[1]
 
 
+def fib_sequence(start=0, stop=None, mod=None):
+    # Yields F(start), F(start+1), ... up to F(stop - 1) (forever if stop is None)
+    a, b = fib_pair(start, mod)
+    n = start
+    while stop is None or n < stop:
+        yield a
+        a, b = b, (a + b) % mod if mod else a + b
+        n += 1
+
+
+fib_cached = lru_cache(maxsize=FIB_CACHE_SIZE)(fib)
+
+
+def fib_batch(indices, mod=None):
+    # {n: F(n)} for every n in indices. Sorted, each index continues from the
+    # previous one by additions when the gap is small, and by fast doubling otherwise.
+    wanted = sorted(set(indices))
+    out = {}
+    n, a, b = None, 0, 0
+    for k in wanted:
+        if n is not None and k - n <= BATCH_STEP_MAX:
+            for _ in range(k - n):
+                a, b = b, (a + b) % mod if mod else a + b
+        else:
+            a, b = fib_pair(k, mod)
+        n = k
+        out[k] = a
+    return out
+
+
+def iterative_approach(n):
+    return list(islice(fib_sequence(), n))
 
 
-#recursive approach
-print("|Recursive Approach|")
 def recursive(n):
-    if n<=1:
+    # The original exponential recursion, kept for the benchmark
+    if n <= 1:
         return n
+    return recursive(n - 1) + recursive(n - 2)
+
+
+def iterative_loop(n):
+    # The original loop, without building the list
+    a, b = 0, 1
+    for _ in range(n):
+        a, b = b, a + b
+    return a
+
+
+def bench():
+    def timed(fn):
+        start = time.perf_counter()
+        out = fn()
+        return out, time.perf_counter() - start
+
+    n = 25
+    slow, t_slow = timed(lambda: [recursive(i) for i in range(n)])
+    fast, t_fast = timed(lambda: list(fib_sequence(0, n)))
+    print(f"F(0..{n - 1}): recursive {t_slow:.3f}s, generator {t_fast * 1e6:.0f}us, same: {slow == fast}")
+
+    print(f"\n{'n':>9} {'loop':>9} {'matrix':>9} {'doubling':>9}  digits")
+    for n in (10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6):
+        loop, t_loop = timed(lambda: iterative_loop(n))
+        matrix, t_matrix = timed(lambda: fib_matrix(n))
+        doubling, t_doubling = timed(lambda: fib(n))
+        assert loop == matrix == doubling
+        # str() of a 200k-digit int is slow in itself; bit_length is an exact enough size
+        digits = int(doubling.bit_length() * 0.30103) + 1
+        print(f"{n:>9} {t_loop:8.4f}s {t_matrix:8.4f}s {t_doubling:8.4f}s  ~{digits}")
+
+    mod = 10 ** 9 + 7
+    for n in (10 ** 6, 10 ** 18, 10 ** 100):
+        (plain, t_plain), (matrix, t_matrix) = timed(lambda: fib_pair(n, mod)[0]), timed(lambda: fib_matrix(n, mod))
+        assert plain == matrix
+        print(f"F(10^{len(str(n)) - 1}) mod 1e9+7: doubling {t_plain * 1e6:.0f}us, matrix {t_matrix * 1e6:.0f}us")
+    small = 1000
+    plain, t_plain = timed(lambda: fib(10 ** 100, small))
+    period, t_period = timed(lambda: pisano(small))
+    reduced, t_reduced = timed(lambda: fib(10 ** 100 % period, small))
+    assert plain == reduced
+    print(f"F(10^100) mod {small}: doubling {t_plain * 1e6:.0f}us; Pisano period {period} "
+          f"found in {t_period * 1e3:.2f}ms, then {t_reduced * 1e6:.0f}us")
+
+    rng = random.Random(0)
+    indices = [rng.randrange(10 ** 5) for _ in range(2000)]
+    single, t_single = timed(lambda: {k: fib(k) for k in indices})
+    batch, t_batch = timed(lambda: fib_batch(indices))
+    assert single == batch
+    print(f"\n{len(indices)} indices below 10^5: one by one {t_single:.3f}s, batch {t_batch:.3f}s")
+
+    queries = [rng.choice(indices[:100]) for _ in range(2000)]
+    fib_cached.cache_clear()
+    _, t_uncached = timed(lambda: [fib(k) for k in queries])
+    _, t_cached = timed(lambda: [fib_cached(k) for k in queries])
+    print(f"{len(queries)} repeated queries (100 distinct): fib {t_uncached:.3f}s, "
+          f"fib_cached {t_cached:.4f}s  {fib_cached.cache_info()}")
+
+
+if __name__ == "__main__":
+    if "--bench" in sys.argv:
+        bench()
+        sys.exit()
 
-    else:
-        return recursive(n-1)+recursive(n-2)
-    
+    print("|Iterative Approach|")
+    n = int(input("Enter the number:"))
+    print(iterative_approach(n))
 
-n=int(input("Enter the number:"))
-for i in range(n):
-    print(recursive(i),end=" ")
\ No newline at end of file
+    print("|Recursive Approach|")
+    n = int(input("Enter the number:"))
+    for value in fib_sequence(0, n):
+        print(value, end=" ")
@@ -1,16 +1,116 @@
-def compute_gcd(a,b):
-    def gcd(x,y):
-        while y!=0:
-            x,y=y,x%y
-        return x
-    gcd_res=gcd(a,b)
-    lcm_res=(a*b)//   gcd_res
-    return gcd_res,lcm_res
-
-
-n1=int(input("Enter the first number:"))
-n2=int(input("Enter the second number:"))
-
-gcd,lcm=compute_gcd(n1,n2)
-print(f" Greatest Common Divisor(GCD) is {gcd} ")
-print(f" Least Common Multiple (LCM) is {lcm} ")
\ No newline at end of file
+# GCD and LCM
+# - compute_gcd(a, b): one pair, as before
+# - gcd_pairs / lcm_pairs: element-wise over NumPy int64 arrays (np.gcd / np.lcm),
+#   with LCM overflow detected instead of silently wrapping
+# - gcd_many / lcm_many: one GCD / LCM of a whole array
+#
+# Usage:
+#   python Task3.py                 asks for two numbers, as before
+#   python Task3.py --bench [N]     pure-Python loop vs NumPy on N pairs (default 10^6)
+import sys
+import time
+from math import gcd as int_gcd, lcm as int_lcm
+
+import numpy as np
+
+INT64_MAX = np.iinfo(np.int64).max
+
+
+def compute_gcd(a, b):
+    gcd_res = int_gcd(a, b)
+    lcm_res = abs(a // gcd_res * b) if gcd_res else 0
+    return gcd_res, lcm_res
+
+
+def euclid_gcd(x, y):
+    # The original pure-Python loop, kept for the benchmark
+    while y != 0:
+        x, y = y, x % y
+    return x
+
+
+def as_int64(values):
+    # An empty list comes back as float64; with no values there is nothing to reject
+    arr = np.asarray(values)
+    if not arr.size:
+        return arr.astype(np.int64)
+    if arr.dtype.kind not in "iu":
+        raise TypeError(f"expected integers, got {arr.dtype}")
+    return arr.astype(np.int64, copy=False)
+
+
+def gcd_pairs(a, b):
+    return np.gcd(as_int64(a), as_int64(b))
+
+
+def lcm_pairs(a, b):
+    # lcm = |a / gcd * b|; checked against int64 before multiplying
+    a, b = np.abs(as_int64(a)), np.abs(as_int64(b))
+    g = np.gcd(a, b)
+    q = np.floor_divide(a, g, out=np.zeros_like(a), where=g != 0)
+    if np.any((b != 0) & (q > INT64_MAX // np.maximum(b, 1))):
+        raise OverflowError("LCM does not fit in int64")
+    return q * b
+
+
+def gcd_many(values):
+    arr = as_int64(values)
+    return int(np.gcd.reduce(arr)) if arr.size else 0
+
+
+def lcm_many(values):
+    # Pairwise tree of lcm_pairs: log2(n) vectorized rounds. Exact Python ints
+    # (math.lcm) take over once the result no longer fits in int64.
+    arr = np.abs(as_int64(values)).ravel()
+    if not arr.size:
+        return 1
+    try:
+        while arr.size > 1:
+            if arr.size % 2:
+                arr = np.append(arr, 1)
+            arr = lcm_pairs(arr[0::2], arr[1::2])
+    except OverflowError:
+        return int_lcm(*arr.tolist())
+    return int(arr[0])
+
+
+def bench(n=10 ** 6):
+    def timed(fn):
+        start = time.perf_counter()
+        out = fn()
+        return out, time.perf_counter() - start
+
+    rng = np.random.default_rng(0)
+    a = rng.integers(1, 10 ** 9, n)
+    b = rng.integers(1, 10 ** 9, n)
+    pairs = list(zip(a.tolist(), b.tolist()))
+    euclid, t_euclid = timed(lambda: [euclid_gcd(x, y) for x, y in pairs])
+    loop, t_loop = timed(lambda: [compute_gcd(x, y) for x, y in pairs])
+    (g, l), t_np = timed(lambda: (gcd_pairs(a, b), lcm_pairs(a, b)))
+    same = euclid == [x for x, _ in loop] == g.tolist() and [y for _, y in loop] == l.tolist()
+    print(f"{n} pairs: Euclid loop (GCD only) {t_euclid:.3f}s, compute_gcd loop {t_loop:.3f}s, "
+          f"numpy GCD + LCM {t_np:.3f}s ({t_euclid / t_np:.1f}x), same: {same}")
+
+    values = (rng.integers(1, 10 ** 6, n) * 840).tolist()
+    ref, t_ref = timed(lambda: int_gcd(*values))
+    got, t_got = timed(lambda: gcd_many(values))
+    print(f"GCD of {n} values: math.gcd {t_ref:.3f}s, gcd_many {t_got:.3f}s, result {got} (same: {ref == got})")
+
+    small = rng.integers(1, 40, 10 ** 5)
+    ref, t_ref = timed(lambda: int_lcm(*small.tolist()))
+    got, t_got = timed(lambda: lcm_many(small))
+    print(f"LCM of {small.size} values below 40: math.lcm {t_ref:.4f}s, lcm_many {t_got:.4f}s, same: {ref == got}")
+
+
+if __name__ == "__main__":
+    if "--bench" in sys.argv:
+        args = sys.argv[sys.argv.index("--bench") + 1:]
+        bench(int(args[0]) if args else 10 ** 6)
+        sys.exit()
+
+    n1 = int(input("Enter the first number:"))
+    n2 = int(input("Enter the second number:"))
+
+    gcd, lcm = compute_gcd(n1, n2)
+    print(f" Greatest Common Divisor(GCD) is {gcd} ")
+    print(f" Least Common Multiple (LCM) is {lcm} ")
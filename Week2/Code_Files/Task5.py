@@ -1,10 +1,220 @@
+# Maximum subarray
+# - max_subarray(values): Kadane's scan over any iterable, one pass, returns
+#   (best sum, start, end) with end inclusive
+# - max_subarray_chunked(values, chunk): NumPy scan of a fixed grid of chunks;
+#   takes arrays, memory-mapped arrays or iterators
+# - max_subarray_parallel(source, workers, chunk): the same chunks summarized on
+#   a process pool (source: .npy path) or threads (in-memory array)
+# - max_subrectangle(matrix): maximum-sum 2-D subrectangle
+#
+# A chunk is reduced to a Summary: (total, best prefix, best suffix, best), each
+# with its indices. Summaries merge left to right, so the chunked and parallel
+# modes do the same float additions in the same order and agree bit for bit,
+# whatever the worker count. Ties go to the earliest end, then the earliest start.
+#
+# Usage:
+#   python Task5.py                 the example array, as before
+#   python Task5.py --bench [N]     N float64 values (default 10^7)
+import os
+import sys
+import time
+import tempfile
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import islice
+
+import numpy as np
+
+CHUNK = 1 << 20       # values per chunk: 8 MB of float64
+
+Result = namedtuple("Result", ["best", "start", "end"])
+Summary = namedtuple("Summary", ["total", "prefix", "prefix_end", "suffix", "suffix_start",
+                                 "best", "best_start", "best_end"])
+
+
+def max_subarray(values):
+    best = start = end = None
+    cur, cur_start = 0, 0
+    for i, x in enumerate(values):
+        if i == 0 or cur < 0:
+            cur, cur_start = x, i
+        else:
+            cur += x
+        if best is None or cur > best:
+            best, start, end = cur, cur_start, i
+    if best is None:
+        raise ValueError("max_subarray() of an empty sequence")
+    return Result(best, start, end)
+
+
 def max_subarray_sum(arr):
-    max_cuurent=max_global=arr[0]
-    for i in range(1,len(arr)):
-        max_cuurent=max(arr[i],max_cuurent+arr[i])
-        max_global=max(max_global,max_cuurent)
+    return max_subarray(arr).best
+
+
+def summarize(chunk, offset=0):
+    # Summary of one non-empty chunk whose first value sits at index offset
+    p = np.cumsum(chunk)
+    before = np.empty_like(p)             # prefix sum before each index
+    before[0] = 0
+    before[1:] = p[:-1]
+    total = p[-1]
+    prefix_end = int(np.argmax(p))
+    suffix_start = int(np.argmin(before))
+    lowest = np.minimum.accumulate(before)
+    ending = p - lowest                   # best sum of a subarray ending at each index
+    best_end = int(np.argmax(ending))
+    best_start = int(np.argmax(before[:best_end + 1] == lowest[best_end]))
+    return Summary(total.item(), p[prefix_end].item(), offset + prefix_end,
+                   (total - before[suffix_start]).item(), offset + suffix_start,
+                   ending[best_end].item(), offset + best_start, offset + best_end)
+
+
+def merge(left, right):
+    # Summary of left followed by right; on ties the left/earlier candidate wins
+    prefix = left.total + right.prefix
+    if left.prefix >= prefix:
+        prefix, prefix_end = left.prefix, left.prefix_end
+    else:
+        prefix_end = right.prefix_end
+    suffix = left.suffix + right.total
+    if suffix >= right.suffix:
+        suffix_start = left.suffix_start
+    else:
+        suffix, suffix_start = right.suffix, right.suffix_start
+    best, best_start, best_end = left.best, left.best_start, left.best_end
+    crossing = left.suffix + right.prefix
+    if crossing > best:
+        best, best_start, best_end = crossing, left.suffix_start, right.prefix_end
+    if right.best > best or (right.best == best and right.best_end < best_end):
+        best, best_start, best_end = right.best, right.best_start, right.best_end
+    return Summary(left.total + right.total, prefix, prefix_end, suffix, suffix_start,
+                   best, best_start, best_end)
+
+
+def fold(summaries):
+    total = None
+    for s in summaries:
+        total = s if total is None else merge(total, s)
+    if total is None:
+        raise ValueError("max_subarray() of an empty sequence")
+    return Result(total.best, total.best_start, total.best_end)
+
+
+def iter_chunks(values, chunk=CHUNK, dtype=np.float64):
+    # (offset, array) pieces of an array, memmap or iterator
+    if isinstance(values, np.ndarray):
+        for offset in range(0, len(values), chunk):
+            yield offset, values[offset:offset + chunk]
+        return
+    it, offset = iter(values), 0
+    while True:
+        piece = np.fromiter(islice(it, chunk), dtype=dtype)
+        if not piece.size:
+            return
+        yield offset, piece
+        offset += piece.size
+
+
+def max_subarray_chunked(values, chunk=CHUNK, dtype=np.float64):
+    return fold(summarize(piece, offset) for offset, piece in iter_chunks(values, chunk, dtype))
+
+
+def summarize_file_range(job):
+    # Worker: summaries of chunks [first, last) of a .npy file, memory-mapped
+    path, first, last, chunk = job
+    data = np.load(path, mmap_mode="r")
+    return [summarize(data[i * chunk:(i + 1) * chunk], i * chunk) for i in range(first, last)]
+
+
+def max_subarray_parallel(source, workers=None, chunk=CHUNK):
+    # source: path of a 1-D .npy file (process pool, each worker maps the file)
+    # or an array (thread pool; NumPy releases the GIL in the heavy loops)
+    workers = workers or os.cpu_count() or 1
+    n = len(np.load(source, mmap_mode="r")) if isinstance(source, str) else len(source)
+    n_chunks = -(-n // chunk)
+    if isinstance(source, str):
+        per_job = max(1, -(-n_chunks // (workers * 4)))
+        jobs = [(source, first, min(first + per_job, n_chunks), chunk) for first in range(0, n_chunks, per_job)]
+        with ProcessPoolExecutor(workers) as pool:
+            return fold(s for batch in pool.map(summarize_file_range, jobs) for s in batch)
+    with ThreadPoolExecutor(workers) as pool:
+        return fold(pool.map(lambda i: summarize(source[i * chunk:(i + 1) * chunk], i * chunk), range(n_chunks)))
+
+
+def max_subrectangle(matrix):
+    # Best-sum subrectangle: for every pair of rows (top, bottom), a 1-D scan of
+    # the column sums between them. Rows are the shorter side, so O(min^2 * max).
+    # Returns (best, (top, left), (bottom, right)), corners inclusive.
+    m = np.asarray(matrix)
+    if m.ndim != 2 or not m.size:
+        raise ValueError("max_subrectangle() needs a non-empty 2-D matrix")
+    flipped = m.shape[0] > m.shape[1]
+    if flipped:
+        m = m.T
+    best = None
+    for top in range(m.shape[0]):
+        cols = np.zeros(m.shape[1], dtype=m.dtype)
+        for bottom in range(top, m.shape[0]):
+            cols += m[bottom]
+            s = summarize(cols)
+            if best is None or s.best > best[0]:
+                best = (s.best, top, bottom, s.best_start, s.best_end)
+    value, top, bottom, left, right = best
+    if flipped:
+        top, bottom, left, right = left, right, top, bottom
+    return value, (top, left), (bottom, right)
+
+
+def bench(n=10 ** 7, workers=None):
+    workers = workers or os.cpu_count() or 1
+
+    def timed(fn):
+        start = time.perf_counter()
+        out = fn()
+        return out, time.perf_counter() - start
+
+    rng = np.random.default_rng(0)
+    values = rng.normal(0, 1, n)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "series.npy")
+        np.save(path, values)
+        mapped = np.load(path, mmap_mode="r")
+
+        as_list = values.tolist()
+        kadane, t_kadane = timed(lambda: max_subarray(as_list))
+        print(f"{n} float64 values")
+        print(f"{'Kadane, Python list':<32} {t_kadane:7.2f}s  {kadane}")
+        chunked, t_chunked = timed(lambda: max_subarray_chunked(values))
+        print(f"{'chunked, in memory':<32} {t_chunked:7.2f}s  {chunked}")
+        mapped_result, t_mapped = timed(lambda: max_subarray_chunked(mapped))
+        print(f"{'chunked, memory-mapped':<32} {t_mapped:7.2f}s  same: {mapped_result == chunked}")
+        streamed, t_streamed = timed(lambda: max_subarray_chunked(iter(as_list)))
+        print(f"{'chunked, from an iterator':<32} {t_streamed:7.2f}s  same: {streamed == chunked}")
+        for w in sorted({1, workers}):
+            result, t_par = timed(lambda: max_subarray_parallel(path, w))
+            print(f"{f'parallel, {w} process(es)':<32} {t_par:7.2f}s  same: {result == chunked}")
+        # Kadane's running sum rounds differently from the chunk prefix sums
+        print(f"Kadane vs chunked: same range {kadane[1:] == chunked[1:]}, "
+              f"sums differ by {abs(kadane.best - chunked.best):.2e}")
+        del mapped
+
+    ints = rng.integers(-100, 100, 10 ** 6)
+    exact = max_subarray(ints.tolist())
+    print(f"10^6 ints: Kadane {exact}, chunked (64K) identical: "
+          f"{max_subarray_chunked(ints, 1 << 16) == exact}")
+
+    grid = rng.integers(-10, 10, (200, 300))
+    rect, t_rect = timed(lambda: max_subrectangle(grid))
+    (top, left), (bottom, right) = rect[1], rect[2]
+    print(f"200x300 subrectangle: {rect} in {t_rect:.2f}s, "
+          f"check: {grid[top:bottom + 1, left:right + 1].sum() == rect[0]}")
+
 
-    return max_global
+if __name__ == "__main__":
+    if "--bench" in sys.argv:
+        args = sys.argv[sys.argv.index("--bench") + 1:]
+        bench(int(args[0]) if args else 10 ** 7)
+        sys.exit()
 
-arr=[-2, 1, -3, 4, -1, 2, 1, -5, 4]
-print(f"Max Subarray Sum is : {max_subarray_sum(arr)}")
\ No newline at end of file
+    arr = [-2, 1, -3, 4, -1, 2, 1, -5, 4]
+    print(f"Max Subarray Sum is : {max_subarray_sum(arr)}")
@@ -1,15 +1,208 @@
-def prime_factors(n):
-    i=2
-    factors=[]
-    while i*i <=n:
-        while n%i==0:
-            factors.append(i)
-            n //=i
-        i +=1
+# Prime factorization
+# - prime_factors(n): one integer, as before; trial division by 2 and odd numbers,
+#   Pollard's rho once n is too big for that
+# - spf_table(limit): smallest-prime-factor sieve; any n below limit then
+#   factors in O(log n) table lookups
+# - factor_array(values, spf): every value below the table bound at once, as
+#   NumPy (offsets, primes) arrays
+# - factor_many(values, workers): lists of factors for a mixed batch; values
+#   past the table go to Pollard's rho, on a process pool when workers > 1
+#
+# Usage:
+#   python task4.py                 factors 60, as before
+#   python task4.py --bench [N]     N values (default 10^6)
+import os
+import sys
+import time
+import random
+from math import gcd, isqrt
+from multiprocessing import Pool
+
+import numpy as np
+
+from Task1 import is_prime
 
-    if n>1:
+TRIAL_LIMIT = 10 ** 12      # prime_factors uses plain trial division below this
+SPF_LIMIT = 10 ** 7         # default table bound for factor_many (40 MB of int32)
+POOL_MIN_LARGE = 64         # fewer Pollard values than this are not worth a pool
+
+
+def trial_factors(n):
+    if n < 2:
+        return []
+    factors = []
+    while n % 2 == 0:
+        factors.append(2)
+        n //= 2
+    i = 3
+    while i * i <= n:
+        while n % i == 0:
+            factors.append(i)
+            n //= i
+        i += 2
+    if n > 1:
         factors.append(n)
-    return factors 
+    return factors
+
+
+def pollard_rho(n):
+    # A non-trivial factor of the odd composite n (Brent's variant, batched gcds)
+    if n % 2 == 0:
+        return 2
+    rng = random.Random(n)
+    while True:
+        y, c, m = rng.randrange(1, n), rng.randrange(1, n), 128
+        g, r, q = 1, 1, 1
+        while g == 1:
+            x = y
+            for _ in range(r):
+                y = (y * y + c) % n
+            k = 0
+            while k < r and g == 1:
+                ys = y
+                for _ in range(min(m, r - k)):
+                    y = (y * y + c) % n
+                    q = q * abs(x - y) % n
+                g = gcd(q, n)
+                k += m
+            r *= 2
+        if g == n:
+            g = 1
+            while g == 1:
+                ys = (ys * ys + c) % n
+                g = gcd(abs(x - ys), n)
+        if g != n:
+            return g
+
+
+def rho_factors(n):
+    # Prime factors of n by Miller-Rabin + Pollard's rho, sorted
+    if n < 2:
+        return []
+    small = []
+    for p in (2, 3, 5, 7, 11, 13):
+        while n % p == 0:
+            small.append(p)
+            n //= p
+    stack, factors = [n] if n > 1 else [], []
+    while stack:
+        m = stack.pop()
+        if is_prime(m):
+            factors.append(m)
+        else:
+            d = pollard_rho(m)
+            stack += [d, m // d]
+    return small + sorted(factors)
+
+
+def prime_factors(n):
+    return trial_factors(n) if n < TRIAL_LIMIT else rho_factors(n)
+
+
+def spf_table(limit):
+    # spf[n] = smallest prime factor of n, for 2 <= n < limit (int32)
+    spf = np.zeros(limit, dtype=np.int32)
+    spf[2::2] = 2
+    for p in range(3, isqrt(limit - 1) + 1, 2):
+        if spf[p] == 0:
+            multiples = spf[p * p::2 * p]
+            multiples[multiples == 0] = p      # a view: writes into spf
+    unset = np.flatnonzero(spf == 0)
+    spf[unset] = unset                         # what is left is prime
+    return spf
+
+
+def factor_array(values, spf):
+    # Factor every value (2 <= v < len(spf)) by repeated table lookups, one
+    # vectorized round per prime factor. Returns (offsets, primes): the factors
+    # of values[i] are primes[offsets[i]:offsets[i + 1]], smallest first.
+    rest = np.asarray(values, dtype=np.int64).copy()
+    if rest.size and (rest.min() < 1 or rest.max() >= len(spf)):
+        raise ValueError(f"values must be in [1, {len(spf)})")
+    index = np.arange(rest.size)
+    owners, primes = [], []
+    while index.size:
+        active = rest[index] > 1
+        index = index[active]
+        p = spf[rest[index]]
+        owners.append(index)
+        primes.append(p)
+        rest[index] //= p
+    owners = np.concatenate(owners) if owners else np.empty(0, dtype=np.intp)
+    primes = np.concatenate(primes) if primes else np.empty(0, dtype=np.int32)
+    order = np.argsort(owners, kind="stable")  # rounds yield each value's factors in order
+    offsets = np.zeros(rest.size + 1, dtype=np.int64)
+    np.cumsum(np.bincount(owners, minlength=rest.size), out=offsets[1:])
+    return offsets, primes[order]
+
+
+def factor_many(values, spf=None, workers=1):
+    # [prime_factors(v) for v in values], using the table for values below its bound
+    values = [int(v) for v in values]
+    if spf is None:
+        bound = min(max(values, default=2) + 1, SPF_LIMIT)
+        spf = spf_table(max(bound, 2))
+    out = [None] * len(values)
+    small = [i for i, v in enumerate(values) if 1 <= v < len(spf)]
+    if small:
+        offsets, primes = factor_array([values[i] for i in small], spf)
+        primes = primes.tolist()
+        for k, i in enumerate(small):
+            out[i] = primes[offsets[k]:offsets[k + 1]]
+    large = [i for i, v in enumerate(values) if not 1 <= v < len(spf)]
+    if workers > 1 and len(large) >= POOL_MIN_LARGE:
+        with Pool(workers) as pool:
+            results = pool.map(rho_factors, [values[i] for i in large], chunksize=16)
+    else:
+        results = [rho_factors(values[i]) for i in large]
+    for i, factors in zip(large, results):
+        out[i] = factors
+    return out
+
+
+def bench(n=10 ** 6, workers=None):
+    workers = workers or os.cpu_count() or 1
+
+    def timed(fn):
+        start = time.perf_counter()
+        out = fn()
+        return out, time.perf_counter() - start
+
+    rng = np.random.default_rng(0)
+    values = rng.integers(2, SPF_LIMIT, n)
+    spf, t_table = timed(lambda: spf_table(SPF_LIMIT))
+    print(f"spf_table({SPF_LIMIT}): {t_table:.2f}s, {spf.nbytes / 1e6:.0f} MB")
+
+    sample = values[:10 ** 4].tolist()
+    old, t_old = timed(lambda: [trial_factors(v) for v in sample])
+    print(f"trial division, {len(sample)} values: {t_old:.2f}s "
+          f"(~{t_old * n / len(sample):.0f}s for {n})")
+    (offsets, primes), t_array = timed(lambda: factor_array(values, spf))
+    print(f"factor_array, {n} values: {t_array:.2f}s, {primes.size} prime factors")
+    lists, t_lists = timed(lambda: factor_many(values, spf))
+    print(f"factor_many (lists), {n} values: {t_lists:.2f}s, same as trial division: {lists[:len(sample)] == old}")
+
+    py = random.Random(0)
+    big = []
+    while len(big) < 200:
+        p, q = py.getrandbits(31) | 1, py.getrandbits(31) | 1
+        if is_prime(p) and is_prime(q):
+            big.append(p * q)
+    serial, t_serial = timed(lambda: factor_many(big, spf))
+    line = f"Pollard's rho, {len(big)} 62-bit semiprimes: {t_serial:.2f}s"
+    if workers > 1:
+        parallel, t_parallel = timed(lambda: factor_many(big, spf, workers))
+        assert parallel == serial
+        line += f", {workers} processes {t_parallel:.2f}s"
+    print(line)
+    assert all(a * b == v for (a, b), v in zip(serial, big))
+
+
+if __name__ == "__main__":
+    if "--bench" in sys.argv:
+        args = sys.argv[sys.argv.index("--bench") + 1:]
+        bench(int(args[0]) if args else 10 ** 6)
+        sys.exit()
 
-n=60
-print(f"Factors of {n} is {prime_factors(n)}")
\ No newline at end of file
+    n = 60
+    print(f"Factors of {n} is {prime_factors(n)}")
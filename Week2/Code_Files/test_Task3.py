@@ -0,0 +1,20 @@
+import numpy as np
+import pytest
+
+import Task3
+
+
+def test_empty_input_gives_the_identity():
+    assert Task3.gcd_many([]) == 0
+    assert Task3.lcm_many([]) == 1
+    assert Task3.gcd_many(np.array([], dtype=np.int32)) == 0
+    assert Task3.lcm_many(np.array([], dtype=np.int32)) == 1
+    assert Task3.gcd_pairs([], []).dtype == np.int64
+    assert Task3.lcm_pairs([], []).size == 0
+
+
+def test_non_integers_are_still_rejected():
+    with pytest.raises(TypeError):
+        Task3.gcd_many([1.5, 3.0])
+    with pytest.raises(TypeError):
+        Task3.lcm_many([2.0])
@@ -1,35 +1,291 @@
-def merge_sort(arr):
-    if len(arr)>1:
-        mid=len(arr)//2
-        left_half=arr[:mid]
-        right_half=arr[mid:]
-
-        merge_sort(left_half)
-        merge_sort(right_half)
-        i=j=k=0
-
-        while i<len(left_half) and j<len(right_half):
-            if left_half[i]<right_half[j]:
-                arr[k]=left_half[i]
-                i+=1
+# Merge sort
+# - merge_sort(arr, key, reverse): stable, in place. Natural runs (TimSort-like):
+#   ascending runs are kept, strictly descending ones reversed, short ones
+#   extended to MIN_RUN by binary insertion sort. Runs are then merged bottom-up,
+#   back and forth between arr and one auxiliary list of the same size, so no
+#   level of the merge allocates.
+# - external_sort(in_path, out_path, key): sorts a text file line by line when it
+#   does not fit in memory. Sorted runs are spilled to temp files and then
+#   k-way merged with a heap. Runs can be sorted on a process pool.
+#
+# Usage:
+#   python Task1.py                 the example list, as before
+#   python Task1.py --bench [N]     N values (default 10^6)
+import os
+import sys
+import time
+import heapq
+import random
+import tempfile
+import tracemalloc
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+
+MIN_RUN = 32                 # runs shorter than this are extended by insertion sort
+RUN_BYTES = 64 << 20         # input bytes per sorted run in external_sort
+MAX_MERGE_FILES = 64         # runs merged at once; more take extra merge passes
+
+
+# =============== In-memory sort ===============
+def extend_run(a, lo, run_end, hi):
+    # Binary insertion sort: a[lo:run_end] is sorted; insert a[run_end:hi] into it.
+    # bisect_right puts equal items after the ones already placed (stable).
+    for i in range(run_end, hi):
+        x = a[i]
+        pos = bisect_right(a, x, lo, i)
+        if pos < i:
+            a[pos + 1:i + 1] = a[pos:i]
+            a[pos] = x
+
+
+def find_runs(a):
+    # Boundaries [0, b1, b2, ..., n] of sorted runs, each at least MIN_RUN long
+    n = len(a)
+    bounds = [0]
+    lo = 0
+    while lo < n:
+        hi = lo + 1
+        if hi < n and a[hi] < a[lo]:
+            # Strictly descending: reversing keeps equal items in order
+            while hi < n and a[hi] < a[hi - 1]:
+                hi += 1
+            a[lo:hi] = a[lo:hi][::-1]
+        else:
+            while hi < n and not a[hi] < a[hi - 1]:
+                hi += 1
+        end = min(lo + MIN_RUN, n)
+        if hi < end:
+            extend_run(a, lo, hi, end)
+            hi = end
+        bounds.append(hi)
+        lo = hi
+    return bounds
+
+
+def copy_range(src, dst, lo, hi, to=None):
+    # src[lo:hi] into dst starting at `to` (default lo), item by item: slice
+    # assignment would build temporary lists as long as the range
+    k = lo if to is None else to
+    for i in range(lo, hi):
+        dst[k] = src[i]
+        k += 1
+
+
+def merge_into(src, dst, lo, mid, hi):
+    # Merge src[lo:mid] and src[mid:hi] into dst[lo:hi]; ties take the left item
+    if not src[mid] < src[mid - 1]:
+        copy_range(src, dst, lo, hi)   # already in order
+        return
+    i, j, k = lo, mid, lo
+    while i < mid and j < hi:
+        if src[j] < src[i]:
+            dst[k] = src[j]
+            j += 1
+        else:
+            dst[k] = src[i]
+            i += 1
+        k += 1
+    if i < mid:
+        copy_range(src, dst, i, mid, k)
+    else:
+        copy_range(src, dst, j, hi, k)
+
+
+def sort_in_place(a):
+    bounds = find_runs(a)
+    if len(bounds) <= 2:
+        return
+    src, dst = a, [None] * len(a)
+    while len(bounds) > 2:
+        merged = [0]
+        for r in range(0, len(bounds) - 1, 2):
+            lo, mid = bounds[r], bounds[r + 1]
+            if r + 2 < len(bounds):
+                hi = bounds[r + 2]
+                merge_into(src, dst, lo, mid, hi)
+            else:
+                hi = mid
+                copy_range(src, dst, lo, hi)    # odd run out: carried to the next pass
+            merged.append(hi)
+        bounds = merged
+        src, dst = dst, src
+    if src is not a:
+        copy_range(src, a, 0, len(a))
+
+
+def merge_sort(arr, key=None, reverse=False):
+    # Stable like list.sort: equal items keep their order, also with reverse=True
+    if reverse:
+        arr.reverse()
+    if key is None:
+        sort_in_place(arr)
+    else:
+        # Each key computed once; the index breaks ties, so items are never compared
+        decorated = [(key(x), i) for i, x in enumerate(arr)]
+        sort_in_place(decorated)
+        arr[:] = [arr[i] for _, i in decorated]
+    if reverse:
+        arr.reverse()
+
+
+def merge_sort_slicing(arr):
+    # The original version, kept for the benchmark: slices at every level
+    if len(arr) > 1:
+        mid = len(arr) // 2
+        left_half = arr[:mid]
+        right_half = arr[mid:]
+        merge_sort_slicing(left_half)
+        merge_sort_slicing(right_half)
+        i = j = k = 0
+        while i < len(left_half) and j < len(right_half):
+            if left_half[i] < right_half[j]:
+                arr[k] = left_half[i]
+                i += 1
             else:
-                arr[k]=right_half[j]
-                j+=1
-            k +=1
+                arr[k] = right_half[j]
+                j += 1
+            k += 1
+        while i < len(left_half):
+            arr[k] = left_half[i]
+            i += 1
+            k += 1
+        while j < len(right_half):
+            arr[k] = right_half[j]
+            j += 1
+            k += 1
+
+
+# =============== External sort (files larger than memory) ===============
+def split_ranges(path, run_bytes):
+    # (start, end) byte ranges of about run_bytes each, cut after a newline
+    size = os.path.getsize(path)
+    ranges, start = [], 0
+    with open(path, "rb") as f:
+        while start < size:
+            f.seek(min(start + run_bytes, size))
+            f.readline()
+            end = min(f.tell(), size)
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def sort_run(job):
+    # Worker: sort the lines of one byte range into a run file; returns its path.
+    # key must be picklable (a module-level function) when runs use a pool.
+    path, start, end, key, run_path = job
+    with open(path, "rb") as f:
+        f.seek(start)
+        lines = f.read(end - start).decode("utf-8").split("\n")
+    if lines and lines[-1] == "":
+        lines.pop()
+    merge_sort(lines, key=key)
+    with open(run_path, "w", encoding="utf-8", newline="\n") as out:
+        out.writelines(line + "\n" for line in lines)
+    return run_path
+
+
+def read_lines(f):
+    for line in f:
+        yield line[:-1] if line.endswith("\n") else line
+
+
+def merge_files(paths, out_path, key=None):
+    # k-way heap merge; heapq.merge takes ties from the earlier file first (stable)
+    with ExitStack() as stack:
+        files = [read_lines(stack.enter_context(open(p, encoding="utf-8", newline="\n"))) for p in paths]
+        with open(out_path, "w", encoding="utf-8", newline="\n") as out:
+            out.writelines(line + "\n" for line in heapq.merge(*files, key=key))
+
+
+def external_sort(in_path, out_path, key=None, run_bytes=RUN_BYTES, workers=1, tmp_dir=None):
+    # Sort the lines of in_path into out_path with about run_bytes of text in
+    # memory per run (per worker). Stable; lines compare without their newline.
+    with tempfile.TemporaryDirectory(dir=tmp_dir) as tmp:
+        jobs = [(in_path, start, end, key, os.path.join(tmp, f"run{i:06d}.txt"))
+                for i, (start, end) in enumerate(split_ranges(in_path, run_bytes))]
+        if workers > 1 and len(jobs) > 1:
+            with ProcessPoolExecutor(workers) as pool:
+                runs = list(pool.map(sort_run, jobs))
+        else:
+            runs = [sort_run(job) for job in jobs]
+        # Merge in groups of MAX_MERGE_FILES, keeping run order, until one is left
+        passes = 0
+        while len(runs) > MAX_MERGE_FILES:
+            merged = []
+            for g in range(0, len(runs), MAX_MERGE_FILES):
+                group_path = os.path.join(tmp, f"pass{passes}_{g:06d}.txt")
+                merge_files(runs[g:g + MAX_MERGE_FILES], group_path, key)
+                for p in runs[g:g + MAX_MERGE_FILES]:
+                    os.remove(p)
+                merged.append(group_path)
+            runs = merged
+            passes += 1
+        merge_files(runs, out_path, key)
+    return out_path
+
+
+# =============== Benchmark ===============
+def bench(n=10 ** 6, workers=None):
+    workers = workers or os.cpu_count() or 1
+
+    def timed(fn):
+        start = time.perf_counter()
+        out = fn()
+        return out, time.perf_counter() - start
+
+    def peak_alloc(fn):
+        tracemalloc.start()
+        try:
+            fn()
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    rng = random.Random(0)
+    data = [rng.random() for _ in range(n)]
+    expected = sorted(data)
+    sample = data[:min(n, 10 ** 5)]      # tracemalloc slows allocation-heavy code a lot
+    print(f"{n} floats (peak extra memory measured on {len(sample)})")
+    for label, fn in (("original (slices)", merge_sort_slicing), ("merge_sort", merge_sort), ("list.sort", list.sort)):
+        a = data[:]
+        _, t = timed(lambda: fn(a))
+        b = sample[:]
+        peak = peak_alloc(lambda: fn(b))
+        print(f"  {label:<20} {t:7.2f}s  peak extra memory {peak / 1e6:6.2f} MB  ok: {a == expected}")
+
+    # Eight sorted blocks back to back: natural runs find them, slicing does not
+    blocks = [x for part in range(8) for x in sorted(data[part::8])]
+    for label, fn in (("original (slices)", merge_sort_slicing), ("merge_sort", merge_sort)):
+        a = blocks[:]
+        _, t = timed(lambda: fn(a))
+        print(f"  8 presorted runs, {label:<20} {t:7.2f}s  ok: {a == expected}")
 
-        while i<len(left_half):
-            arr[k]=left_half[i]
-            i+=1
-            k+=1
-        while j<len(right_half):
-            arr[k]=right_half[j]
-            j+=1
-            k+=1
+    records = [(rng.randrange(100), i) for i in range(n)]
+    a = records[:]
+    _, t = timed(lambda: merge_sort(a, key=lambda r: r[0], reverse=True))
+    print(f"  key + reverse on {n} records: {t:.2f}s, stable: {a == sorted(records, key=lambda r: r[0], reverse=True)}")
 
-arr=[38, 27, 43, 3, 9, 82, 10]
-print("Original List:",arr)
-merge_sort(arr)
-print("Sorted List:",arr)
+    with tempfile.TemporaryDirectory() as tmp:
+        src, dst = os.path.join(tmp, "in.txt"), os.path.join(tmp, "out.txt")
+        with open(src, "w") as f:
+            f.writelines(f"{rng.randrange(10 ** 9):09d}\t{i}\n" for i in range(n))
+        run_bytes = max(1, os.path.getsize(src) // 16)
+        for w in sorted({1, workers}):
+            _, t = timed(lambda: external_sort(src, dst, run_bytes=run_bytes, workers=w))
+            with open(src) as f:
+                ok = sorted(f.read().splitlines()) == open(dst).read().splitlines()
+            print(f"external_sort, {n} lines in 16 runs, {w} worker(s): {t:.2f}s  ok: {ok}")
 
 
+if __name__ == "__main__":
+    if "--bench" in sys.argv:
+        args = sys.argv[sys.argv.index("--bench") + 1:]
+        bench(int(args[0]) if args else 10 ** 6)
+        sys.exit()
 
+    arr = [38, 27, 43, 3, 9, 82, 10]
+    print("Original List:", arr)
+    merge_sort(arr)
+    print("Sorted List:", arr)
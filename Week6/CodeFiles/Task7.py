@@ -1,59 +1,152 @@
 """
 Comprehensive Data Analysis App
-- Decorators: timing
+- Profiling: @profile spans and stage spans (profiling.py), off unless asked for
 - Exception handling: robust I/O, stats
 - JSON I/O: config + report
-- collections: Counter, defaultdict (internally optional), deque, namedtuple
-- Multithreading: parallel stats + category counts
-- Asyncio: async config load + async report save
-- Visualization: matplotlib bar chart
+- collections: Counter, namedtuple; NumPy kernels for stats, counts, moving average
+- Parallel analysis: serial / thread / process backends over data shards
+- Asyncio: one event loop; file work in threads, artifacts written concurrently
+- Visualization: matplotlib bar chart (Figure API, thread-safe)
+- Atomic writes: temp file + rename, so no reader sees a partial artifact
 - Exports: cleaned.csv + report.json + chart.png
+- Columnar cache: parsed input kept as memory-mapped .npy columns
+- Streaming mode: chunked input, mergeable stats, memory bounded by chunk size
 """
 
 import os
 import json
+import math
 import time
+import shutil
+import hashlib
 import random
+import argparse
 import threading
 import asyncio
-from collections import Counter, deque, namedtuple
-
+import contextlib
+import contextvars
+import uuid
+from collections import Counter, namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-import statistics as stats
+from matplotlib.figure import Figure
 
+import profiling
+from profiling import profile, span
 
-# =============== 1) Utility: timing decorator ===============
-def timing(func):
-    """Prints execution time of any function."""
-    def wrapper(*args, **kwargs):
-        start = time.time()
-        try:
-            return func(*args, **kwargs)
-        finally:
-            end = time.time()
-            print(f"[TIMING] {func.__name__} took {end - start:.4f}s")
-    return wrapper
+
+# =============== 1) Utility: profiling ===============
+# @profile and span() come from profiling.py: perf_counter_ns spans nested per
+# thread / asyncio task, aggregated into percentiles. Disabled, they cost a
+# flag check. Enable with --profile (or PROFILE=1 in the environment).
 
 
 # =============== 2) Data I/O (CSV/JSON) with exceptions ===============
-@timing
-def load_or_create_input(csv_path="input.csv", json_path="input.json", rows=100) -> pd.DataFrame:
+# Columnar cache: one .npy file per column plus meta.json, in a folder per
+# source file. Text columns are stored as category codes. Loading memory-maps
+# the arrays, so a warm load costs milliseconds whatever the row count.
+CACHE_DIR = ".task7_cache"
+
+
+def source_stamp(path) -> dict:
+    st = os.stat(path)
+    return {"source": os.path.abspath(path), "mtime_ns": st.st_mtime_ns, "size": st.st_size}
+
+
+def cache_folder(path, cache_dir=CACHE_DIR) -> str:
+    return os.path.join(cache_dir, hashlib.sha1(os.path.abspath(path).encode()).hexdigest()[:16])
+
+
+def save_columnar_cache(df: pd.DataFrame, stamp: dict, folder: str):
+    """Write df's columns next to the stamp of the file they were parsed from.
+    Raises TypeError for columns that cannot be cached (mixed-type text)."""
+    tmp = folder + ".tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    columns = []
+    for i, name in enumerate(df.columns):
+        col = df[name]
+        if col.dtype.kind in "biufcmM":
+            np.save(os.path.join(tmp, f"{i}.npy"), col.to_numpy())
+            columns.append({"name": name, "kind": "array"})
+        else:
+            codes, uniques = pd.factorize(col)   # missing values -> -1
+            categories = list(uniques)
+            if not all(isinstance(c, str) for c in categories):
+                raise TypeError(f"column {name!r} mixes text and other types")
+            code_type = np.int8 if len(categories) < 128 else np.int16 if len(categories) < 32768 else np.int32
+            np.save(os.path.join(tmp, f"{i}.npy"), codes.astype(code_type))
+            columns.append({"name": name, "kind": "category", "categories": categories})
+    with open(os.path.join(tmp, "meta.json"), "w") as f:
+        json.dump({**stamp, "rows": len(df), "columns": columns}, f)
+    shutil.rmtree(folder, ignore_errors=True)
+    os.replace(tmp, folder)
+
+
+def load_columnar_cache(path, cache_dir=CACHE_DIR):
+    """DataFrame backed by memory-mapped cache columns, or None if there is
+    no cache for path or the file changed since it was written."""
+    folder = cache_folder(path, cache_dir)
+    try:
+        with open(os.path.join(folder, "meta.json"), "r") as f:
+            meta = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    if {k: meta.get(k) for k in ("source", "mtime_ns", "size")} != source_stamp(path):
+        return None
+    data = {}
+    for i, column in enumerate(meta["columns"]):
+        values = np.load(os.path.join(folder, f"{i}.npy"), mmap_mode="r")
+        if column["kind"] == "category":
+            values = pd.Categorical.from_codes(values, categories=column["categories"])
+        data[column["name"]] = values
+    return pd.DataFrame(data, copy=False)
+
+
+def read_cached(path, parse, cache_dir=CACHE_DIR):
+    """(DataFrame, from_cache). On a miss parse() reads the file and the
+    result is cached for the next run; caching problems only cost speed."""
+    try:
+        df = load_columnar_cache(path, cache_dir)
+        if df is not None:
+            return df, True
+    except (OSError, ValueError, KeyError) as e:
+        print(f"[WARN] Ignoring unreadable cache for {path}: {e}")
+    stamp = source_stamp(path)   # taken before parsing: a file edited meanwhile misses next time
+    df = parse()
+    try:
+        save_columnar_cache(df, stamp, cache_folder(path, cache_dir))
+    except (OSError, TypeError, ValueError) as e:
+        print(f"[WARN] Could not cache {path}: {e}")
+    return df, False
+
+
+def read_json_records(json_path) -> pd.DataFrame:
+    with open(json_path, "r") as f:
+        data = json.load(f)
+    return pd.DataFrame(data)
+
+
+@profile
+def load_or_create_input(csv_path="input.csv", json_path="input.json", rows=100,
+                         cache_dir=CACHE_DIR) -> pd.DataFrame:
     """
     Try reading CSV; if missing, try JSON; if both missing,
     create sample data and save both.
+    A parsed CSV/JSON is served from the columnar cache while the file is unchanged.
     """
     try:
         if os.path.exists(csv_path):
-            df = pd.read_csv(csv_path)
-            print(f"Loaded CSV: {csv_path}")
+            df, cached = read_cached(csv_path, lambda: pd.read_csv(csv_path), cache_dir)
+            print(f"Loaded CSV: {csv_path}{' (columnar cache)' if cached else ''}")
             return df
 
         if os.path.exists(json_path):
-            with open(json_path, "r") as f:
-                data = json.load(f)
-            df = pd.DataFrame(data)
-            print(f"Loaded JSON: {json_path}")
+            df, cached = read_cached(json_path, lambda: read_json_records(json_path), cache_dir)
+            print(f"Loaded JSON: {json_path}{' (columnar cache)' if cached else ''}")
             return df
 
         # Create sample data
@@ -78,91 +171,389 @@ def load_or_create_input(csv_path="input.csv", json_path="input.json", rows=100)
         return pd.DataFrame({"id": [], "value": [], "category": []})
 
 
-# =============== 3) Processing helpers (collections) ===============
+# =============== 3) Processing helpers (NumPy kernels) ===============
+STATS_BLOCK = 1 << 20   # values widened to long double at a time
+MA_DIRECT_MAX = 32   # windows up to this size are summed directly, wider ones via prefix sums
+
+
 def compute_category_counts(series) -> dict:
-    return dict(Counter(series))
+    """{value: count} in order of first appearance, like dict(Counter(series))."""
+    codes, uniques = pd.factorize(pd.Series(series), use_na_sentinel=False)
+    counts = np.bincount(codes, minlength=len(uniques))
+    return dict(zip(uniques.tolist(), counts.tolist()))
+
+
+def sum_squares(vals, mean):
+    """Sum of squared distances from mean, in long double, STATS_BLOCK values at a time."""
+    return sum(((vals[i:i + STATS_BLOCK].astype(np.longdouble) - mean) ** 2).sum()
+               for i in range(0, vals.size, STATS_BLOCK))
 
 
 def compute_stats(values) -> dict:
+    """count, mean, median and sample stdev, as the statistics module computes them.
+
+    Sums run in extended precision (np.longdouble, where the platform has it),
+    which gives the correctly rounded mean and stdev that statistics returns.
+    """
     out = {}
     try:
-        vals = list(values)
-        out["count"] = len(vals)
-        out["mean"] = float(stats.mean(vals)) if vals else None
-        out["median"] = float(stats.median(vals)) if vals else None
-        out["stdev"] = float(stats.stdev(vals)) if len(vals) > 1 else 0.0
-    except stats.StatisticsError as e:
+        vals = np.asarray(values, dtype=float)
+        n = int(vals.size)
+        out["count"] = n
+        mean = vals.sum(dtype=np.longdouble) / n if n else None
+        out["mean"] = float(mean) if n else None
+        out["median"] = float(np.median(vals)) if n else None
+        if n > 1:
+            out["stdev"] = float(np.sqrt(sum_squares(vals, mean) / (n - 1)))
+        else:
+            out["stdev"] = 0.0
+    except (TypeError, ValueError) as e:
         print(f"[WARN] Stats error: {e}")
     return out
 
 
 def moving_average(values, window=5):
-    """Use deque to compute simple moving average efficiently."""
-    q = deque(maxlen=window)
-    avgs = []
-    s = 0.0
-    for v in values:
-        if len(q) == q.maxlen:
-            s -= q[0]
-        q.append(v)
-        s += v
-        avgs.append(s / len(q))
-    return avgs
-
-
-# =============== 4) Multithreading for CPU-light parallel tasks ===============
-@timing
-def parallel_analyze(df: pd.DataFrame) -> dict:
-    results = {}
-    lock = threading.Lock()
-
-    def t_stats():
-        res = compute_stats(df["value"] if "value" in df else [])
-        with lock:
-            results["stats"] = res
-
-    def t_counts():
-        res = compute_category_counts(df["category"] if "category" in df else [])
-        with lock:
-            results["category_counts"] = res
-
-    t1 = threading.Thread(target=t_stats, daemon=True)
-    t2 = threading.Thread(target=t_counts, daemon=True)
-    t1.start(); t2.start()
-    t1.join(); t2.join()
-    return results
+    """Simple moving average; the first window-1 entries average what is there so far.
+
+    Narrow windows are summed directly from shifted slices. Wider ones
+    use differences of prefix sums that restart every 16 windows, so rounding
+    error stays proportional to the window instead of growing with the input.
+    """
+    if window < 1:
+        raise ValueError("window must be at least 1")
+    vals = np.asarray(values, dtype=float)
+    n = vals.size
+    out = np.empty(n)
+    head = min(n, window - 1)
+    out[:head] = np.cumsum(vals[:head]) / np.arange(1, head + 1)
+    if n < window:
+        return out
+    if window <= MA_DIRECT_MAX:
+        sums = vals[:n - head].copy()        # one shifted add per offset, no drift
+        for k in range(1, window):
+            sums += vals[k:n - head + k]
+        out[head:] = sums / window
+        return out
+    block = 16 * window
+    for start in range(head, n, block):
+        stop = min(n, start + block)
+        sums = np.concatenate(([0.0], np.cumsum(vals[start - window + 1:stop])))
+        out[start:stop] = (sums[window:] - sums[:-window]) / window
+    return out
+
+
+# =============== 3b) Streaming helpers (mergeable partial results) ===============
+STREAM_CHUNK_ROWS = 1_000_000
+
+
+def iter_json_records(path, block_size=1 << 20):
+    """Yield the objects of a JSON array file or a JSON Lines file, reading
+    block_size characters at a time instead of the whole file."""
+    decoder = json.JSONDecoder()
+    buf, pos, eof = "", 0, False
+    with open(path, "r") as f:
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n,[]":
+                pos += 1
+            if pos == len(buf):
+                if eof:
+                    return
+                buf, pos = f.read(block_size), 0
+                eof = not buf
+                continue
+            try:
+                obj, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                more = f.read(block_size)      # object cut by the block boundary
+                eof = not more
+                buf, pos = buf[pos:] + more, 0
+                continue
+            yield obj
+            pos = end
+
+
+def iter_input_chunks(csv_path="input.csv", json_path="input.json", chunksize=STREAM_CHUNK_ROWS):
+    """DataFrames of up to chunksize rows from the CSV, or else the JSON input."""
+    if os.path.exists(csv_path):
+        yield from pd.read_csv(csv_path, chunksize=chunksize)
+        return
+    batch = []
+    for record in iter_json_records(json_path):
+        batch.append(record)
+        if len(batch) == chunksize:
+            yield pd.DataFrame(batch)
+            batch = []
+    if batch:
+        yield pd.DataFrame(batch)
+
+
+class RunningStats:
+    """count / mean / variance that can be updated per chunk and merged
+    (Welford, with Chan et al.'s formula for combining two parts)."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0          # sum of squared distances from the mean
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        if values.size:
+            mean = float(values.mean())
+            self.merge_part(values.size, mean, float(((values - mean) ** 2).sum()))
+
+    def merge(self, other):
+        self.merge_part(other.count, other.mean, other.m2)
+
+    def merge_part(self, count, mean, m2):
+        if not count:
+            return
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+
+    def stdev(self):
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+
+class TDigest:
+    """Mergeable quantile sketch: sorted centroids (mean, weight), kept small
+    near the tails and coarse in the middle by the k1 scale function.
+    Memory is O(compression) however many values go in; small inputs are kept
+    exactly."""
+
+    def __init__(self, compression=200):
+        self.compression = compression
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        if values.size:
+            self._absorb(values, np.ones(values.size))
+
+    def merge(self, other):
+        self._absorb(other.means, other.weights)
+
+    def _absorb(self, means, weights):
+        m = np.concatenate([self.means, means])
+        w = np.concatenate([self.weights, weights])
+        order = np.argsort(m, kind="stable")
+        m, w = m[order], w[order]
+        if m.size > 5 * self.compression:
+            q = (np.cumsum(w) - w / 2) / w.sum()
+            k = self.compression / (2 * np.pi) * np.arcsin(2 * q - 1)
+            cluster = np.floor(k - k[0]).astype(np.int64)
+            starts = np.flatnonzero(np.r_[True, cluster[1:] != cluster[:-1]])
+            w_sum = np.add.reduceat(w, starts)
+            m = np.add.reduceat(m * w, starts) / w_sum
+            w = w_sum
+        self.means, self.weights = m, w
+
+    def quantile(self, q):
+        if not self.weights.size:
+            return None
+        centres = np.cumsum(self.weights) - self.weights / 2
+        return float(np.interp(q * self.weights.sum(), centres, self.means))
+
+
+class MovingAverage:
+    """moving_average() over a stream of chunks: keeps the last window-1
+    values so each chunk continues exactly where the previous one ended."""
+
+    def __init__(self, window=5):
+        self.window = window
+        self.tail = np.empty(0)
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        ext = np.concatenate([self.tail, values])
+        out = moving_average(ext, self.window)[len(self.tail):]
+        if self.window > 1:
+            self.tail = ext[-(self.window - 1):]
+        return out
+
+
+def count_categories(counter: Counter, series):
+    """Add a chunk's category counts to counter, keeping first-seen order."""
+    counter.update(compute_category_counts(series))
+
+
+# =============== 4) Parallel analysis backends ===============
+# The data is cut into one contiguous shard per worker. Each shard yields a
+# mergeable partial (count, mean, sum of squares, category counts) and the
+# partials are reduced in shard order, so category counts keep their
+# first-appearance order. The process backend hands shards over in shared
+# memory instead of pickling them. The median is not mergeable: it is taken
+# once over the whole array (np.median is an O(n) selection).
+BACKENDS = ("serial", "thread", "process")
+
+
+def analyze_shard(values, codes, n_categories):
+    """Partial result for one shard: (count, mean, m2, category code counts)."""
+    n = values.size
+    mean = values.sum(dtype=np.longdouble) / n if n else np.longdouble(0)
+    m2 = sum_squares(values, mean) if n else np.longdouble(0)
+    return n, mean, m2, np.bincount(codes, minlength=n_categories)
+
+
+def analyze_shared_shard(spec):
+    """analyze_shard() in a worker process, reading its slice from shared memory."""
+    values_name, codes_name, size, start, stop, n_categories = spec
+    # Pool workers share the creator's resource tracker, so attaching here
+    # does not make the block outlive (or die with) this process.
+    values_shm = shared_memory.SharedMemory(name=values_name)
+    codes_shm = shared_memory.SharedMemory(name=codes_name)
+    try:
+        values = np.ndarray((size,), dtype=np.float64, buffer=values_shm.buf)[start:stop]
+        codes = np.ndarray((size,), dtype=np.intp, buffer=codes_shm.buf)[start:stop]
+        result = analyze_shard(values, codes, n_categories)
+        del values, codes          # views must go before the blocks close
+        return result
+    finally:
+        values_shm.close()
+        codes_shm.close()
+
+
+def to_shared(arr):
+    shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+    np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)[:] = arr
+    return shm
+
+
+class AnalysisBackend:
+    """Runs analyze_shard over the shards serially, on threads or in processes.
+    Keep one around (it is a context manager) to reuse its pool across calls."""
+
+    def __init__(self, kind="thread", workers=None):
+        if kind not in BACKENDS:
+            raise ValueError(f"Unknown backend {kind!r}; expected one of {BACKENDS}")
+        self.kind = kind
+        self.workers = 1 if kind == "serial" else (workers or os.cpu_count() or 1)
+        self.pool = None
+        if kind == "thread":
+            self.pool = ThreadPoolExecutor(self.workers)
+        elif kind == "process":
+            self.pool = ProcessPoolExecutor(self.workers)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+    def shards(self, n):
+        return [(n * i // self.workers, n * (i + 1) // self.workers) for i in range(self.workers)]
+
+    def run(self, values, codes, n_categories):
+        """[analyze_shard result per shard], in shard order."""
+        if self.kind == "serial":
+            return [analyze_shard(values, codes, n_categories)]
+        if self.kind == "thread":
+            return list(self.pool.map(lambda b: analyze_shard(values[b[0]:b[1]], codes[b[0]:b[1]], n_categories),
+                                      self.shards(values.size)))
+        values_shm, codes_shm = to_shared(values), to_shared(codes)
+        try:
+            specs = [(values_shm.name, codes_shm.name, values.size, start, stop, n_categories)
+                     for start, stop in self.shards(values.size)]
+            return list(self.pool.map(analyze_shared_shard, specs))
+        finally:
+            for shm in (values_shm, codes_shm):
+                shm.close()
+                shm.unlink()
+
+
+@profile
+def parallel_analyze(df: pd.DataFrame, backend="thread", workers=None) -> dict:
+    """Stats and category counts, as compute_stats / compute_category_counts
+    give them. backend is a name from BACKENDS or an open AnalysisBackend."""
+    values = df["value"].to_numpy(dtype=float) if "value" in df else np.empty(0)
+    if "category" in df:
+        codes, uniques = pd.factorize(df["category"], use_na_sentinel=False)
+        codes, uniques = codes.astype(np.intp, copy=False), uniques.tolist()
+    else:
+        codes, uniques = np.zeros(values.size, dtype=np.intp), []
+
+    runner = AnalysisBackend(backend, workers) if isinstance(backend, str) else backend
+    try:
+        partials = runner.run(values, codes, len(uniques))
+    finally:
+        if runner is not backend:
+            runner.close()
+
+    total = RunningStats()
+    counts = np.zeros(len(uniques), dtype=np.int64)
+    for n, mean, m2, shard_counts in partials:
+        total.merge_part(n, mean, m2)
+        counts += shard_counts[:len(uniques)]    # no category column: codes are all 0
+    n = total.count
+    return {
+        "stats": {
+            "count": n,
+            "mean": float(total.mean) if n else None,
+            "median": float(np.median(values)) if n else None,
+            "stdev": float(np.sqrt(total.m2 / (n - 1))) if n > 1 else 0.0,
+        },
+        "category_counts": dict(zip(uniques, counts.tolist())),
+    }
 
 
 # =============== 5) Visualization ===============
-@timing
+def atomic_write(path, write):
+    """Call write(tmp_path) on a temp file next to path, then rename it over
+    path, so readers see the old file or the complete new one, never a part."""
+    tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(tmp)
+        raise
+    return path
+
+
+@profile
 def plot_category_counts(counts: dict, out_path="category_counts.png"):
     if not counts:
         print("[WARN] No counts to plot.")
         return None
     labels = list(counts.keys())
     values = list(counts.values())
-    plt.figure(figsize=(7, 4))
-    plt.bar(labels, values)  # no explicit colors/styles
-    plt.title("Category Counts")
-    plt.xlabel("Category")
-    plt.ylabel("Count")
-    plt.tight_layout()
-    plt.savefig(out_path, dpi=150)
-    plt.close()
+    # A Figure of its own (not pyplot's global state), so this is safe off the main thread
+    fig = Figure(figsize=(7, 4))
+    ax = fig.add_subplot()
+    ax.bar(labels, values)  # no explicit colors/styles
+    ax.set_title("Category Counts")
+    ax.set_xlabel("Category")
+    ax.set_ylabel("Count")
+    fig.tight_layout()
+    atomic_write(out_path, lambda tmp: fig.savefig(tmp, dpi=150, format="png"))
     print(f"Saved chart: {out_path}")
     return out_path
 
 
-# =============== 6) Async tasks (config + report) ===============
-async def async_load_config(path="config.json"):
-    """Load config; create default if missing. Simulate I/O with small await."""
-    await asyncio.sleep(0.1)
-    default_cfg = {"moving_average_window": 5, "top_n_categories": 10}
+# =============== 6) Async tasks (config + artifacts) ===============
+# Blocking file work runs in worker threads via asyncio.to_thread, so one event
+# loop can overlap it with the rest of the pipeline.
+DEFAULT_CONFIG = {"moving_average_window": 5, "top_n_categories": 10}
+
+
+def load_config(path="config.json"):
+    """Load config; create default if missing."""
     if not os.path.exists(path):
-        with open(path, "w") as f:
-            json.dump(default_cfg, f, indent=4)
+        atomic_write(path, lambda tmp: write_json(DEFAULT_CONFIG, tmp))
         print(f"Created default config: {path}")
-        return default_cfg
+        return dict(DEFAULT_CONFIG)
     try:
         with open(path, "r") as f:
             cfg = json.load(f)
@@ -170,15 +561,23 @@ async def async_load_config(path="config.json"):
         return cfg
     except json.JSONDecodeError:
         print("[WARN] Config invalid JSON; using defaults.")
-        return default_cfg
+        return dict(DEFAULT_CONFIG)
+
+
+def write_json(data, path):
+    with open(path, "w") as f:
+        json.dump(data, f, indent=4)
+
+
+async def async_load_config(path="config.json"):
+    return await asyncio.to_thread(load_config, path)
 
 
 async def async_save_report(report: dict, path="report.json"):
-    """Save report asynchronously."""
-    await asyncio.sleep(0.1)
+    """Save report atomically from a worker thread."""
     try:
-        with open(path, "w") as f:
-            json.dump(report, f, indent=4)
+        with span("save_report"):
+            await asyncio.to_thread(atomic_write, path, lambda tmp: write_json(report, tmp))
         print(f"Async saved report: {path}")
         return path
     except OSError as e:
@@ -186,85 +585,211 @@ async def async_save_report(report: dict, path="report.json"):
         return None
 
 
+async def async_export_csv(df: pd.DataFrame, path="cleaned.csv"):
+    with span("export_csv"):
+        await asyncio.to_thread(atomic_write, path, lambda tmp: df.to_csv(tmp, index=False))
+    print(f"Exported cleaned data: {path}")
+    return path
+
+
 # ---- Helper to run async safely in any environment (including notebooks) ----
 def run_async(coro):
     """Run an async coroutine on a dedicated thread/event loop (safe in notebooks)."""
-    result = {"value": None}
+    result = {}
     def runner():
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
         try:
-            result["value"] = loop.run_until_complete(coro)
-        finally:
-            loop.close()
-    t = threading.Thread(target=runner, daemon=True)
+            result["value"] = asyncio.run(coro)
+        except BaseException as e:
+            result["error"] = e
+    # The loop thread starts from a copy of this context, so its spans nest
+    # under the caller's
+    t = threading.Thread(target=contextvars.copy_context().run, args=(runner,), daemon=True)
     t.start(); t.join()
+    if "error" in result:
+        raise result["error"]
     return result["value"]
 
 
 # =============== 7) End-to-end pipeline ===============
-@timing
-def run_pipeline():
-    # 1) Load / create input
-    df = load_or_create_input()
-    if df.empty:
-        print("[WARN] Input is empty; exiting early.")
-        return {}
-
-    # 2) Clean/prepare
+def clean_frame(df: pd.DataFrame) -> pd.DataFrame:
     try:
         df["value"] = pd.to_numeric(df["value"], errors="coerce")
         df = df.dropna(subset=["value", "category"])
     except Exception as e:
         print(f"[ERROR] Cleaning failed: {e}")
+    return df
 
-    # 3) Multithreaded analysis
-    results = parallel_analyze(df)
 
-    # 4) Async config, moving average via deque
-    cfg = run_async(async_load_config("config.json"))
-    window = int(cfg.get("moving_average_window", 5))
-    df["moving_avg"] = moving_average(df["value"].tolist(), window=window)
+def artifact_paths(report_path, chart_path, cleaned_csv):
+    return {
+        "report": report_path,
+        "chart": chart_path,
+        "cleaned_csv": cleaned_csv,
+        "config": "config.json",
+        "input_csv": "input.csv",
+        "input_json": "input.json",
+    }
 
-    # 5) Visualization
-    chart_path = plot_category_counts(results.get("category_counts", {}), "category_counts.png")
 
-    # 6) Export cleaned data
-    cleaned_csv = "cleaned.csv"
-    df.to_csv(cleaned_csv, index=False)
-    print(f"Exported cleaned data: {cleaned_csv}")
+async def export_artifacts(report: dict, category_counts: dict, df=None):
+    """Write the chart, cleaned.csv (unless already written) and report.json concurrently."""
+    jobs = [asyncio.to_thread(plot_category_counts, category_counts, "category_counts.png"),
+            async_save_report(report, "report.json")]
+    if df is not None:
+        jobs.append(async_export_csv(df, report["cleaned_csv"]))
+    chart_path, report_path, *_ = await asyncio.gather(*jobs)
+    return artifact_paths(report_path, chart_path, report["cleaned_csv"])
+
+
+async def pipeline_main(backend="thread", workers=None):
+    # Config is read while the input loads
+    cfg_task = asyncio.create_task(async_load_config("config.json"))
+
+    # 1) Load / create input
+    df = await asyncio.to_thread(load_or_create_input)
+    if df.empty:
+        print("[WARN] Input is empty; exiting early.")
+        await cfg_task
+        return {}
+
+    # 2) Clean/prepare
+    with span("clean"):
+        df = clean_frame(df)
+
+    # 3) Parallel analysis
+    results = parallel_analyze(df, backend, workers)
 
-    # 7) Build + async save report
+    # 4) Config, moving average
+    cfg = await cfg_task
+    window = int(cfg.get("moving_average_window", 5))
+    with span("moving_average"):
+        df["moving_avg"] = moving_average(df["value"].to_numpy(), window=window)
+
+    # 5) Build report
     # (namedtuple demo: pack stats neatly before dumping)
     Summary = namedtuple("Summary", ["count", "mean", "median", "stdev"])
     s = results.get("stats", {})
     summary_tuple = Summary(s.get("count"), s.get("mean"), s.get("median"), s.get("stdev"))
+    category_counts = results.get("category_counts", {})
 
     report = {
         "summary": summary_tuple._asdict(),          # namedtuple -> dict for JSON
-        "category_counts": results.get("category_counts", {}),
-        "chart_path": chart_path,
-        "cleaned_csv": cleaned_csv,
+        "category_counts": category_counts,
+        "chart_path": "category_counts.png" if category_counts else None,
+        "cleaned_csv": "cleaned.csv",
         "rows": int(len(df)),
         "moving_average_window": window,
     }
 
-    report_path = run_async(async_save_report(report, "report.json"))
+    # 6) Chart, cleaned data and report, written concurrently
+    with span("export"):
+        return await export_artifacts(report, category_counts, df)
 
-    # Return artifact paths
-    return {
-        "report": report_path,
-        "chart": chart_path,
+
+@profile
+def run_pipeline(backend="thread", workers=None):
+    """The whole pipeline on one event loop."""
+    return run_async(pipeline_main(backend, workers))
+
+
+# =============== 7b) Streaming pipeline (larger-than-RAM input) ===============
+@profile
+def stream_clean_and_summarize(chunksize, window, cleaned_csv):
+    """Clean every chunk into cleaned_csv and return (stats, digest, counts, chunks)."""
+    running, digest, counts = RunningStats(), TDigest(), Counter()
+    averager = MovingAverage(window)
+    # Same temp naming and cleanup as atomic_write: the file is appended to
+    # chunk by chunk and only renamed into place once complete
+    tmp_csv = f"{cleaned_csv}.{uuid.uuid4().hex}.tmp"
+    chunks = 0
+    try:
+        for chunk in iter_input_chunks("input.csv", "input.json", chunksize):
+            chunk = clean_frame(chunk)
+            values = chunk["value"].to_numpy(dtype=float)
+            running.update(values)
+            digest.update(values)
+            count_categories(counts, chunk["category"])
+            chunk["moving_avg"] = averager.update(values)
+            chunk.to_csv(tmp_csv, mode="a" if chunks else "w", header=not chunks, index=False)
+            chunks += 1
+        if running.count:
+            os.replace(tmp_csv, cleaned_csv)
+    finally:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(tmp_csv)
+    if running.count:
+        print(f"Exported cleaned data: {cleaned_csv} ({chunks} chunks)")
+    return running, digest, counts, chunks
+
+
+async def streaming_main(chunksize):
+    if not os.path.exists("input.csv") and not os.path.exists("input.json"):
+        await asyncio.to_thread(load_or_create_input)
+    cfg = await async_load_config("config.json")
+    window = int(cfg.get("moving_average_window", 5))
+
+    cleaned_csv = "cleaned.csv"
+    running, digest, counts, chunks = await asyncio.to_thread(
+        stream_clean_and_summarize, chunksize, window, cleaned_csv)
+    if not running.count:
+        print("[WARN] Input is empty; exiting early.")
+        return {}
+
+    category_counts = dict(counts)
+    report = {
+        "summary": {"count": running.count, "mean": running.mean,
+                    "median": digest.quantile(0.5), "stdev": running.stdev()},
+        "category_counts": category_counts,
+        "chart_path": "category_counts.png" if category_counts else None,
         "cleaned_csv": cleaned_csv,
-        "config": "config.json",
-        "input_csv": "input.csv",
-        "input_json": "input.json",
+        "rows": running.count,
+        "moving_average_window": window,
+        "mode": "streaming",
+        "chunks": chunks,
+        "median_method": "t-digest (approximate)",
     }
+    with span("export"):
+        return await export_artifacts(report, category_counts)
+
+
+@profile
+def run_streaming_pipeline(chunksize=STREAM_CHUNK_ROWS):
+    """run_pipeline() one chunk at a time. Peak memory depends on chunksize,
+    not on the input size; the median is approximate (t-digest)."""
+    return run_async(streaming_main(chunksize))
 
 
 # =============== 8) CLI entrypoint ===============
 if __name__ == "__main__":
-    artifacts = run_pipeline()
+    parser = argparse.ArgumentParser(description="Comprehensive Data Analysis App")
+    parser.add_argument("--stream", action="store_true",
+                        help="process the input in chunks (for inputs larger than memory)")
+    parser.add_argument("--chunksize", type=int, default=STREAM_CHUNK_ROWS, help="rows per chunk with --stream")
+    parser.add_argument("--backend", choices=BACKENDS, default="thread", help="parallel analysis backend")
+    parser.add_argument("--workers", type=int, default=None, help="analysis workers (default: CPU count)")
+    parser.add_argument("--profile", action="store_true", help="print a per-stage timing report at the end")
+    parser.add_argument("--profile-memory", action="store_true",
+                        help="with --profile, also record net allocations per stage (tracemalloc)")
+    parser.add_argument("--trace", metavar="PATH", help="write a Chrome trace of the run (implies --profile)")
+    parser.add_argument("--profile-json", metavar="PATH", help="write the profile summary as JSON (implies --profile)")
+    args = parser.parse_args()
+
+    profile_run = args.profile or args.profile_memory or args.trace or args.profile_json
+    if profile_run:
+        profiling.enable(memory=args.profile_memory)
+
+    if args.stream:
+        artifacts = run_streaming_pipeline(args.chunksize)
+    else:
+        artifacts = run_pipeline(args.backend, args.workers)
     print("\nArtifacts:")
     for k, v in artifacts.items():
         print(f"- {k}: {v}")
+
+    if profile_run:
+        print("\nProfile:")
+        profiling.report()
+        if args.trace:
+            print(f"Saved trace: {profiling.export_chrome_trace(args.trace)}")
+        if args.profile_json:
+            print(f"Saved profile: {profiling.export_json(args.profile_json)}")
@@ -0,0 +1,207 @@
+"""
+Task7 benchmarks
+
+Runs in a temp folder with generated input, never touching the real input.csv.
+
+Usage:
+    python bench_task7.py load [--rows N]
+    python bench_task7.py stream [--rows N] [--chunksize N]
+    python bench_task7.py kernels [--rows N]
+    python bench_task7.py scaling [--rows N] [--workers N]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter, deque
+
+import numpy as np
+import pandas as pd
+
+import Task7
+
+
+def make_input(path, rows, seed=0, chunk=1_000_000):
+    """CSV shaped like Task7's sample data: id, value, category. Written in
+    chunks, so this process stays small (children inherit its peak RSS)."""
+    rng = np.random.default_rng(seed)
+    for start in range(0, rows, chunk):
+        n = min(chunk, rows - start)
+        df = pd.DataFrame({
+            "id": np.arange(start + 1, start + n + 1),
+            "value": np.round(rng.uniform(10, 100, n), 2),
+            "category": np.array(["A", "B", "C", "D"])[rng.integers(0, 4, n)],
+        })
+        df.to_csv(path, mode="a" if start else "w", header=not start, index=False)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - start
+
+
+# =============== Columnar cache ===============
+def bench_load(tmp, rows):
+    csv_path = os.path.join(tmp, "input.csv")
+    cache_dir = os.path.join(tmp, "cache")
+    _, elapsed = timed(lambda: make_input(csv_path, rows))
+    print(f"generated {rows} rows ({os.path.getsize(csv_path) / 1e6:.0f} MB) in {elapsed:.1f}s")
+
+    parsed, cold = timed(lambda: pd.read_csv(csv_path))
+    (_, cached), first = timed(lambda: Task7.read_cached(csv_path, lambda: pd.read_csv(csv_path), cache_dir))
+    assert not cached
+    (warm_df, cached), warm = timed(lambda: Task7.read_cached(csv_path, lambda: pd.read_csv(csv_path), cache_dir))
+    assert cached
+    print(f"{'cold: pd.read_csv':<36} {cold:8.3f}s")
+    print(f"{'first run: parse + write cache':<36} {first:8.3f}s")
+    print(f"{'warm: memory-mapped cache':<36} {warm:8.3f}s  ({cold / warm:.0f}x faster than parsing)")
+
+    # Touching every value shows the cost moves to first use, not away
+    _, scan = timed(lambda: (warm_df["value"].sum(), warm_df["category"].value_counts()))
+    print(f"{'warm: first full scan of columns':<36} {scan:8.3f}s")
+
+    same = (parsed["id"].equals(warm_df["id"]) and parsed["value"].equals(warm_df["value"])
+            and (parsed["category"].to_numpy() == warm_df["category"].to_numpy()).all())
+    print("cached columns match pd.read_csv" if same else "MISMATCH between cache and pd.read_csv")
+
+    os.utime(csv_path)   # new mtime: the cache must not be used
+    (_, cached), stale = timed(lambda: Task7.read_cached(csv_path, lambda: pd.read_csv(csv_path), cache_dir))
+    print(f"{'after touching the source (reparse)':<36} {stale:8.3f}s  cache used: {cached}")
+
+
+# =============== Streaming pipeline ===============
+PIPELINE_RUN = """
+import os, resource, sys, time
+sys.path.insert(0, {here!r})
+os.chdir({tmp!r})
+import Task7
+start = time.perf_counter()
+Task7.{call}
+print("RESULT", time.perf_counter() - start, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+
+def run_in_child(tmp, call):
+    """(seconds, peak RSS in MB) of one pipeline run in a fresh interpreter."""
+    code = PIPELINE_RUN.format(here=os.path.dirname(os.path.abspath(__file__)), tmp=tmp, call=call)
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                         env={**os.environ, "MPLBACKEND": "Agg"}).stdout
+    _, seconds, rss_kb = out.strip().splitlines()[-1].split()
+    return float(seconds), int(rss_kb) / 1024
+
+
+def bench_stream(tmp, rows, chunksize):
+    make_input(os.path.join(tmp, "input.csv"), rows)
+    reports = {}
+    for label, call in (("whole file (run_pipeline)", "run_pipeline()"),
+                        (f"streaming, {chunksize} rows/chunk", f"run_streaming_pipeline({chunksize})")):
+        seconds, rss = run_in_child(tmp, call)
+        with open(os.path.join(tmp, "report.json")) as f:
+            reports[label] = json.load(f)["summary"]
+        print(f"{label:<36} {seconds:8.2f}s  peak RSS {rss:7.0f} MB")
+    full, streamed = reports.values()
+    for key in ("count", "mean", "median", "stdev"):
+        print(f"  {key:<7} {full[key]!s:>22} {streamed[key]!s:>22}")
+
+
+# =============== NumPy kernels ===============
+# The pure-Python versions the kernels replaced, kept as the reference.
+def reference_stats(values):
+    vals = list(values)
+    return {"count": len(vals),
+            "mean": float(statistics.mean(vals)) if vals else None,
+            "median": float(statistics.median(vals)) if vals else None,
+            "stdev": float(statistics.stdev(vals)) if len(vals) > 1 else 0.0}
+
+
+def reference_moving_average(values, window=5):
+    q = deque(maxlen=window)
+    avgs = []
+    s = 0.0
+    for v in values:
+        if len(q) == q.maxlen:
+            s -= q[0]
+        q.append(v)
+        s += v
+        avgs.append(s / len(q))
+    return avgs
+
+
+def bench_kernels(rows, window=5):
+    """Speedup per kernel as the input grows. For moving_average the difference
+    is the reference's own drift: its running sum accumulates rounding error."""
+    rng = np.random.default_rng(1)
+    sizes = [n for n in (10_000, 100_000, 1_000_000, 10_000_000) if n <= rows]
+    print(f"{'rows':>10} {'kernel':<16} {'python':>9} {'numpy':>9} {'speedup':>8}  max difference")
+    for n in sizes:
+        series = pd.Series(np.round(rng.uniform(10, 100, n), 2))
+        categories = pd.Series(np.array(["A", "B", "C", "D"])[rng.integers(0, 4, n)])
+        for name, ref, new, diff in (
+            ("compute_stats", lambda: reference_stats(series), lambda: Task7.compute_stats(series),
+             lambda a, b: max(abs(a[k] - b[k]) for k in a)),
+            ("moving_average", lambda: reference_moving_average(series.tolist(), window),
+             lambda: Task7.moving_average(series.to_numpy(), window),
+             lambda a, b: float(np.abs(np.asarray(a) - b).max())),
+            ("category_counts", lambda: dict(Counter(categories)),
+             lambda: Task7.compute_category_counts(categories),
+             lambda a, b: 0 if list(a.items()) == list(b.items()) else "DIFFERENT"),
+        ):
+            expected, slow = timed(ref)
+            got, fast = timed(new)
+            print(f"{n:>10} {name:<16} {slow:8.3f}s {fast:8.4f}s {slow / fast:7.0f}x  {diff(expected, got)}")
+
+
+# =============== Parallel analysis backends ===============
+def bench_scaling(rows, max_workers, repeat=3):
+    """parallel_analyze time per backend and worker count, best of `repeat`,
+    with pools started beforehand so only the analysis is timed."""
+    rng = np.random.default_rng(2)
+    df = pd.DataFrame({
+        "value": np.round(rng.uniform(10, 100, rows), 2),
+        # Categorical, as load_or_create_input returns it from the columnar cache
+        "category": pd.Categorical.from_codes(rng.integers(0, 4, rows), ["A", "B", "C", "D"]),
+    })
+    print(f"{rows} rows, {os.cpu_count()} CPUs")
+    print(f"{'backend':<8} {'workers':>7} {'seconds':>9} {'speedup':>8}")
+    baseline = None
+    for kind in Task7.BACKENDS:
+        for workers in ([1] if kind == "serial" else range(1, max_workers + 1)):
+            with Task7.AnalysisBackend(kind, workers) as backend, contextlib.redirect_stdout(io.StringIO()):
+                Task7.parallel_analyze(df, backend)        # warm up the pool
+                best = min(timed(lambda: Task7.parallel_analyze(df, backend))[1] for _ in range(repeat))
+            baseline = baseline or best
+            print(f"{kind:<8} {workers:>7} {best:9.3f} {baseline / best:7.2f}x")
+    _, median = timed(lambda: np.median(df["value"].to_numpy()))
+    print(f"serial part: np.median {median:.3f}s")
+
+
+# =============== CLI ===============
+def main():
+    parser = argparse.ArgumentParser(description="Task7 benchmarks")
+    parser.add_argument("bench", choices=["load", "stream", "kernels", "scaling"])
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--chunksize", type=int, default=Task7.STREAM_CHUNK_ROWS)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.bench == "load":
+            bench_load(tmp, args.rows)
+        elif args.bench == "stream":
+            bench_stream(tmp, args.rows, args.chunksize)
+        elif args.bench == "kernels":
+            bench_kernels(args.rows)
+        elif args.bench == "scaling":
+            bench_scaling(args.rows, args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""
+Profiling
+- Spans: @profile decorator and `with span(name)`, timed with perf_counter_ns
+- Nesting: the current span lives in a contextvar, so nesting follows each
+  thread and asyncio task (and asyncio.to_thread, which copies the context)
+- Aggregates per span path: count, total, min/max, p50/p95/p99 from a
+  log-scale histogram (constant memory however many calls)
+- Optional memory: net bytes allocated per span, via tracemalloc
+- Exports: text report, JSON summary, Chrome trace (chrome://tracing, Perfetto)
+- Disabled by default; a disabled @profile costs one flag check per call
+
+Environment variables (read at import):
+    PROFILE=1          enable, and print the report to stderr at exit
+    PROFILE_MEMORY=1   enable with tracemalloc
+    PROFILE_TRACE=path enable, and write a Chrome trace to path at exit
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import atexit
+import threading
+import functools
+import contextvars
+import tracemalloc
+from contextlib import nullcontext
+
+MAX_TRACE_EVENTS = 200_000     # later spans still count in the stats, not in the trace
+BUCKETS_PER_DOUBLING = 8       # histogram resolution: ~9% per bucket
+
+_enabled = False
+_memory = False
+_lock = threading.Lock()
+_current = contextvars.ContextVar("profiling_span", default="")
+_stats = {}                    # path -> SpanStats
+_events = []                   # Chrome trace "complete" events
+_dropped_events = 0
+_origin_ns = time.perf_counter_ns()
+_NULL = nullcontext()
+
+
+class SpanStats:
+    __slots__ = ("count", "total_ns", "min_ns", "max_ns", "buckets", "mem_bytes")
+
+    def __init__(self):
+        self.count = 0
+        self.total_ns = 0
+        self.min_ns = None
+        self.max_ns = 0
+        self.buckets = {}      # bucket index -> count
+        self.mem_bytes = 0
+
+    def add(self, ns, mem):
+        self.count += 1
+        self.total_ns += ns
+        self.min_ns = ns if self.min_ns is None else min(self.min_ns, ns)
+        self.max_ns = max(self.max_ns, ns)
+        b = int(math.log2(ns) * BUCKETS_PER_DOUBLING) if ns > 0 else 0
+        self.buckets[b] = self.buckets.get(b, 0) + 1
+        self.mem_bytes += mem
+
+    def percentile(self, p):
+        """Upper edge of the bucket holding the p-th percentile, capped at max."""
+        rank = p / 100 * self.count
+        seen = 0
+        for b in sorted(self.buckets):
+            seen += self.buckets[b]
+            if seen >= rank:
+                return min(self.max_ns, 2 ** ((b + 1) / BUCKETS_PER_DOUBLING))
+        return self.max_ns
+
+    def as_dict(self):
+        ms = 1e-6
+        return {
+            "count": self.count,
+            "total_ms": self.total_ns * ms,
+            "mean_ms": self.total_ns / self.count * ms,
+            "min_ms": self.min_ns * ms,
+            "max_ms": self.max_ns * ms,
+            "p50_ms": self.percentile(50) * ms,
+            "p95_ms": self.percentile(95) * ms,
+            "p99_ms": self.percentile(99) * ms,
+            "mem_net_bytes": self.mem_bytes if _memory else None,
+        }
+
+
+# =============== Switches ===============
+def enable(memory=False):
+    """Start recording spans; memory=True also tracks net allocations (slower)."""
+    global _enabled, _memory
+    _memory = memory
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def is_enabled():
+    return _enabled
+
+
+def reset():
+    global _dropped_events
+    with _lock:
+        _stats.clear()
+        _events.clear()
+        _dropped_events = 0
+
+
+# =============== Recording ===============
+def _record(path, name, start_ns, end_ns, mem):
+    global _dropped_events
+    with _lock:
+        stats = _stats.get(path)
+        if stats is None:
+            stats = _stats[path] = SpanStats()
+        stats.add(end_ns - start_ns, mem)
+        if len(_events) < MAX_TRACE_EVENTS:
+            # Kept as tuples; export_chrome_trace() builds the event dicts
+            _events.append((name, path, threading.get_ident(), start_ns, end_ns, mem))
+        else:
+            _dropped_events += 1
+
+
+class _Span:
+    __slots__ = ("name", "path", "token", "start", "mem_start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        parent = _current.get()
+        self.path = f"{parent}/{self.name}" if parent else self.name
+        self.token = _current.set(self.path)
+        self.mem_start = tracemalloc.get_traced_memory()[0] if _memory else 0
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter_ns()
+        mem = tracemalloc.get_traced_memory()[0] - self.mem_start if _memory else 0
+        _current.reset(self.token)
+        _record(self.path, self.name, self.start, end, mem)
+
+
+def span(name):
+    """Context manager timing the enclosed block as a child of the current span."""
+    return _Span(name) if _enabled else _NULL
+
+
+def profile(func=None, *, name=None):
+    """Decorator recording every call as a span. Use as @profile or
+    @profile(name="...")."""
+    if func is None:
+        return functools.partial(profile, name=name)
+    label = name or func.__qualname__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not _enabled:
+            return func(*args, **kwargs)
+        with _Span(label):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+# =============== Reporting ===============
+def stats():
+    """{span path: summary dict}, in path order (parents before children)."""
+    with _lock:
+        return {path: _stats[path].as_dict() for path in sorted(_stats)}
+
+
+def report(file=None):
+    """Print one line per span path, indented by nesting depth."""
+    rows = stats()
+    if not rows:
+        print("[PROFILE] nothing recorded", file=file)
+        return
+    print(f"{'span':<44} {'calls':>7} {'total ms':>10} {'mean ms':>9} "
+          f"{'p50':>8} {'p95':>8} {'p99':>8}" + (f" {'net KB':>9}" if _memory else ""), file=file)
+    for path, s in rows.items():
+        depth = path.count("/")
+        label = "  " * depth + path.rsplit("/", 1)[-1]
+        line = (f"{label:<44} {s['count']:>7} {s['total_ms']:>10.2f} {s['mean_ms']:>9.3f} "
+                f"{s['p50_ms']:>8.3f} {s['p95_ms']:>8.3f} {s['p99_ms']:>8.3f}")
+        if _memory:
+            line += f" {s['mem_net_bytes'] / 1024:>9.1f}"
+        print(line, file=file)
+    if _dropped_events:
+        print(f"[PROFILE] {_dropped_events} spans left out of the trace (limit {MAX_TRACE_EVENTS})", file=file)
+
+
+def export_json(path):
+    with open(path, "w") as f:
+        json.dump({"spans": stats(), "dropped_trace_events": _dropped_events}, f, indent=2)
+    return path
+
+
+def export_chrome_trace(path):
+    """Write recorded spans in the Trace Event format (load in chrome://tracing or ui.perfetto.dev)."""
+    pid = os.getpid()
+    with _lock:
+        events = [{"name": name, "cat": "span", "ph": "X", "pid": pid, "tid": tid,
+                   "ts": (start - _origin_ns) / 1000, "dur": (end - start) / 1000,
+                   "args": {"path": path, "mem_net_bytes": mem} if _memory else {"path": path}}
+                  for name, path, tid, start, end, mem in _events]
+    with open(path, "w") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+    return path
+
+
+_report_at_exit = os.environ.get("PROFILE") or os.environ.get("PROFILE_MEMORY")
+_trace_path = os.environ.get("PROFILE_TRACE")
+if _report_at_exit or _trace_path:
+    enable(memory=bool(os.environ.get("PROFILE_MEMORY")))
+if _report_at_exit:
+    atexit.register(report, sys.stderr)
+if _trace_path:
+    atexit.register(export_chrome_trace, _trace_path)
@@ -0,0 +1,50 @@
+import os
+
+import numpy as np
+import pytest
+
+import Task7
+
+
+@pytest.mark.parametrize("window", [5, 50])
+def test_streamed_moving_average_matches_one_call(window):
+    # Values near 1e9: a plain running cumsum over a long chunk drifts visibly here
+    values = 1e9 + np.random.default_rng(0).normal(0, 1, 500_000)
+    whole = Task7.moving_average(values, window)
+    for chunksize in (7, 4096, 65_536, values.size):
+        averager = Task7.MovingAverage(window)
+        streamed = np.concatenate([averager.update(values[i:i + chunksize])
+                                   for i in range(0, values.size, chunksize)])
+        np.testing.assert_allclose(streamed, whole, rtol=1e-13, atol=0)
+
+
+def write_input(rows):
+    with open("input.csv", "w") as f:
+        f.write("value,category\n")
+        for i in range(rows):
+            f.write(f"{i},{'AB'[i % 2]}\n")
+
+
+def test_stream_writes_cleaned_csv_without_leaving_a_temp_file(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write_input(10)
+    running, _, counts, chunks = Task7.stream_clean_and_summarize(4, 3, "cleaned.csv")
+    assert (running.count, chunks, dict(counts)) == (10, 3, {"A": 5, "B": 5})
+    assert sorted(os.listdir()) == ["cleaned.csv", "input.csv"]
+
+
+def test_failed_stream_removes_its_temp_file(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write_input(10)
+    clean, calls = Task7.clean_frame, []
+
+    def fail_on_second_chunk(df):
+        calls.append(df)
+        if len(calls) == 2:
+            raise OSError("disk full")
+        return clean(df)
+
+    monkeypatch.setattr(Task7, "clean_frame", fail_on_second_chunk)
+    with pytest.raises(OSError):
+        Task7.stream_clean_and_summarize(4, 3, "cleaned.csv")
+    assert os.listdir() == ["input.csv"]